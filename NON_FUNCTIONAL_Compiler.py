@@ -1,3 +1,6 @@
+# Historical notebook export. Importing this file runs demos, opens Tk windows and
+# writes to /mnt/data; use the side-effect-free modusynthx package instead.
+
 # Let's begin by outlining the grammar and core structure in a way that allows us to build it out further.
 
 # Define the foundational elements of the ModuSynthX programming language using a Python dictionary to simulate a language spec.
@@ -0,0 +1,178 @@
+# Benchmark: cost of the instrumentation API when no hooks are registered
+#
+#   python benchmarks/bench_hooks.py [--iterations N] [--repeat R]
+#
+# Compares AdvancedVM.execute() with an empty hook registry against
+# frozen_loop, a copy of the run loop as it was when hooks were added and
+# before any hook support existed around it. Both run the same bytecode,
+# compiled without the optimizer and type specialization so it only uses the
+# opcodes frozen_loop knows. The difference should sit inside the run-to-run
+# noise of the frozen loop itself. The traced loop is timed too, for reference.
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.opcodes import advanced_instruction_set
+from modusynthx.vm import AdvancedVM, EventCounter
+
+
+def counter_loop(iterations):
+    return advanced_clv_compile(typed=False, optimize=False, lines=[
+        f"quick WRITE i {iterations}",
+        "quick WRITE acc 0",
+        "quick WRITE one 1",
+        "quick LABEL top",
+        "quick READ acc",
+        "quick READ i",
+        "quick ADD",
+        "quick STORE acc",
+        "quick READ i",
+        "quick READ one",
+        "quick SUB",
+        "quick STORE i",
+        "quick READ i",
+        "quick JNZ top",
+        "quick END",
+    ])
+
+
+# AdvancedVM's run loop frozen as of the commit that introduced hooks; do not
+# update it along with the VM, it is the baseline the current loop is held to
+def frozen_loop(vm, bytecode, pc=0):
+    vm.running = True
+    while pc < len(bytecode) and vm.running:
+        opcode, args = bytecode[pc]
+
+        if opcode == advanced_instruction_set['WRITE']:
+            vm._page()[args[0]] = vm._eval(args[1:])
+        elif opcode == advanced_instruction_set['READ']:
+            vm.stack.append(vm._page().get(args[0], 0))
+        elif opcode == advanced_instruction_set['STORE']:
+            vm._page()[args[0]] = vm.stack.pop()
+        elif opcode == advanced_instruction_set['ADD']:
+            b, a = vm.stack.pop(), vm.stack.pop()
+            vm.stack.append(a + b)
+        elif opcode == advanced_instruction_set['SUB']:
+            b, a = vm.stack.pop(), vm.stack.pop()
+            vm.stack.append(a - b)
+        elif opcode == advanced_instruction_set['MUL']:
+            b, a = vm.stack.pop(), vm.stack.pop()
+            vm.stack.append(a * b)
+        elif opcode == advanced_instruction_set['DIV']:
+            b, a = vm.stack.pop(), vm.stack.pop()
+            vm.stack.append(a / b)
+        elif opcode == advanced_instruction_set['MOD']:
+            b, a = vm.stack.pop(), vm.stack.pop()
+            vm.stack.append(a % b)
+        elif opcode == advanced_instruction_set['JUMP']:
+            pc = args[0] - 1
+        elif opcode == advanced_instruction_set['JZ']:
+            if vm.stack.pop() == 0:
+                pc = args[0] - 1
+        elif opcode == advanced_instruction_set['JNZ']:
+            if vm.stack.pop() != 0:
+                pc = args[0] - 1
+        elif opcode == advanced_instruction_set['PRINT']:
+            print(vm.stack.pop())
+        elif opcode == advanced_instruction_set['CALL']:
+            vm.call_stack.append(pc)
+            pc = args[0] - 1
+        elif opcode == advanced_instruction_set['RET']:
+            if not vm.call_stack:
+                break
+            pc = vm.call_stack.pop()
+        elif opcode == advanced_instruction_set['PAGE']:
+            vm.pages.append({})
+        elif opcode == advanced_instruction_set['SWITCH']:
+            vm.page_index = int(args[0]) if args else 0
+        elif opcode == advanced_instruction_set['THREAD']:
+            vm._spawn(bytecode, args[0])
+        elif opcode == advanced_instruction_set['JOIN']:
+            vm._join()
+        elif opcode == advanced_instruction_set['QUEUE']:
+            vm.queue.put((args[0], args[1]))
+        elif opcode == advanced_instruction_set['DISPATCH']:
+            vm._dispatch(bytecode)
+        elif opcode == advanced_instruction_set['SIFT']:
+            vm._sift(args)
+        elif opcode == advanced_instruction_set['INFER']:
+            vm._infer(" ".join(map(str, args)))
+        elif opcode == advanced_instruction_set['OPTIMIZE']:
+            vm.stack = list(dict.fromkeys(vm.stack))
+        elif opcode == advanced_instruction_set['FLOWCMP']:
+            vm.stack = vm.stack[-256:]
+        elif opcode == advanced_instruction_set['RELEASE']:
+            vm.stack.clear()
+        elif opcode == advanced_instruction_set['PAUSE']:
+            time.sleep(0.25)
+        elif opcode == advanced_instruction_set['END']:
+            break
+        pc += 1
+
+
+def time_runs(run, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AdvancedVM hook overhead benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=15)
+    opts = parser.parse_args()
+
+    bytecode = counter_loop(opts.iterations)
+
+    def frozen():
+        frozen_loop(AdvancedVM(), bytecode)
+
+    def disabled():
+        AdvancedVM().execute(bytecode)
+
+    def traced():
+        vm = AdvancedVM()
+        EventCounter().attach(vm.hooks)
+        vm.execute(bytecode)
+
+    # Both loops must do the same work for the comparison to mean anything
+    reference, current = AdvancedVM(), AdvancedVM()
+    frozen_loop(reference, bytecode)
+    current.execute(bytecode)
+    if reference.pages != current.pages:
+        print("frozen loop and execute() disagree; counter_loop uses an opcode frozen_loop lacks")
+        return 2
+
+    # Warm up every variant before measuring
+    for run in (frozen, disabled, traced):
+        run()
+
+    results = {}
+    # Interleave variants so drift affects all of them equally
+    for _ in range(opts.repeat):
+        for name, run in (("frozen", frozen), ("disabled", disabled), ("traced", traced)):
+            results.setdefault(name, []).extend(time_runs(run, 1))
+
+    base = statistics.median(results["frozen"])
+    noise = statistics.median(abs(x - base) for x in results["frozen"]) / base
+    for name, samples in results.items():
+        median = statistics.median(samples)
+        print(f"{name:<9} median {median * 1000:8.2f} ms  ({(median / base - 1) * 100:+6.2f}% vs frozen)")
+
+    overhead = statistics.median(results["disabled"]) / base - 1
+    print(f"noise (MAD/median of frozen): {noise * 100:.2f}%")
+    verdict = "within noise" if abs(overhead) <= max(noise, 0.02) else "OUTSIDE noise"
+    print(f"execute() with no hooks vs frozen loop: {overhead * 100:+.2f}% -> {verdict}")
+    return 0 if verdict == "within noise" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
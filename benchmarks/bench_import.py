@@ -0,0 +1,59 @@
+# Benchmark: cold-start cost of importing the engine
+#
+#   python benchmarks/bench_import.py [--repeat R]
+#
+# Each sample is a fresh interpreter, so the numbers include Python start-up.
+# "python -c pass" is timed as well to show how much the engine itself adds.
+# The run also fails if the engine imports pull in tkinter or zipfile.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "python": "pass",
+    "package": "import modusynthx",
+    "compiler+vm": "from modusynthx import advanced_clv_compile, AdvancedVM",
+    "all tiers": "import modusynthx.vm as v; [getattr(v, n) for n in v.__all__]",
+}
+
+CHECK = (
+    "import sys, modusynthx.vm as v, modusynthx.compiler as c;"
+    "[getattr(v, n) for n in v.__all__]; [getattr(c, n) for n in c.__all__];"
+    "bad = [m for m in ('tkinter', 'zipfile') if m in sys.modules];"
+    "print(','.join(bad))"
+)
+
+
+def cold(code):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ModuSynthX cold import benchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    opts = parser.parse_args()
+
+    for name, code in CASES.items():
+        cold(code)  # warm the filesystem and bytecode caches
+        samples = [cold(code) for _ in range(opts.repeat)]
+        print(f"{name:<12} median {statistics.median(samples) * 1000:7.2f} ms  "
+              f"min {min(samples) * 1000:7.2f} ms")
+
+    loaded = subprocess.run([sys.executable, "-c", CHECK], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    if loaded:
+        print(f"FAIL: engine import loaded {loaded}")
+        return 1
+    print("engine import is free of tkinter and zipfile")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
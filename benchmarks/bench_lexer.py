@@ -0,0 +1,79 @@
+# Benchmark: tokenizer throughput in MB/s
+#
+#   python benchmarks/bench_lexer.py [--size MB] [--repeat R]
+#
+# Each corpus is repeated to about --size MB. "tokenize" is the typed scanner
+# over the whole buffer; "fields" is the per-line split the C.L.V. compilers
+# use; "str.split" is the old per-line split, for reference.
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from modusynthx.compiler.lexer import fields, tokenize
+from modusynthx.spec import modu_synthx_spec, sample_code
+
+CORPORA = {
+    "dotted": "\n".join(sample_code + modu_synthx_spec["syntax_sample"]["ai_agent"]) + "\n",
+    "clv": "\n".join([
+        "quick WRITE x 10",
+        "do WRITE greeting 'Hello, ModuSynthX World!'",
+        "do LABEL loop",
+        "do READ x",
+        "do WRITE one 1",
+        "do READ one",
+        "do SUB",
+        "do STORE x",
+        "do READ x",
+        "do JNZ loop",
+        "do CALL helper",
+        "do END",
+    ]) + "\n",
+}
+
+
+def scan_tokens(text):
+    count = 0
+    for _ in tokenize(text):
+        count += 1
+    return count
+
+
+def scan_fields(text):
+    return sum(len(fields(line)) for line in text.splitlines())
+
+
+def scan_split(text):
+    return sum(len(line.split()) for line in text.splitlines())
+
+
+SCANNERS = {"tokenize": scan_tokens, "fields": scan_fields, "str.split": scan_split}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ModuSynthX tokenizer throughput")
+    parser.add_argument("--size", type=float, default=4.0, help="corpus size in MB (default: 4)")
+    parser.add_argument("--repeat", type=int, default=5)
+    opts = parser.parse_args()
+
+    for corpus, sample in CORPORA.items():
+        text = sample * max(1, int(opts.size * 1e6 / len(sample.encode())))
+        megabytes = len(text.encode()) / 1e6
+        for name, scan in SCANNERS.items():
+            samples = []
+            for _ in range(opts.repeat):
+                start = time.perf_counter()
+                tokens = scan(text)
+                samples.append(time.perf_counter() - start)
+            best = min(samples)
+            print(f"{corpus:<7} {name:<10} {megabytes / statistics.median(samples):7.2f} MB/s median  "
+                  f"{megabytes / best:7.2f} MB/s best  {tokens / best / 1e6:6.2f} Mtok/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
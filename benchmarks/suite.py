@@ -0,0 +1,716 @@
+# Cross-VM benchmark suite for ModuSynthX workloads
+#
+#   python benchmarks/suite.py                       # run everything, write results JSON
+#   python benchmarks/suite.py -w arith_loop -t full,advanced
+#   python benchmarks/suite.py --save-baseline       # store results as the baseline
+#   python benchmarks/suite.py --baseline benchmarks/baseline.json --fail-on-regression
+#
+# Every workload is registered with @workload and, for each VM tier, returns a
+# "prepare" callable (or None if the tier cannot express the workload). prepare()
+# builds fresh state and returns the zero-argument callable that is timed, so
+# setup cost never leaks into the measurement. A timed callable with a `cleanup`
+# attribute has it called after each run, timed or not (scratch directories).
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from modusynthx.compiler import (IncrementalCompiler, Project, advanced_clv_compile, assemble, clv_compile, compile_script,
+                                 compile_to_vm_bytecode, full_clv_compile, to_instructions, write_listing)
+from modusynthx.compiler import paged as paged_compiler
+from modusynthx.vm import AdvancedVM, BasicVM, FlowScheduler, FullVM, ModuSynthX_VM, ModuSynthXVM, VMPool
+from modusynthx.vm import paged_vm
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results", "latest.json")
+
+SCALES = {"small": 1000, "medium": 10000, "large": 100000}
+
+# --- VM tiers ---
+TIERS = {
+    "msx": ModuSynthXVM,          # dict-instruction VM (MSX_xx opcodes)
+    "basic": BasicVM,             # compile_script VM
+    "threaded": ModuSynthX_VM,    # locked clv_compile VM used by the Tk app
+    "full": FullVM,
+    "advanced": AdvancedVM,
+    "advanced-ring": lambda: AdvancedVM(stack_capacity=1024),  # RingStack operand stack
+    "paged": paged_vm.AdvancedVM, # MemoryManager VM from the advanced editor project
+}
+
+WORKLOADS = {}
+
+
+def workload(name):
+    def register(fn):
+        WORKLOADS[name] = fn
+        return fn
+    return register
+
+
+# --- Workloads ---
+
+def counter_loop_source(n):
+    return [
+        f"do WRITE i {n}",
+        "do WRITE acc 0",
+        "do WRITE one 1",
+        "do LABEL top",
+        "do READ acc",
+        "do READ i",
+        "do ADD",
+        "do STORE acc",
+        "do READ i",
+        "do READ one",
+        "do SUB",
+        "do STORE i",
+        "do READ i",
+        "do JNZ top",
+        "do END",
+    ]
+
+
+@workload("arith_loop")
+def arith_loop(tier, n):
+    compilers = {"full": full_clv_compile, "advanced": advanced_clv_compile,
+                 "advanced-ring": advanced_clv_compile}
+    if tier not in compilers:
+        return None
+    bytecode = compilers[tier](counter_loop_source(n))
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+@workload("var_churn")
+def var_churn(tier, n):
+    compilers = {"threaded": clv_compile, "full": full_clv_compile, "advanced": advanced_clv_compile}
+    if tier not in compilers:
+        return None
+    lines = [f"do WRITE v{i % 512} {i}" for i in range(n)]
+    lines += [f"do READ v{i % 512}" for i in range(n)]
+    bytecode = compilers[tier](lines + ["do END"])
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+@workload("stack_churn")
+def stack_churn(tier, n):
+    # Bursts of pushes followed by FLOWCMP (keep last 256) and OPTIMIZE (dedupe)
+    compilers = {"threaded": clv_compile, "advanced": advanced_clv_compile,
+                 "advanced-ring": advanced_clv_compile}
+    if tier not in compilers:
+        return None
+    lines = [f"do WRITE v{i} {i}" for i in range(64)]
+    for block in range(max(1, n // 512)):
+        lines += [f"do READ v{(block + i) % 64}" for i in range(512)]
+        lines += ["do FLOWCMP", "do OPTIMIZE"]
+    bytecode = compilers[tier](lines + ["do END"])
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+@workload("call_recursion")
+def call_recursion(tier, n):
+    if tier != "advanced":
+        return None
+    depth = min(n, 5000)
+    bytecode = advanced_clv_compile([
+        f"do WRITE n {depth}",
+        "do WRITE one 1",
+        "do JUMP main",
+        "do FUNC down",
+        "do READ n",
+        "do JZ base",
+        "do READ n",
+        "do READ one",
+        "do SUB",
+        "do STORE n",
+        "do CALL down",
+        "do LABEL base",
+        "do RET",
+        "do LABEL main",
+        "do CALL down",
+        "do END",
+    ])
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+def helper_calls_source(n):
+    # A counter loop whose body goes through two small leaf helpers
+    return [
+        f"do WRITE i {n}",
+        "do WRITE acc 0",
+        "do WRITE one 1",
+        "do JUMP main",
+        "do FUNC bump",
+        "do READ acc",
+        "do READ i",
+        "do ADD",
+        "do STORE acc",
+        "do RET",
+        "do FUNC step",
+        "do READ i",
+        "do READ one",
+        "do SUB",
+        "do STORE i",
+        "do RET",
+        "do LABEL main",
+        "do CALL bump",
+        "do CALL step",
+        "do READ i",
+        "do JNZ main",
+        "do END",
+    ]
+
+
+@workload("helper_calls")
+def helper_calls(tier, n):
+    if tier not in ("advanced", "advanced-ring"):
+        return None
+    bytecode = advanced_clv_compile(helper_calls_source(n))
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+@workload("helper_calls_noinline")
+def helper_calls_noinline(tier, n):
+    if tier not in ("advanced", "advanced-ring"):
+        return None
+    bytecode = advanced_clv_compile(helper_calls_source(n), inline=False)
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+@workload("frame_calls")
+def frame_calls(tier, n):
+    # A loop calling a two-parameter function with a LOCAL; every call takes a pooled frame
+    if tier not in ("advanced", "advanced-ring"):
+        return None
+    bytecode = advanced_clv_compile([
+        f"do WRITE i {n}",
+        "do WRITE acc 0",
+        "do WRITE one 1",
+        "do JUMP main",
+        "do FUNC mad a b",
+        "do LOCAL t",
+        "do READ a",
+        "do READ b",
+        "do MUL",
+        "do STORE t",
+        "do READ t",
+        "do READ a",
+        "do ADD",
+        "do RET",
+        "do LABEL main",
+        "do READ i",
+        "do READ one",
+        "do CALL mad",
+        "do READ acc",
+        "do ADD",
+        "do STORE acc",
+        "do READ i",
+        "do READ one",
+        "do SUB",
+        "do STORE i",
+        "do READ i",
+        "do JNZ main",
+        "do END",
+    ])
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+def invariant_loop_source(n):
+    # Counter loop recomputing n * k every trip (hoistable, and unrollable since n is fixed)
+    return [
+        f"do WRITE i {n}",
+        "do WRITE n 3",
+        "do WRITE k 4",
+        "do WRITE acc 0",
+        "do WRITE one 1",
+        "do LABEL top",
+        "do READ n",
+        "do READ k",
+        "do MUL",
+        "do READ acc",
+        "do ADD",
+        "do STORE acc",
+        "do READ i",
+        "do READ one",
+        "do SUB",
+        "do STORE i",
+        "do READ i",
+        "do JNZ top",
+        "do END",
+    ]
+
+
+@workload("invariant_loop")
+def invariant_loop(tier, n):
+    if tier not in ("advanced", "advanced-ring"):
+        return None
+    bytecode = advanced_clv_compile(invariant_loop_source(n))
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+@workload("invariant_loop_noopt")
+def invariant_loop_noopt(tier, n):
+    if tier not in ("advanced", "advanced-ring"):
+        return None
+    bytecode = advanced_clv_compile(invariant_loop_source(n), optimize=False)
+    return lambda: lambda: TIERS[tier]().execute(bytecode)
+
+
+@workload("page_alloc")
+def page_alloc(tier, n):
+    if tier == "advanced":
+        pages = min(n, 2000)
+        lines = []
+        for i in range(pages):
+            lines += ["do PAGE", f"do SWITCH {i + 1}", f"do WRITE slot {i}"]
+        bytecode = advanced_clv_compile(lines + ["do END"])
+        return lambda: lambda: AdvancedVM().execute(bytecode)
+    if tier == "paged":
+        def prepare():
+            memory = paged_vm.MemoryManager()
+            def run():
+                for i in range(n):
+                    memory.allocate(i)
+            return run
+        return prepare
+    return None
+
+
+@workload("sift_large_heap")
+def sift_large_heap(tier, n):
+    # Half of the heap is dead (None-valued) and gets sifted
+    if tier == "msx":
+        def prepare():
+            vm = ModuSynthXVM()
+            for i in range(n):
+                vm.memory.allocate(f"r{i}", None if i % 2 else i)
+            return lambda: vm.execute([{"opcode": "MSX_08", "args": []}])
+        return prepare
+    if tier in ("basic", "threaded"):
+        def prepare():
+            vm = TIERS[tier]()
+            for i in range(n):
+                vm.vrma.alloc(f"r{i}")
+                if i % 2 == 0:
+                    vm.vrma.write(f"r{i}", i)
+            return lambda: vm.execute([(0x08, []), (0xFF, [])])
+        return prepare
+    if tier == "advanced":
+        def prepare():
+            vm = AdvancedVM()
+            vm.pages[0] = {f"r{i}": None if i % 2 else i for i in range(n)}
+            return lambda: vm.execute([(0x08, []), (0xFF, [])])
+        return prepare
+    return None
+
+
+@workload("compile_throughput")
+def compile_throughput(tier, n):
+    sample = [
+        "write.quick.on @console 'Hello, ModuSynthX World!'",
+        "ping.recalibrate.smart",
+        "sift.purge.on $TempTokens (after: 5 interactions)",
+        "flow.compress.idle",
+        "quick WRITE x 10",
+        "quick READ x",
+        "quick LABEL loop",
+        "quick JNZ loop",
+        "quick FUNC helper",
+        "quick RET",
+        "CALL helper",
+        "ADD",
+    ]
+    source = (sample * (n // len(sample) + 1))[:n]
+    dotted = sample[:4]  # the msx parser takes only keyword.modifier... statements
+    dotted = (dotted * (n // len(dotted) + 1))[:n]
+    compilers = {
+        "msx": lambda: to_instructions(compile_to_vm_bytecode(dotted)),
+        "basic": lambda: compile_script(source),
+        "threaded": lambda: clv_compile(source),
+        "full": lambda: full_clv_compile(source),
+        "advanced": lambda: advanced_clv_compile(source),
+        "paged": lambda: paged_compiler.compile_script(source),
+    }
+    if tier not in compilers:
+        return None
+    return lambda: compilers[tier]
+
+
+@workload("listing_roundtrip")
+def listing_roundtrip(tier, n):
+    # Write an MSX_xx listing of n instructions and assemble it back
+    if tier != "msx":
+        return None
+    with open(os.path.join(ROOT, "Syntax.synth")) as f:
+        program = compile_to_vm_bytecode(f.read().splitlines())
+    program = (program * (n // len(program) + 1))[:n]
+    def run():
+        out = io.StringIO()
+        write_listing(program, out)
+        out.seek(0)
+        assemble(out)
+    return lambda: run
+
+
+MODULES = 16
+
+
+# A main module importing MODULES modules of counted-loop functions, n lines in all
+def write_modules(root, n):
+    per = max(1, n // MODULES // 12)
+    main = [f"do IMPORT m{i}" for i in range(MODULES)] + [f"do CALL f{i}_0" for i in range(MODULES)] + ["do END"]
+    with open(os.path.join(root, "main.synth"), "w") as f:
+        f.write("\n".join(main))
+    for i in range(MODULES):
+        body = []
+        for j in range(per):
+            body += [f"do FUNC f{i}_{j}", f"do WRITE a {j}", f"do LABEL top{j}", "do READ a", "do WRITE one 1",
+                     "do READ one", "do SUB", "do STORE a", "do READ a", f"do JNZ top{j}"]
+            body += [f"do CALL f{i}_{j + 1}", "do RET"] if j + 1 < per else ["do RET"]
+        with open(os.path.join(root, f"m{i}.synth"), "w") as f:
+            f.write("\n".join(body))
+
+
+# A temporary directory holding write_modules(); removed here if setup fails,
+# otherwise by the timed callable's cleanup
+def scratch_modules(n, build=False):
+    root = tempfile.mkdtemp()
+    try:
+        write_modules(root, n)
+        if build:
+            Project(root).build("main")
+    except BaseException:
+        shutil.rmtree(root, ignore_errors=True)
+        raise
+    return root
+
+
+@workload("modules_build")
+def modules_build(tier, n):
+    # Every module compiled and linked, with an empty object cache
+    if tier != "advanced":
+        return None
+    def prepare():
+        root = scratch_modules(n)
+        def run():
+            shutil.rmtree(os.path.join(root, ".msxcache"), ignore_errors=True)
+            Project(root).build("main")
+        run.cleanup = lambda: shutil.rmtree(root, ignore_errors=True)
+        return run
+    return prepare
+
+
+@workload("modules_rebuild_one")
+def modules_rebuild_one(tier, n):
+    # One module edited since the last build: it alone is compiled, then all are linked
+    if tier != "advanced":
+        return None
+    def prepare():
+        root = scratch_modules(n, build=True)
+        edits = iter(range(1 << 30))
+        def run():
+            with open(os.path.join(root, "m0.synth"), "a") as f:
+                f.write(f"\ndo FUNC extra{next(edits)}\ndo RET")
+            Project(root).build("main")
+        run.cleanup = lambda: shutil.rmtree(root, ignore_errors=True)
+        return run
+    return prepare
+
+
+def grid_rows(n):
+    return [f"do WRITE v{i} {i}" if i % 3 else "quick OPTIMIZE" for i in range(n)]
+
+
+@workload("grid_recompile")
+def grid_recompile(tier, n):
+    # The Tk app's edit cycle: change one row of an n-row grid and snapshot the bytecode
+    if tier != "threaded":
+        return None
+    def prepare():
+        compiler = IncrementalCompiler(clv_compile)
+        for i, line in enumerate(grid_rows(n)):
+            compiler.update(i, line)
+        def run():
+            compiler.update(n // 2, "do READ v1")
+            return list(compiler.bytecode)
+        return run
+    return prepare
+
+
+@workload("grid_recompile_full")
+def grid_recompile_full(tier, n):
+    # The same edit with the whole grid recompiled, as the app used to do
+    if tier != "threaded":
+        return None
+    rows = grid_rows(n)
+    return lambda: lambda: clv_compile(rows)
+
+
+SHORT_SCRIPT = ["do WRITE x 5", "do WRITE y 7", "do READ x", "do READ y", "do ADD", "do STORE z", "do END"]
+
+
+@workload("short_runs_fresh")
+def short_runs_fresh(tier, n):
+    # Many tiny scripts, each on a newly built VM, as "msx run" does per process
+    compilers = {"full": full_clv_compile, "advanced": advanced_clv_compile}
+    if tier not in compilers:
+        return None
+    bytecode = compilers[tier](SHORT_SCRIPT)
+    def run():
+        for _ in range(max(1, n // 10)):
+            TIERS[tier]().execute(bytecode)
+    return lambda: run
+
+
+@workload("short_runs_pooled")
+def short_runs_pooled(tier, n):
+    # The same scripts on VMs borrowed from a VMPool and reset() in place, as msx daemon does
+    compilers = {"full": full_clv_compile, "advanced": advanced_clv_compile}
+    if tier not in compilers:
+        return None
+    bytecode = compilers[tier](SHORT_SCRIPT)
+    def prepare():
+        pool = VMPool(TIERS[tier], 1)
+        pool.release(pool.acquire())
+        def run():
+            for _ in range(max(1, n // 10)):
+                vm = pool.acquire()
+                vm.execute(bytecode)
+                pool.release(vm)
+        return run
+    return prepare
+
+
+def warm_state_source(n):
+    return [f"do WRITE v{i} {i}" for i in range(n)] + ["do PAGE", "do SWITCH 1", "do WRITE scratch 0", "do SWITCH 0"]
+
+
+@workload("warm_start_replay")
+def warm_start_replay(tier, n):
+    # Each session rebuilds a warmed-up state by running its initialization again
+    if tier != "advanced":
+        return None
+    init = advanced_clv_compile(warm_state_source(n))
+    session = advanced_clv_compile(["do WRITE v0 -1", "do READ v1", "do PRINT"])
+    def run():
+        for _ in range(20):
+            vm = AdvancedVM()
+            vm.execute(init)
+            vm.execute(session)
+    return lambda: run
+
+
+@workload("warm_start_fork")
+def warm_start_fork(tier, n):
+    # The same sessions started by fork() from one initialized VM (copy-on-write pages)
+    if tier != "advanced":
+        return None
+    session = advanced_clv_compile(["do WRITE v0 -1", "do READ v1", "do PRINT"])
+    def prepare():
+        base = AdvancedVM()
+        base.execute(advanced_clv_compile(warm_state_source(n)))
+        def run():
+            for _ in range(20):
+                base.fork().execute(session)
+        return run
+    return prepare
+
+
+@workload("thread_spawn_pages")
+def thread_spawn_pages(tier, n):
+    # THREAD tasks over a large page: readers share it, the writer copies it once
+    if tier != "advanced":
+        return None
+    source = warm_state_source(n) + ["do THREAD reader"] * 7 + ["do THREAD writer", "do JOIN", "do END",
+              "do FUNC reader", "do READ v1", "do RET",
+              "do FUNC writer", "do WRITE v1 0", "do RET"]
+    bytecode = advanced_clv_compile(source)
+    return lambda: lambda: AdvancedVM().execute(bytecode)
+
+
+@workload("arith_loop_lowpower")
+def arith_loop_lowpower(tier, n):
+    # arith_loop as an idle block: the same fast loop, yielding every few jumps
+    if tier != "advanced":
+        return None
+    source = [line.replace("do LABEL", "idle LABEL") for line in counter_loop_source(n)]
+    bytecode = advanced_clv_compile(source)
+    return lambda: lambda: AdvancedVM().execute(bytecode)
+
+
+@workload("arith_loop_verified")
+def arith_loop_verified(tier, n):
+    # arith_loop in the verifier's fast form: proved reads index the page directly
+    if tier != "advanced":
+        return None
+    bytecode = advanced_clv_compile(counter_loop_source(n), verify=True)
+    return lambda: lambda: AdvancedVM().execute(bytecode)
+
+
+@workload("thread_spawn_heavy")
+def thread_spawn_heavy(tier, n):
+    # n/64 heavy THREAD tasks: pool workers instead of a new thread per task
+    if tier != "advanced":
+        return None
+    source = [f"do WRITE n {max(1, n // 64)}", "do LABEL spawn", "heavy THREAD task", "do READ n",
+              "do WRITE one 1", "do READ one", "do SUB", "do STORE n", "do READ n", "do JNZ spawn",
+              "do JOIN", "do END", "do FUNC task", "do WRITE %done 1", "do RET"]
+    bytecode = advanced_clv_compile(source)
+    return lambda: lambda: AdvancedVM().execute(bytecode)
+
+
+@workload("flow_scheduler")
+def flow_scheduler(tier, n):
+    # arith_loop split over 16 tenant VMs, interleaved a quantum at a time
+    if tier != "advanced":
+        return None
+    bytecode = advanced_clv_compile(counter_loop_source(max(1, n // 16)))
+    def prepare():
+        scheduler = FlowScheduler(quantum=1000)
+        for _ in range(16):
+            scheduler.add(AdvancedVM(), bytecode)
+        return scheduler.run
+    return prepare
+
+
+# --- Measurement ---
+
+def summarize(samples):
+    return {
+        "runs": len(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def timed(run):
+    try:
+        start = time.perf_counter()
+        run()
+        return time.perf_counter() - start
+    finally:
+        cleanup = getattr(run, "cleanup", None)
+        if cleanup is not None:
+            cleanup()
+
+
+def measure(prepare, repeat, warmup):
+    for _ in range(warmup):
+        timed(prepare())
+    samples = [timed(prepare()) for _ in range(repeat)]
+    return summarize(samples)
+
+
+def run_suite(workloads, tiers, n, repeat, warmup, log=print):
+    results = {}
+    with open(os.devnull, "w") as sink:
+        for name in workloads:
+            for tier in tiers:
+                prepare = WORKLOADS[name](tier, n)
+                if prepare is None:
+                    continue
+                with contextlib.redirect_stdout(sink):
+                    stats = measure(prepare, repeat, warmup)
+                results[f"{name}/{tier}"] = stats
+                log(f"{name:<20} {tier:<9} median {stats['median'] * 1000:9.3f} ms  "
+                    f"stdev {stats['stdev'] * 1000:8.3f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"\n{'case':<32} {'baseline':>12} {'current':>12} {'change':>9}")
+    for key, stats in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<32} {'-':>12} {stats['median'] * 1000:10.3f}ms {'new':>9}")
+            continue
+        ratio = stats["median"] / base["median"] if base["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<32} {base['median'] * 1000:10.3f}ms {stats['median'] * 1000:10.3f}ms "
+              f"{(ratio - 1) * 100:+8.1f}%{flag}")
+    return regressions
+
+
+def parse_list(value, known, kind):
+    if not value:
+        return list(known)
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in known]
+    if unknown:
+        raise SystemExit(f"Unknown {kind}: {', '.join(unknown)} (choose from {', '.join(known)})")
+    return items
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ModuSynthX cross-VM benchmark suite")
+    parser.add_argument("-w", "--workloads", help="comma-separated workloads (default: all)")
+    parser.add_argument("-t", "--tiers", help="comma-separated VM tiers (default: all)")
+    parser.add_argument("-s", "--scale", default="small",
+                        help="small, medium, large or an explicit problem size")
+    parser.add_argument("-r", "--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help=f"also write the results to {os.path.relpath(DEFAULT_BASELINE, ROOT)}")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative median slowdown that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    opts = parser.parse_args(argv)
+
+    workloads = parse_list(opts.workloads, WORKLOADS, "workloads")
+    tiers = parse_list(opts.tiers, TIERS, "tiers")
+    n = SCALES[opts.scale] if opts.scale in SCALES else int(opts.scale)
+
+    results = run_suite(workloads, tiers, n, opts.repeat, opts.warmup)
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "scale": n,
+            "repeat": opts.repeat,
+            "warmup": opts.warmup,
+        },
+        "results": results,
+    }
+
+    targets = [opts.output] + ([DEFAULT_BASELINE] if opts.save_baseline else [])
+    for target in targets:
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        with open(target, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"results written to {target}")
+
+    if opts.baseline:
+        with open(opts.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != n:
+            print(f"warning: baseline scale {baseline['meta'].get('scale')} != current scale {n}")
+        regressions = compare(results, baseline["results"], opts.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {opts.threshold:.0%}")
+            if opts.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# ModuSynthX - importable compiler and VM package
+#
+# Importing the package has no side effects: nothing runs, nothing is written,
+# and tkinter/zipfile are never loaded. Public names resolve lazily on first
+# access, so "import modusynthx" costs only this module. The Tk editors live in
+# modusynthx.gui and are imported only when an editor is launched.
+import importlib
+
+_LAZY = {
+    # compilers
+    "compile_to_gm_bytecode": (".compiler.gm", "compile_to_gm_bytecode"),
+    "compile_to_vm_bytecode": (".compiler.gm", "compile_to_vm_bytecode"),
+    "compile_script": (".compiler.clv", "compile_script"),
+    "clv_compile": (".compiler.clv", "clv_compile"),
+    "full_clv_compile": (".compiler.clv", "full_clv_compile"),
+    "advanced_clv_compile": (".compiler.advanced", "advanced_clv_compile"),
+    # virtual machines
+    "ModuSynthXVM": (".vm.msx_vm", "ModuSynthXVM"),
+    "ModuSynthX_VM": (".vm.threaded_vm", "ModuSynthX_VM"),
+    "BasicVM": (".vm.basic_vm", "ModuSynthX_VM"),
+    "FullVM": (".vm.full_vm", "FullVM"),
+    "AdvancedVM": (".vm.advanced_vm", "AdvancedVM"),
+    "VMHooks": (".vm.hooks", "VMHooks"),
+    # language spec
+    "modu_synthx_spec": (".spec", "modu_synthx_spec"),
+    # editors (imports tkinter)
+    "ModuSynthX_App": (".gui", "ModuSynthX_App"),
+    "launch_app": (".gui", "launch_app"),
+    "launch_editor": (".gui", "launch_editor"),
+    "launch_advanced_editor": (".gui", "launch_advanced_editor"),
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _LAZY[name]
+    value = getattr(importlib.import_module(module, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,378 @@
+# msx - headless command-line runner for ModuSynthX
+#
+#   msx compile script.synth [-t tier] [--verify] [-o script.msxb]
+#   msx run script.synth|script.msxb|- [-t tier] [--verify] [--stats] [--trace-memory] [--daemon SOCKET]
+#            [--store FILE] [--rate N] [--deadline SECONDS]
+#   msx disasm script.synth|script.msxb [-t tier] [--verify] [--ir | --listing]
+#   msx serve [--host HOST] [--port PORT] [-t tier] [--pool N]
+#   msx daemon [--socket PATH] [--workers N] [--tiers full,advanced]
+#
+# Never imports tkinter. Program output goes to stdout; statistics go to stderr.
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+from .tiers import DEFAULT_TIER, TIERS, load_tier
+
+BYTECODE_FORMAT = "msx-bytecode"
+BYTECODE_VERSION = 1
+BYTECODE_SUFFIX = ".msxb"
+
+
+class CLIError(Exception):
+    pass
+
+
+# --- Input / output ---
+
+def read_text(path):
+    if path == "-":
+        return sys.stdin.read()
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError as e:
+        raise CLIError(f"cannot read {path}: {e.strerror}")
+
+
+def parse_bytecode(text):
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or data.get("format") != BYTECODE_FORMAT:
+        return None
+    if data.get("version") != BYTECODE_VERSION:
+        raise CLIError(f"unsupported bytecode version: {data.get('version')}")
+    bytecode = [op if isinstance(op, dict) else tuple(op) for op in data["bytecode"]]
+    return data["tier"], bytecode
+
+
+def dump_bytecode(tier, bytecode):
+    return json.dumps({
+        "format": BYTECODE_FORMAT,
+        "version": BYTECODE_VERSION,
+        "tier": tier,
+        "bytecode": bytecode,
+    }, separators=(",", ":"))
+
+
+# An MSX_xx listing (see compiler/listing.py) rather than source
+def is_listing(text):
+    for line in io.StringIO(text):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            return line.startswith("MSX_")
+    return False
+
+
+# Load a source, bytecode or listing file; returns (tier, bytecode, compile_seconds).
+# verify=True proves the program safe first (advanced tier) and returns its fast form.
+def load_program(path, tier, verify=False):
+    text = read_text(path)
+    loaded = parse_bytecode(text) if text.lstrip().startswith("{") else None
+    if loaded is None and is_listing(text):
+        from .compiler.listing import ListingError, assemble
+        try:
+            loaded = "msx", assemble(io.StringIO(text))
+        except ListingError as e:
+            raise CLIError(f"{path}: {e}")
+    if loaded is not None:
+        file_tier, bytecode = loaded
+        if tier and tier != file_tier:
+            raise CLIError(f"{path} was compiled for tier '{file_tier}', not '{tier}'")
+        start = time.perf_counter()
+        bytecode = verified(path, file_tier, bytecode) if verify else bytecode
+        return file_tier, bytecode, time.perf_counter() - start
+    tier = tier or DEFAULT_TIER
+    if verify and tier != "advanced":
+        raise CLIError("--verify needs the advanced tier")
+    if tier == "advanced" and "IMPORT" in text.upper():
+        from .compiler.modules import LinkError, build_program, directives
+        if directives(text.splitlines())[0]:
+            if path == "-":
+                raise CLIError("a program that IMPORTs modules must be read from a file")
+            start = time.perf_counter()
+            try:
+                bytecode, _ = build_program(path, text)
+            except LinkError as e:
+                raise CLIError(str(e))
+            except ValueError as e:
+                raise CLIError(f"{path}: {e}")
+            bytecode = verified(path, tier, bytecode) if verify else bytecode
+            return tier, bytecode, time.perf_counter() - start
+    compile_fn, _, _ = load_tier(tier)
+    start = time.perf_counter()
+    try:
+        bytecode = compile_fn(text.splitlines(), verify=True) if verify else compile_fn(text.splitlines())
+    except ValueError as e:  # LexError, ParseError, VerifyError, CompileError, ...
+        raise CLIError(f"{path}: {e}")
+    return tier, bytecode, time.perf_counter() - start
+
+
+def verified(path, tier, bytecode):
+    if tier != "advanced":
+        raise CLIError("--verify needs the advanced tier")
+    from .compiler.verifier import VerifyError, verify
+    try:
+        return verify(bytecode).bytecode
+    except VerifyError as e:
+        raise CLIError(f"{path}: {e}")
+
+
+# --- Disassembly ---
+
+def disassemble(tier, bytecode):
+    _, _, opcodes = load_tier(tier)
+    names = {code: name for name, code in opcodes.items()}
+    lines = []
+    for pc, op in enumerate(bytecode):
+        if isinstance(op, dict):
+            opcode, args = op["opcode"], op.get("args", [])
+        else:
+            opcode, args = op[0], op[1] if len(op) > 1 else []
+        shown = f"0x{opcode:02X}" if isinstance(opcode, int) else str(opcode)
+        name = names.get(opcode, "???")
+        if name in ("WRITEK", "WRITEP") and len(args) > 1:
+            args = [args[0], repr(args[1])]  # keep decoded constants distinguishable from names
+        lines.append(f"{pc:04d}  {shown:<6}  {name:<9} {' '.join(map(str, args))}".rstrip())
+    return "\n".join(lines)
+
+
+# --- Commands ---
+
+def cmd_compile(opts):
+    tier, bytecode, elapsed = load_program(opts.source, opts.tier, opts.verify)
+    payload = dump_bytecode(tier, bytecode)
+    output = opts.output
+    if output is None:
+        if opts.source == "-":
+            output = "-"
+        else:
+            output = os.path.splitext(opts.source)[0] + BYTECODE_SUFFIX
+    if output == "-":
+        sys.stdout.write(payload + "\n")
+    else:
+        with open(output, "w") as f:
+            f.write(payload)
+    if opts.stats:
+        report({"tier": tier, "instructions": len(bytecode), "compile_ms": elapsed * 1000})
+    return 0
+
+
+def cmd_run(opts):
+    if opts.daemon:
+        return run_on_daemon(opts)
+    if opts.trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    tier, bytecode, compile_time = load_program(opts.source, opts.tier, opts.verify)
+    _, vm_class, _ = load_tier(tier)
+    vm = vm_class()
+    if opts.store:
+        if tier != "advanced":
+            raise CLIError("--store needs the advanced tier")
+        from .vm.persist import PersistentStore, StoreError
+        try:
+            vm.persist = PersistentStore(opts.store)
+        except (OSError, StoreError) as e:
+            raise CLIError(f"cannot open store {opts.store}: {e}")
+    if opts.rate is not None or opts.deadline is not None:
+        if tier != "advanced":
+            raise CLIError("--rate and --deadline need the advanced tier")
+        from .vm.flow import FlowControl
+        vm.flow = FlowControl(rate=opts.rate, deadline=opts.deadline)
+    start = time.perf_counter()
+    try:
+        vm.execute(bytecode)
+    except Exception as e:
+        where = f" at pc {vm.pc}" if hasattr(vm, "pc") else ""
+        raise CLIError(f"runtime error{where}: {type(e).__name__}: {e}")
+    finally:
+        if opts.store:
+            vm.persist.close()
+    run_time = time.perf_counter() - start
+    expired = getattr(vm, "flow", None) is not None and vm.flow.status == "deadline"
+    if expired:
+        print(f"msx: run stopped at its deadline (pc {vm.pc})", file=sys.stderr)
+    if opts.stats or opts.trace_memory:
+        stats = {
+            "tier": tier,
+            "instructions": len(bytecode),
+            "compile_ms": compile_time * 1000,
+            "run_ms": run_time * 1000,
+        }
+        if hasattr(vm, "page_stats"):
+            stats.update((f"page_{key}", value) for key, value in vm.page_stats().items() if key != "refcounts")
+        if getattr(vm, "flow", None) is not None:
+            stats.update((f"flow_{key}", value) for key, value in vm.flow.stats().items())
+        if hasattr(vm, "modifier_stats"):
+            for modifier, counters in vm.modifier_stats().items():
+                stats.update((f"modifier_{modifier}_{key}", value) for key, value in counters.items())
+        stats.update(memory_stats())
+        if opts.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stats["traced_peak_kb"] = peak / 1024
+        report(stats)
+    return 1 if expired else 0
+
+
+# Hand the source to a running msx daemon; it compiles (or reuses) and runs it
+def run_on_daemon(opts):
+    from .daemon import DaemonClient, DaemonError
+    if opts.verify:
+        raise CLIError("--verify cannot be used with --daemon")
+    text = read_text(opts.source)
+    if text.lstrip().startswith("{"):
+        raise CLIError("--daemon takes source files; the daemon keeps its own compiled programs")
+    try:
+        with DaemonClient(opts.daemon) as client:
+            reply = client.request({"op": "run", "tier": opts.tier or DEFAULT_TIER, "source": text.splitlines()})
+    except DaemonError as e:
+        raise CLIError(str(e))
+    sys.stdout.write(reply["output"])
+    if opts.stats:
+        report({key: reply[key] for key in ("tier", "instructions", "cached", "compile_ms", "run_ms", "program")})
+    if reply.get("error"):
+        raise CLIError(reply["error"])
+    return 0
+
+
+def cmd_daemon(opts):
+    from .daemon import DEFAULT_SOCKET, DEFAULT_WORKERS, DaemonError, serve
+    from .tiers import SERVED_TIERS
+    tiers = opts.tiers.split(",") if opts.tiers else SERVED_TIERS
+    path = opts.socket or DEFAULT_SOCKET
+    print(f"[msx] daemon listening on {path}", file=sys.stderr)
+    try:
+        serve(path, opts.workers or DEFAULT_WORKERS, tiers)
+    except (OSError, ValueError, DaemonError) as e:
+        raise CLIError(str(e))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_disasm(opts):
+    tier, bytecode, _ = load_program(opts.source, opts.tier, opts.verify)
+    if opts.ir:
+        if tier != "advanced":
+            raise CLIError("--ir needs the advanced tier")
+        from .compiler.ir import build_ir
+        _, _, opcodes = load_tier(tier)
+        print(build_ir(bytecode, opcodes).dump())
+        return 0
+    if opts.listing:
+        if tier != "msx":
+            raise CLIError("--listing needs the msx tier")
+        from .compiler.listing import ListingError, write_listing
+        try:
+            write_listing(bytecode, sys.stdout)
+        except ListingError as e:
+            raise CLIError(str(e))
+        return 0
+    print(disassemble(tier, bytecode))
+    return 0
+
+
+def cmd_serve(opts):
+    from .server import DEFAULT_PORT, DEFAULT_POOL, DEFAULT_TIER, serve
+    port = opts.port or DEFAULT_PORT
+    print(f"[msx] serving VisualEditor.html on http://{opts.host}:{port}/", file=sys.stderr)
+    try:
+        serve(opts.host, port, opts.tier or DEFAULT_TIER, opts.pool or DEFAULT_POOL)
+    except (OSError, ValueError) as e:
+        raise CLIError(str(e))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def memory_stats():
+    try:
+        import resource
+    except ImportError:
+        return {}
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return {"max_rss_kb": maxrss / 1024 if sys.platform == "darwin" else maxrss}
+
+
+def report(stats):
+    for key, value in stats.items():
+        shown = f"{value:.3f}" if isinstance(value, float) else value
+        print(f"[msx] {key}: {shown}", file=sys.stderr)
+
+
+def positive_float(text):
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"must be above zero: {text}")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="msx", description="Headless ModuSynthX compiler and runner")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(p, stats=True):
+        p.add_argument("source", help="source (.synth) or compiled (.msxb) file, '-' for stdin")
+        p.add_argument("-t", "--tier", choices=list(TIERS), help=f"VM tier (default: {DEFAULT_TIER})")
+        p.add_argument("--verify", action="store_true",
+                       help="prove stack depths, jump targets and variable reads at load time (advanced tier)")
+        if stats:
+            p.add_argument("--stats", action="store_true", help="print timing and memory statistics")
+
+    p = sub.add_parser("compile", help="compile source to bytecode")
+    add_common(p)
+    p.add_argument("-o", "--output", help=f"output file (default: <source>{BYTECODE_SUFFIX}, '-' for stdout)")
+    p.set_defaults(func=cmd_compile)
+
+    p = sub.add_parser("run", help="compile if needed and execute")
+    add_common(p)
+    p.add_argument("--trace-memory", action="store_true", help="also report the tracemalloc peak")
+    p.add_argument("--daemon", metavar="SOCKET", help="run on an msx daemon listening on SOCKET")
+    p.add_argument("--store", metavar="FILE", help="keep %%variables in FILE between runs (advanced tier)")
+    p.add_argument("--rate", type=positive_float, help="instructions per second at most (advanced tier)")
+    p.add_argument("--deadline", type=float, metavar="SECONDS", help="stop the run after SECONDS (advanced tier)")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("disasm", help="print a bytecode listing")
+    add_common(p, stats=False)
+    p.add_argument("--ir", action="store_true", help="print the CFG/SSA form as JSON (advanced tier)")
+    p.add_argument("--listing", action="store_true", help="print an MSX_xx listing that run can load (msx tier)")
+    p.set_defaults(func=cmd_disasm)
+
+    # Defaults live in modusynthx.server, which is only imported when serving
+    p = sub.add_parser("serve", help="run the local execution server for VisualEditor.html")
+    p.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, help="port (default: 8765)")
+    p.add_argument("-t", "--tier", choices=list(TIERS), help="VM tier for new sessions (default: full)")
+    p.add_argument("--pool", type=int, help="VMs per tier, i.e. concurrent runs (default: 4)")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("daemon", help="keep compiled programs and warm VM pools behind a UNIX socket")
+    p.add_argument("--socket", help="socket path (default: /tmp/msx.sock)")
+    p.add_argument("--workers", type=int, help="runs executing at once (default: 4)")
+    p.add_argument("--tiers", help="comma-separated tiers to load (default: threaded,full,advanced,paged)")
+    p.set_defaults(func=cmd_daemon)
+    return parser
+
+
+def main(argv=None):
+    opts = build_parser().parse_args(argv)
+    try:
+        return opts.func(opts)
+    except CLIError as e:
+        print(f"msx: error: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
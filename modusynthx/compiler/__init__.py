@@ -0,0 +1,34 @@
+# Compilers, resolved lazily like modusynthx.vm
+import importlib
+
+_LAZY = {
+    "advanced_clv_compile": (".advanced", "advanced_clv_compile"),
+    "clv_compile": (".clv", "clv_compile"),
+    "compile_script": (".clv", "compile_script"),
+    "full_clv_compile": (".clv", "full_clv_compile"),
+    "IncrementalCompiler": (".incremental", "IncrementalCompiler"),
+    "Project": (".modules", "Project"),
+    "build_program": (".modules", "build_program"),
+    "ProgramCache": (".cache", "ProgramCache"),
+    "compile_to_gm_bytecode": (".gm", "compile_to_gm_bytecode"),
+    "compile_to_vm_bytecode": (".gm", "compile_to_vm_bytecode"),
+    "compile_msx_instructions": (".gm", "compile_msx_instructions"),
+    "to_instructions": (".gm", "to_instructions"),
+    "tokenize": (".lexer", "tokenize"),
+    "parse": (".parser", "parse"),
+    "verify": (".verifier", "verify"),
+    "VerifyError": (".verifier", "VerifyError"),
+    "assemble": (".listing", "assemble"),
+    "write_listing": (".listing", "write_listing"),
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _LAZY[name]
+    value = getattr(importlib.import_module(module, __name__), attr)
+    globals()[name] = value
+    return value
@@ -0,0 +1,211 @@
+# Compiler now with macros, functions, threading
+from functools import lru_cache
+
+from ..opcodes import FLOW_SETTINGS, MODIFIER_POLICY, advanced_instruction_set
+from .inline import INLINE_LIMIT, inline_functions
+from .lexer import fields
+from .ir import optimize as optimize_ir
+from .loops import optimize_loops
+from .slots import assign_slots
+from .typed import decode_literal, specialize
+from .verifier import VerifyError, verify as verify_bytecode
+
+
+# Split one source line into (mod, CMD, args); shared across compiles
+@lru_cache(maxsize=4096)
+def _split(line):
+    parts = fields(line)
+    if parts and parts[0].startswith('flow.'):
+        return _flow_statement(parts)
+    if len(parts) < 2:
+        return None
+    return parts[0], parts[1].upper(), tuple(parts[2:])
+
+
+# flow.<setting>[.modifier] [value] lines, in the spec's dotted form:
+# flow.compress and flow.release are FLOWCMP and RELEASE, the rest set limits
+def _flow_statement(parts):
+    chain = parts[0].split('.')
+    mod = chain[2] if len(chain) > 2 else 'do'
+    setting = chain[1]
+    if setting in ('compress', 'release'):
+        return mod, 'FLOWCMP' if setting == 'compress' else 'RELEASE', tuple(parts[1:])
+    if setting not in FLOW_SETTINGS:
+        raise ValueError(f"Unknown flow setting: {parts[0]}")
+    if setting == 'unlimited':
+        if len(parts) != 1:
+            raise ValueError(f"{parts[0]} takes no value")
+    elif len(parts) != 2 or (decode_literal(parts[1]) or ('str',))[0] not in ('int', 'float'):
+        raise ValueError(f"{parts[0]} takes one number")
+    elif setting != 'deadline' and not decode_literal(parts[1])[1] > 0:
+        raise ValueError(f"{parts[0]} must be above zero")
+    return mod, 'FLOW', (setting,) + tuple(parts[1:2])
+
+
+# Expand a macro invocation, following macros that name other macros. Results
+# are memoized per compile so each macro is resolved once however often it is used.
+def _expand(cmd, macros, cache, seen=()):
+    if cmd in cache:
+        return cache[cmd]
+    if cmd in seen:
+        raise ValueError(f"Recursive macro: {cmd}")
+    body = macros[cmd]
+    if not body:
+        raise ValueError(f"Empty macro: {cmd}")
+    name, args = body[0].upper(), list(body[1:])
+    if name in macros:
+        name, args = _expand(name, macros, cache, seen + (cmd,))
+    cache[cmd] = (name, args)
+    return name, args
+
+
+# Parse source into statements with macros expanded and TYPE lines collected
+def parse_statements(lines):
+    macros, declared, statements = {}, {}, []
+    parsed = [_split(line.strip()) for line in lines]
+    for entry in parsed:
+        if entry is None:
+            continue
+        mod, cmd, args = entry
+        if cmd == 'MACRO':
+            macros[args[0].upper()] = args[1:]
+        elif cmd == 'TYPE':
+            declared[args[0]] = args[1].lower()
+    cache = {}
+    for entry in parsed:
+        if entry is None:
+            continue
+        mod, cmd, args = entry
+        if cmd in ('MACRO', 'TYPE'):
+            continue
+        if cmd in macros:
+            cmd, args = _expand(cmd, macros, cache)
+        statements.append((mod, cmd, list(args)))
+    return apply_policies(statements), declared
+
+
+# Insert "MODE policy modifier" wherever the execution policy changes. A
+# modifier in MODIFIER_POLICY sets it for its statement; on a FUNC or LABEL line
+# it sets it for the block that follows, which other modifiers inherit. Code
+# after a LABEL, FUNC or CALL can be entered in any mode, so it restates its
+# own. Programs that only use the optimized policy are left as they are.
+def apply_policies(statements):
+    if all(MODIFIER_POLICY.get(mod, 'optimized') == 'optimized' for mod, _, _ in statements):
+        return statements
+    default = ('optimized', 'default')
+    block, current, out = default, None, []
+    for statement in statements:
+        mod, cmd, _ = statement
+        policy = MODIFIER_POLICY.get(mod)
+        if cmd in ('FUNC', 'LABEL'):
+            if policy is not None:
+                block = (policy, mod)
+            elif cmd == 'FUNC':
+                block = default
+            current = None
+        elif _emits(cmd):
+            wanted = (policy, mod) if policy is not None else block
+            if current is None or wanted[0] != current[0]:
+                out.append((mod, 'MODE', list(wanted)))
+            current = None if cmd == 'CALL' else wanted
+        out.append(statement)
+    return out
+
+
+# Route accesses to % (persistent) variables to the opcodes that use vm.persist.
+# Runs last, so the IR, loop and type passes see them as ordinary variables.
+def persistent_ops(bytecode):
+    ops = advanced_instruction_set
+    read, store, write, writek, writev = ops['READ'], ops['STORE'], ops['WRITE'], ops['WRITEK'], ops['WRITEV']
+    out = []
+    for opcode, args in bytecode:
+        if not args or opcode not in (read, store, write, writek, writev):
+            out.append((opcode, args))
+            continue
+        dest = str(args[0])
+        if opcode == read and dest[:1] == '%':
+            out.append((ops['LOADP'], [dest]))
+        elif opcode == store and dest[:1] == '%':
+            out.append((ops['STOREP'], [dest]))
+        elif opcode == writek and dest[:1] == '%':
+            out.append((ops['WRITEP'], [dest, args[1]]))
+        elif opcode == writev and (dest[:1] == '%' or str(args[1])[:1] == '%'):
+            out.append((ops['MOVEP'], [dest, args[1]]))
+        elif opcode == write and len(args) > 1 and (dest[:1] == '%' or str(args[1])[:1] == '%'):
+            literal = decode_literal(str(args[1]))
+            if literal is None:
+                out.append((ops['MOVEP'], [dest, args[1]]))
+            else:
+                out.append((ops['WRITEP'], [dest, literal[1]]))
+        elif opcode == write and len(args) == 1 and dest[:1] == '%':
+            out.append((ops['WRITEP'], [dest, 0]))
+        else:
+            out.append((opcode, args))
+    return out
+
+
+def _emits(cmd):
+    return cmd in advanced_instruction_set and cmd not in ('LABEL', 'FUNC', 'LOCAL')
+
+
+# Statements -> unoptimized bytecode with addresses resolved. Jump and call
+# targets not defined in `statements` become `unresolved(name)`, or 0 when that
+# is None. Returns (bytecode, labels, functions, frames).
+def lower(statements, inline=True, inline_limit=INLINE_LIMIT, unresolved=None):
+    # Slots first, so inlined global accesses are never captured by a caller's locals
+    statements, frames = assign_slots(statements)
+    if inline:
+        statements = inline_functions(statements, inline_limit, _emits)
+
+    # First pass to register labels and functions
+    labels, functions, pc = {}, {}, 0
+    for mod, cmd, args in statements:
+        if cmd == 'LABEL':
+            labels[args[0]] = pc
+        elif cmd == 'FUNC':
+            functions[args[0]] = pc
+        elif _emits(cmd):
+            pc += 1
+
+    def address(table, name):
+        if name in table:
+            return table[name]
+        return 0 if unresolved is None else unresolved(name)
+
+    # Second pass to generate bytecode
+    bytecode = []
+    for mod, cmd, args in statements:
+        if not _emits(cmd):
+            continue
+        opcode = advanced_instruction_set[cmd]
+        if cmd in ['JUMP', 'JZ', 'JNZ'] and args:
+            args = [address(labels, args[0])]
+        elif cmd == 'CALL' and args:
+            argc, size = frames.get(args[0], (0, 0))
+            args = [address(functions, args[0]), argc, size] if size else [address(functions, args[0])]
+        elif cmd == 'THREAD' and args:
+            size = frames.get(args[0], (0, 0))[1]
+            args = [address(functions, args[0]), size] if size else [address(functions, args[0])]
+        elif cmd == 'QUEUE' and len(args) >= 2:
+            size = frames.get(args[1], (0, 0))[1]
+            args = [int(args[0]), address(functions, args[1])] + ([size] if size else [])
+        bytecode.append((opcode, args))
+    return bytecode, labels, functions, frames
+
+
+def _undefined(name):
+    raise VerifyError(f"{name} is not a label or function")
+
+
+# verify=True rejects jumps and calls to undefined names instead of sending
+# them to 0, and returns the verified fast form (see verifier.py)
+def advanced_clv_compile(lines, typed=True, inline=True, inline_limit=INLINE_LIMIT, optimize=True, verify=False):
+    statements, declared = parse_statements(lines)
+    bytecode = lower(statements, inline, inline_limit, _undefined if verify else None)[0]
+    if optimize:
+        bytecode = optimize_ir(bytecode, advanced_instruction_set)
+        bytecode = optimize_loops(bytecode, advanced_instruction_set)
+    if typed:
+        bytecode = specialize(bytecode, advanced_instruction_set, declared)[0]
+    bytecode = persistent_ops(bytecode)
+    return verify_bytecode(bytecode).bytecode if verify else bytecode
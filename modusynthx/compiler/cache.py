@@ -0,0 +1,60 @@
+# Compiled-program cache shared by the long-running front ends (msx serve, msx daemon)
+#
+# Programs are keyed by a digest of their tier and source lines, so the same
+# script sent by two clients, or sent again after an undo, compiles once. The
+# digest doubles as a program id that clients can run by. Least recently used
+# entries are dropped past `size`.
+import hashlib
+import threading
+from collections import OrderedDict
+
+PROGRAM_CACHE_SIZE = 64
+
+
+def program_id(tier, lines):
+    digest = hashlib.sha1(tier.encode())
+    for line in lines:
+        digest.update(b"\n" + line.encode())
+    return digest.hexdigest()
+
+
+class ProgramCache:
+    def __init__(self, size=PROGRAM_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()   # program id -> (tier, bytecode)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Returns (bytecode, cached) for `lines`, compiling on a miss
+    def get(self, tier, lines, compile_fn):
+        bytecode, _, cached = self.compile(tier, lines, compile_fn)
+        return bytecode, cached
+
+    # Returns (bytecode, program id, cached)
+    def compile(self, tier, lines, compile_fn):
+        key = program_id(tier, lines)
+        entry = self.lookup(key)
+        if entry is not None:
+            return entry[1], key, True
+        with self.lock:
+            self.misses += 1
+        bytecode = compile_fn(list(lines))
+        with self.lock:
+            self.entries[key] = (tier, bytecode)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return bytecode, key, False
+
+    # (tier, bytecode) for a program id, or None if it was never compiled or was evicted
+    def lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
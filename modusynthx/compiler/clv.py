@@ -0,0 +1,83 @@
+# C.L.V. grammar compilers: "<modifier> <command> <args...>" per line
+from ..opcodes import (BASIC_INSTRUCTION_SET, CLV_INSTRUCTION_SET, MODIFIER_SET,
+                       extended_instruction_set)
+from .lexer import fields
+from .typed import specialize
+
+
+# --- Bytecode Compiler ---
+def compile_script(script_lines):
+    bytecode = []
+    for line in script_lines:
+        parts = fields(line)
+        if len(parts) < 2: continue
+
+        mod = parts[0]
+        cmd = parts[1]
+        args = parts[2:] if len(parts) > 2 else []
+
+        instr = MODIFIER_SET.get(mod, cmd).upper()
+        opcode = BASIC_INSTRUCTION_SET.get(instr, None)
+
+        if opcode is not None:
+            bytecode.append((opcode, args))
+    return bytecode
+
+
+# Bytecode Compiler from C.L.V. Grammar
+def clv_compile(lines):
+    bytecode = []
+    for line in lines:
+        parts = fields(line)
+        if len(parts) < 2:
+            continue
+        mod = parts[0]
+        cmd = parts[1]
+        args = parts[2:]
+
+        instr_name = MODIFIER_SET.get(mod, cmd).upper()
+        opcode = CLV_INSTRUCTION_SET.get(instr_name, None)
+        if opcode is not None:
+            bytecode.append((opcode, args))
+    return bytecode
+
+
+# Updated compiler to handle labels and control flow
+def full_clv_compile(lines, typed=True):
+    labels, declared = {}, {}
+    bytecode = []
+    pc = 0
+    parsed = [fields(line) for line in lines]
+
+    # First pass to register labels and TYPE declarations
+    for parts in parsed:
+        if len(parts) < 2:
+            continue
+        if parts[1].upper() == 'LABEL':
+            labels[parts[2]] = pc
+            continue
+        elif parts[1].upper() == 'TYPE':
+            declared[parts[2]] = parts[3].lower()
+            continue
+        pc += 1
+
+    # Second pass to generate bytecode
+    for parts in parsed:
+        if len(parts) < 2:
+            continue
+        mod = parts[0]
+        cmd = parts[1].upper()
+        args = parts[2:]
+
+        if cmd in ('LABEL', 'TYPE'):
+            continue  # Already handled
+
+        if cmd in ['JUMP', 'JZ', 'JNZ'] and args:
+            args = [labels.get(args[0], 0)]
+
+        opcode = extended_instruction_set.get(cmd, None)
+        if opcode is not None:
+            bytecode.append((opcode, args))
+    if typed:
+        bytecode = specialize(bytecode, extended_instruction_set, declared)[0]
+    return bytecode
@@ -0,0 +1,117 @@
+# Compilers from ModuSynthX source lines to GM and MSX VM bytecode
+#
+# Both compile parser.parse()'s statements through one table keyed by keyword,
+# so a statement costs a dict lookup and the whole compile is linear in the
+# source. Operands are the statement's own:
+#
+#   write.quick.on @console 'Hi'                  MODSET quick, WRITEOUT @console 'Hi'
+#   ping.recalibrate.smart                        PING smart
+#   sift.purge.on $TempTokens (after: 5 interactions)
+#                                                 SIFT $TempTokens 5_interactions (GM: 5)
+#   flow.compress.idle                            FLOWCMP idle
+#   trigger.release.on interaction-heavy > $Mem   RELEASE interaction-heavy $Mem
+#   auto.infer.methods.for $Core (if: calls)      INFER $Core calls
+#   pause.briefly                                 MODSET briefly, PAUSE
+#
+# link, allocate and the other trigger/flow forms map to LINK, ALLOCREG,
+# TRIGGER and RELEASE; keywords with no instruction (create, infuse, override,
+# commit) compile to nothing. Source the parser rejects raises ParseError.
+from ..opcodes import gm_bytecode_instructions, vm_bytecode
+from .parser import parse
+
+
+def _modset(st, ops):
+    return [(ops["MODSET"], modifier) for modifier in st.modifiers]
+
+
+def _redirected(st):
+    return st.operands + [st.redirect] if st.redirect is not None else st.operands
+
+
+def _write(st, ops, after):
+    return _modset(st, ops) + [(ops["WRITEOUT"], *_redirected(st))]
+
+
+def _pause(st, ops, after):
+    return _modset(st, ops) + [(ops["PAUSE"], *st.operands)]
+
+
+def _ping(st, ops, after):
+    return [(ops["PING"], st.chain[-1] if st.chain else "auto", *st.operands)]
+
+
+def _sift(st, ops, after):
+    if "after" in st.options:
+        return [(ops["SIFT"], *st.operands, after(st.options["after"]))]
+    return [(ops["SIFT"], *st.operands)]
+
+
+def _flow(st, ops, after):
+    if "compress" in st.chain:
+        return [(ops["FLOWCMP"], st.chain[-1])]
+    if "release" in st.chain:
+        return [(ops["RELEASE"], st.chain[-1], *_redirected(st))]
+    return []
+
+
+def _trigger(st, ops, after):
+    if "release" in st.chain:
+        return [(ops["RELEASE"], *_redirected(st))]
+    return [(ops["TRIGGER"], *_redirected(st))]
+
+
+def _auto(st, ops, after):
+    if "infer" in st.chain:
+        condition = [st.options["if"]] if "if" in st.options else []
+        return [(ops["INFER"], *st.operands, *condition)]
+    return []
+
+
+def _link(st, ops, after):
+    return [(ops["LINK"], *_redirected(st))]
+
+
+def _allocate(st, ops, after):
+    return [(ops["ALLOCREG"], *_redirected(st))]
+
+
+HANDLERS = {
+    "write": _write,
+    "pause": _pause,
+    "ping": _ping,
+    "sift": _sift,
+    "flow": _flow,
+    "trigger": _trigger,
+    "auto": _auto,
+    "link": _link,
+    "allocate": _allocate,
+}
+
+
+def _compile(code_lines, ops, after):
+    compiled = []
+    for st in parse(code_lines):
+        handler = HANDLERS.get(st.keyword)
+        if handler is not None:
+            compiled.extend(handler(st, ops, after))
+    compiled.append((ops["END"],))
+    return compiled
+
+
+# Function to parse and compile ModuSynthX code to GM bytecode
+def compile_to_gm_bytecode(code_lines):
+    return _compile(code_lines, gm_bytecode_instructions, lambda words: words.partition(" ")[0])
+
+
+# Rewritten compiler function for ModuSynthX VM
+def compile_to_vm_bytecode(code_lines):
+    return _compile(code_lines, vm_bytecode, lambda words: words.replace(" ", "_"))
+
+
+# ModuSynthXVM consumes {"opcode", "args"} dicts rather than tuples
+def to_instructions(compiled_vm):
+    return [{"opcode": op[0], "args": list(op[1:])} for op in compiled_vm]
+
+
+def compile_msx_instructions(code_lines):
+    return to_instructions(compile_to_vm_bytecode(code_lines))
@@ -0,0 +1,67 @@
+# Row-incremental compilation for the grid editor
+#
+# The editor's script is one line per grid row. IncrementalCompiler keeps each
+# row's compiled instructions and the concatenated bytecode; update() recompiles
+# a single row and splices its instructions into the cached bytecode in place.
+# Row start pcs are prefix sums that are only recomputed, lazily, from the first
+# row whose instruction count changed. LABEL rows are kept in a label table as
+# row numbers, so a label's pc follows edits above it without any patching.
+from .clv import clv_compile
+from .lexer import fields
+
+
+class IncrementalCompiler:
+    def __init__(self, compile_lines=clv_compile):
+        self.compile_lines = compile_lines
+        self.rows = []        # source line per row ('' for an empty row)
+        self.code = []        # compiled instructions per row
+        self.offsets = [0]    # pc of each row's first instruction, valid up to self.valid
+        self.valid = 0
+        self.bytecode = []
+        self.labels = {}      # label name -> row
+        self.compiled = 0     # rows compiled so far
+
+    def resize(self, count):
+        while len(self.rows) < count:
+            self.rows.append('')
+            self.code.append([])
+            self.offsets.append(0)
+
+    def offset(self, row):
+        while self.valid < row:
+            self.offsets[self.valid + 1] = self.offsets[self.valid] + len(self.code[self.valid])
+            self.valid += 1
+        return self.offsets[row]
+
+    def label_pc(self, name):
+        row = self.labels.get(name)
+        return None if row is None else self.offset(row)
+
+    # Recompile one row; returns False if its text did not change
+    def update(self, row, line):
+        self.resize(row + 1)
+        old = self.rows[row]
+        if line == old:
+            return False
+        code = self.compile_lines([line]) if line else []
+        start = self.offset(row)
+        self.bytecode[start:start + len(self.code[row])] = code
+        if len(code) != len(self.code[row]):
+            self.valid = min(self.valid, row)
+        self._relabel(row, old, line)
+        self.rows[row] = line
+        self.code[row] = code
+        self.compiled += 1
+        return True
+
+    def _relabel(self, row, old, new):
+        for line, add in ((old, False), (new, True)):
+            parts = fields(line)
+            if len(parts) >= 3 and parts[1].upper() == 'LABEL':
+                if add:
+                    self.labels[parts[2]] = row
+                elif self.labels.get(parts[2]) == row:
+                    del self.labels[parts[2]]
+
+    def lines(self):
+        return [line for line in self.rows if line]
@@ -0,0 +1,76 @@
+# Function inlining for advanced_clv_compile
+#
+# Works on parsed statements (mod, CMD, args) before addresses are assigned, so
+# labels and function entry points are laid out after the call sites grow.
+# A function is inlined at its CALL sites when its body (FUNC ... first RET) is
+# straight-line code: no jumps, labels, calls, threads, END or frame locals
+# (a FUNC with parameters is never inlined). Bodies that
+# only become straight-line after their own callees are inlined are handled by
+# iterating bottom-up, so recursion (direct or mutual) is never inlined.
+# THREAD/QUEUE still target the original FUNC, which is always kept.
+
+INLINE_LIMIT = 8          # inline any eligible body up to this many instructions
+SINGLE_SITE_LIMIT = 32    # ...or up to this many when it has exactly one CALL site
+MAX_GROWTH = 2.0          # never grow the program past this factor
+
+_BLOCKERS = {'CALL', 'THREAD', 'QUEUE', 'JUMP', 'JZ', 'JNZ', 'LABEL', 'FUNC', 'END', 'DISPATCH',
+             'LOCAL', 'LOADL', 'STOREL', 'WRITEL'}
+
+
+def function_bodies(statements):
+    bodies = {}
+    for i, (mod, cmd, args) in enumerate(statements):
+        if cmd != 'FUNC' or len(args) != 1:
+            continue
+        body = []
+        for stmt in statements[i + 1:]:
+            if stmt[1] == 'RET':
+                bodies[args[0]] = body
+                break
+            body.append(stmt)
+    return bodies
+
+
+def inlineable(body):
+    return all(cmd not in _BLOCKERS for _, cmd, _ in body)
+
+
+def inline_functions(statements, limit=INLINE_LIMIT, is_instruction=None):
+    def size(stmts):
+        if is_instruction is None:
+            return len(stmts)
+        return sum(1 for _, cmd, _ in stmts if is_instruction(cmd))
+
+    budget = int(max(size(statements), 1) * MAX_GROWTH)
+    while True:
+        bodies = function_bodies(statements)
+        sites = {}
+        for _, cmd, args in statements:
+            if cmd == 'CALL' and args:
+                sites[args[0]] = sites.get(args[0], 0) + 1
+        chosen = {}
+        for name, body in bodies.items():
+            if name not in sites or not inlineable(body):
+                continue
+            n = size(body)
+            if n <= limit or (sites[name] == 1 and n <= SINGLE_SITE_LIMIT):
+                chosen[name] = body
+        if not chosen:
+            return statements
+        growth = sum((size(chosen[name]) - 1) * sites[name] for name in chosen)
+        if size(statements) + growth > budget:
+            # Drop the most expensive candidates until the program fits
+            for name in sorted(chosen, key=lambda f: size(chosen[f]) * sites[f], reverse=True):
+                if size(statements) + growth <= budget:
+                    break
+                growth -= (size(chosen[name]) - 1) * sites[name]
+                del chosen[name]
+            if not chosen:
+                return statements
+        expanded = []
+        for stmt in statements:
+            if stmt[1] == 'CALL' and stmt[2] and stmt[2][0] in chosen:
+                expanded.extend((mod, cmd, list(args)) for mod, cmd, args in chosen[stmt[2][0]])
+            else:
+                expanded.append(stmt)
+        statements = expanded
@@ -0,0 +1,578 @@
+# Control-flow graph and SSA form for advanced bytecode
+#
+# build_ir() splits resolved bytecode into basic blocks and puts it in SSA form:
+# every page-variable write gets a new version (x.1, x.2, ...) with phi nodes at
+# dominance frontiers, and every stack value gets a name (%3). Values still on
+# the stack when a block is entered are that block's parameters (%b4.0, ...).
+# The IR is an analysis view of the instruction list; optimize() uses it to
+# delete instructions and rewrite READs, then re-emits the bytecode with jump
+# targets remapped:
+#
+#   - unreachable blocks are pruned (roots: pc 0, every CALL/THREAD/QUEUE target
+#     and any `entries` the caller passes, such as a module's exported symbols)
+#   - jumps to the next remaining instruction are dropped
+#   - copy propagation: a READ x after "WRITE x y" reads y while y is unchanged
+#   - dead-code elimination: writes overwritten before any read are removed,
+#     together with the pure expression feeding a dead STORE
+#
+# Every variable is live at RET, END, CALL and the end of the program, so final
+# page contents never change. Variables are left out of SSA when the program can
+# touch them behind the compiler's back (THREAD, QUEUE, DISPATCH, SWITCH, SIFT);
+# only the control-flow cleanups run then.
+import json
+
+from .typed import decode_literal
+
+VROOT = -1   # virtual entry block whose successors are the roots
+
+BRANCHES = ('JUMP', 'JZ', 'JNZ')
+UNSAFE = ('THREAD', 'QUEUE', 'DISPATCH', 'SWITCH', 'SIFT')
+ARITH = tuple(op + suffix for op in ('ADD', 'SUB', 'MUL', 'DIV', 'MOD') for suffix in ('', '_I', '_F'))
+# DIV and MOD can raise ZeroDivisionError, so they are never removed
+PURE = ('READ', 'LOADL') + tuple(op for op in ARITH if op[:3] in ('ADD', 'SUB', 'MUL'))
+POP_ONE = ('STORE', 'STOREL', 'PRINT', 'JZ', 'JNZ')
+STACK_RESET = ('OPTIMIZE', 'FLOWCMP', 'RELEASE')
+
+
+class Instr:
+    def __init__(self, pc, op, args):
+        self.pc = pc
+        self.op = op
+        self.args = args
+        self.dest = None    # value defined: a stack temp (%n) or a variable version (x.n)
+        self.uses = []      # values read; None for one the IR cannot see
+
+    def to_dict(self):
+        return {"pc": self.pc, "op": self.op, "args": list(self.args), "dest": self.dest,
+                "uses": ["?" if use is None else use for use in self.uses]}
+
+
+class Phi:
+    def __init__(self, block, var):
+        self.block = block
+        self.var = var
+        self.dest = None
+        self.args = {}      # predecessor block id -> version
+
+    def to_dict(self):
+        return {"var": self.var, "dest": self.dest, "args": {str(k): v for k, v in self.args.items()}}
+
+
+class Block:
+    def __init__(self, id, start, end):
+        self.id = id
+        self.start = start
+        self.end = end
+        self.succs = []
+        self.preds = []
+        self.exits = False        # leaves the program (RET, END, falling off the end)
+        self.reachable = False
+        self.depth = None         # stack depth on entry, None if unknown
+        self.params = []
+        self.phis = {}
+        self.code = []
+        self.out = []             # stack values live on exit
+        self.entry = {}           # var -> version on entry (only for blocks with a back edge in)
+
+    def to_dict(self):
+        return {
+            "id": self.id, "start": self.start, "end": self.end,
+            "preds": self.preds, "succs": self.succs, "exits": self.exits,
+            "reachable": self.reachable, "params": self.params,
+            "phis": [phi.to_dict() for phi in self.phis.values()],
+            "code": [instr.to_dict() for instr in self.code],
+            "out": ["?" if value is None else value for value in self.out],
+        }
+
+
+class IR:
+    def __init__(self, bytecode, ops, entries=()):
+        self.bytecode = bytecode
+        self.ops = ops
+        self.names = {code: name for name, code in ops.items()}
+        self.blocks = []
+        self.block_at = []
+        self.roots = []
+        self.idom = {}
+        self.ssa_vars = not any(self.names.get(op) in UNSAFE for op, _ in bytecode)
+        self.uses = {}          # value -> use count
+        self.defs = {}          # value -> defining Instr or Phi (None for entry / CALL clobbers)
+        self.copies = {}        # version -> (var, version) it is a copy of
+        self.rewrites = {}      # pc -> args for a copy-propagated READ
+        self.deleted = set()    # pcs removed by dead-code elimination
+        self._split(entries)
+        self._link()
+        self._stack_depths()
+        if self.ssa_vars:
+            self._dominators()
+            self._place_phis()
+        self._rename()
+
+    def name(self, pc):
+        return self.names.get(self.bytecode[pc][0])
+
+    def target(self, pc):
+        name, args = self.name(pc), self.bytecode[pc][1]
+        if name in BRANCHES or name in ('CALL', 'THREAD'):
+            return args[0] if args else None
+        if name == 'QUEUE':
+            return args[1] if len(args) > 1 else None
+        return None
+
+    # --- Construction ---
+
+    def _split(self, entries):
+        n = len(self.bytecode)
+        leaders = {0} if n else set()
+        self.roots = [0] if n else []
+        for pc in entries:
+            if 0 <= pc < n and pc not in self.roots:
+                leaders.add(pc)
+                self.roots.append(pc)
+        for pc in range(n):
+            name, target = self.name(pc), self.target(pc)
+            if target is not None and 0 <= target < n:
+                leaders.add(target)
+                if name not in BRANCHES and target not in self.roots:
+                    self.roots.append(target)
+            if name in BRANCHES or name in ('RET', 'END'):
+                leaders.add(pc + 1)
+        starts = sorted(pc for pc in leaders if pc < n)
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else n
+            block = Block(i, start, end)
+            self.blocks.append(block)
+            self.block_at.extend([block] * (end - start))
+
+    def _link(self):
+        n = len(self.bytecode)
+        for block in self.blocks:
+            pc = block.end - 1
+            name = self.name(pc)
+            if name in ('RET', 'END'):
+                targets = []
+                block.exits = True
+            elif name == 'JUMP':
+                targets = [self.target(pc)]
+            elif name in ('JZ', 'JNZ'):
+                targets = [self.target(pc), pc + 1]
+            else:
+                targets = [pc + 1]
+            for target in targets:
+                if target is None or not 0 <= target < n:
+                    block.exits = True
+                    continue
+                succ = self.block_at[target]
+                if succ.id not in block.succs:
+                    block.succs.append(succ.id)
+                    succ.preds.append(block.id)
+        work = [self.block_at[pc].id for pc in self.roots]
+        while work:
+            block = self.blocks[work.pop()]
+            if not block.reachable:
+                block.reachable = True
+                work.extend(block.succs)
+
+    def _stack_depths(self):
+        entry = {}
+        called = {self.target(pc) for pc in range(len(self.bytecode)) if self.name(pc) == 'CALL'}
+        for pc in self.roots:
+            # CALL targets start with whatever the caller left on the stack
+            depth = None if pc in called else 0
+            block = self.block_at[pc]
+            entry[block.id] = depth if block.id not in entry or entry[block.id] == depth else None
+        work = list(entry)
+        while work:
+            block = self.blocks[work.pop()]
+            block.depth = depth = entry[block.id]
+            for pc in range(block.start, block.end):
+                depth = self._depth_after(pc, depth)
+            for succ in block.succs:
+                if succ not in entry:
+                    entry[succ] = depth
+                    work.append(succ)
+                elif entry[succ] is not None and entry[succ] != depth:
+                    entry[succ] = None
+                    work.append(succ)
+
+    def _depth_after(self, pc, depth):
+        name, args = self.name(pc), self.bytecode[pc][1]
+        if name == 'RELEASE':
+            return 0
+        if depth is None or name in STACK_RESET or name == 'CALL':
+            return None
+        if name in ('READ', 'LOADL'):
+            return depth + 1
+        if name in POP_ONE or name in ARITH:
+            return max(depth - 1, 0)
+        return depth
+
+    def _variables(self):
+        found = set()
+        for pc in range(len(self.bytecode)):
+            name, args = self.name(pc), self.bytecode[pc][1]
+            if name in ('READ', 'STORE', 'WRITEK') and args:
+                found.add(args[0])
+            elif name in ('WRITE', 'WRITEV') and args:
+                found.add(args[0])
+                if len(args) > 1 and (name == 'WRITEV' or decode_literal(str(args[1])) is None):
+                    found.add(args[1])
+        return sorted(found)
+
+    def _dominators(self):
+        def succs(b):
+            if b == VROOT:
+                return list(dict.fromkeys(self.block_at[pc].id for pc in self.roots))
+            return self.blocks[b].succs
+
+        self.preds = {b.id: list(b.preds) for b in self.blocks}
+        for b in succs(VROOT):
+            self.preds[b].append(VROOT)
+        # Reverse postorder from the virtual root
+        post, seen, stack = [], {VROOT}, [(VROOT, iter(succs(VROOT)))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append((child, iter(succs(child))))
+                    break
+            else:
+                post.append(node)
+                stack.pop()
+        order = post[::-1]
+        index = {b: i for i, b in enumerate(order)}
+
+        def intersect(a, b):
+            while a != b:
+                while index[a] > index[b]:
+                    a = self.idom[a]
+                while index[b] > index[a]:
+                    b = self.idom[b]
+            return a
+
+        self.idom = {VROOT: VROOT}
+        changed = True
+        while changed:
+            changed = False
+            for b in order[1:]:
+                preds = [p for p in self.preds[b] if p in self.idom]
+                new = preds[0]
+                for p in preds[1:]:
+                    new = intersect(p, new)
+                if self.idom.get(b) != new:
+                    self.idom[b] = new
+                    changed = True
+        self.frontier = {b: set() for b in order}
+        for b in order[1:]:
+            if len(self.preds[b]) >= 2:
+                for p in self.preds[b]:
+                    runner = p
+                    while runner in self.idom and runner != self.idom[b]:
+                        self.frontier[runner].add(b)
+                        runner = self.idom[runner]
+        self.children = {b: [] for b in order}
+        for b in order[1:]:
+            self.children[self.idom[b]].append(b)
+
+    def _place_phis(self):
+        self.variables = self._variables()
+        clobbers = {self.block_at[pc].id for pc in range(len(self.bytecode)) if self.name(pc) == 'CALL'}
+        sites = {var: set(clobbers) for var in self.variables}
+        for pc in range(len(self.bytecode)):
+            name, args = self.name(pc), self.bytecode[pc][1]
+            if name in ('WRITE', 'WRITEK', 'WRITEV', 'STORE') and args:
+                sites[args[0]].add(self.block_at[pc].id)
+        for var in self.variables:
+            work, placed = [b for b in sites[var] if b in self.idom], set()
+            while work:
+                for y in self.frontier[work.pop()]:
+                    if y not in placed:
+                        placed.add(y)
+                        self.blocks[y].phis[var] = Phi(self.blocks[y], var)
+                        if y not in sites[var]:
+                            work.append(y)
+
+    # --- Renaming ---
+
+    def _rename(self):
+        self.temps = 0
+        self.versions = {}
+        current = {}
+        if self.ssa_vars:
+            for var in self.variables:
+                current[var] = [self._version(var, None)]
+            self._fill_phis(VROOT, current)
+            order = [(child, False) for child in reversed(self.children[VROOT])]
+        else:
+            order = [(block.id, False) for block in reversed(self.blocks) if block.reachable]
+        pushed = {}
+        while order:
+            b, done = order.pop()
+            if done:
+                for var in pushed.pop(b):
+                    current[var].pop()
+                continue
+            pushed[b] = self._rename_block(self.blocks[b], current)
+            if self.ssa_vars:
+                order.append((b, True))
+                order.extend((child, False) for child in reversed(self.children[b]))
+
+    def _version(self, var, definition):
+        n = self.versions.get(var, 0)
+        self.versions[var] = n + 1
+        version = f"{var}.{n}"
+        self.uses[version] = 0
+        self.defs[version] = definition
+        return version
+
+    def _temp(self, definition):
+        value = f"%{self.temps}"
+        self.temps += 1
+        self.uses[value] = 0
+        self.defs[value] = definition
+        return value
+
+    def _use(self, value):
+        if value is not None:
+            self.uses[value] = self.uses.get(value, 0) + 1
+        return value
+
+    # Follow a copy chain while every link is still the current version
+    def _copy_root(self, var, version, current):
+        while version in self.copies:
+            source, source_version = self.copies[version]
+            if current[source][-1] != source_version:
+                break
+            var, version = source, source_version
+        return var, version
+
+    def _rename_block(self, block, current):
+        pushed = []
+
+        def define(var, definition):
+            version = self._version(var, definition)
+            current[var].append(version)
+            pushed.append(var)
+            return version
+
+        def use_all():
+            for var in self.variables:
+                self._use(current[var][-1])
+
+        if self.ssa_vars:
+            for var, phi in block.phis.items():
+                phi.dest = define(var, phi)
+            if any(p >= block.id for p in block.preds):
+                block.entry = {var: current[var][-1] for var in self.variables}
+        if block.depth is not None:
+            block.params = [f"%b{block.id}.{k}" for k in range(block.depth)]
+            for value in block.params:
+                self.uses[value] = 0
+                self.defs[value] = None
+        stack = list(block.params)
+
+        def pop():
+            return stack.pop() if stack else None
+
+        for pc in range(block.start, block.end):
+            name, args = self.name(pc), self.bytecode[pc][1]
+            instr = Instr(pc, name, args)
+            block.code.append(instr)
+            if name == 'READ':
+                if self.ssa_vars and args:
+                    var, version = self._copy_root(args[0], current[args[0]][-1], current)
+                    if var != args[0]:
+                        self.rewrites[pc] = [var] + list(args[1:])
+                    instr.uses = [self._use(version)]
+                instr.dest = self._temp(instr)
+                stack.append(instr.dest)
+            elif name == 'LOADL':
+                instr.dest = self._temp(instr)
+                stack.append(instr.dest)
+            elif name in ARITH:
+                b, a = pop(), pop()
+                instr.uses = [self._use(a), self._use(b)]
+                instr.dest = self._temp(instr)
+                stack.append(instr.dest)
+            elif name in POP_ONE:
+                instr.uses = [self._use(pop())]
+                if name == 'STORE' and self.ssa_vars and args:
+                    instr.dest = define(args[0], instr)
+            elif name in ('WRITE', 'WRITEK', 'WRITEV') and self.ssa_vars and args:
+                source = args[1] if len(args) > 1 else None
+                if name == 'WRITEV' or (name == 'WRITE' and source is not None
+                                        and decode_literal(str(source)) is None):
+                    instr.uses = [self._use(current[source][-1])]
+                    root = self._copy_root(source, current[source][-1], current)
+                    instr.dest = define(args[0], instr)
+                    self.copies[instr.dest] = root
+                else:
+                    instr.dest = define(args[0], instr)
+            elif name == 'CALL':
+                for _ in range(args[1] if len(args) > 1 else 0):
+                    instr.uses.append(self._use(pop()))
+                for value in stack:
+                    self._use(value)
+                stack = []
+                if self.ssa_vars:
+                    use_all()
+                    for var in self.variables:
+                        define(var, None)
+            elif name in STACK_RESET:
+                instr.uses = [self._use(value) for value in stack]
+                stack = []
+            elif name in ('RET', 'END') and self.ssa_vars:
+                use_all()
+        if block.exits and self.ssa_vars and self.name(block.end - 1) not in ('RET', 'END'):
+            use_all()
+        block.out = stack
+        for value in stack:
+            self._use(value)  # passed to successors, or left behind at exit
+        if self.ssa_vars:
+            self._fill_phis(block.id, current)
+        return pushed
+
+    def _fill_phis(self, b, current):
+        succs = [self.block_at[pc].id for pc in self.roots] if b == VROOT else self.blocks[b].succs
+        for s in dict.fromkeys(succs):
+            for var, phi in self.blocks[s].phis.items():
+                phi.args[b] = self._use(current[var][-1])
+
+    # --- Loops ---
+
+    def dominates(self, a, b):
+        while b != a and b != VROOT:
+            if b not in self.idom:
+                return False
+            b = self.idom[b]
+        return b == a
+
+    # Natural loops as {header block id: set of block ids}; needs ssa_vars
+    def loops(self):
+        found = {}
+        for block in self.blocks:
+            for succ in block.succs:
+                if block.reachable and self.dominates(succ, block.id):
+                    body = found.setdefault(succ, {succ})
+                    work = [block.id]
+                    while work:
+                        b = work.pop()
+                        if b not in body:
+                            body.add(b)
+                            work.extend(p for p in self.blocks[b].preds if self.blocks[p].reachable)
+        return found
+
+    # --- Optimization ---
+
+    def _release(self, value, work):
+        if value is not None and value in self.uses:
+            self.uses[value] -= 1
+            if self.uses[value] == 0:
+                work.append(value)
+
+    # The expression tree under `value` is pure and feeds nothing else
+    def _removable(self, value):
+        definition = self.defs.get(value)
+        if not isinstance(definition, Instr) or definition.op not in PURE or self.uses[value] != 1:
+            return False
+        return all(use is not None and self._removable(use)
+                   for use in definition.uses if use is None or use[0] == '%')
+
+    def _delete_tree(self, value, work):
+        definition = self.defs[value]
+        self.deleted.add(definition.pc)
+        for use in definition.uses:
+            if use[0] == '%':
+                self._delete_tree(use, work)
+            else:
+                self._release(use, work)
+
+    def eliminate_dead_code(self):
+        if not self.ssa_vars:
+            return
+        work = [value for value, count in self.uses.items() if count == 0 and value[0] != '%']
+        while work:
+            version = work.pop()
+            definition = self.defs.get(version)
+            if isinstance(definition, Phi):
+                del definition.block.phis[definition.var]
+                for arg in definition.args.values():
+                    self._release(arg, work)
+            elif isinstance(definition, Instr) and definition.pc not in self.deleted:
+                if definition.op == 'STORE':
+                    operand = definition.uses[0]
+                    if operand is None or not self._removable(operand):
+                        continue
+                    self.deleted.add(definition.pc)
+                    self._delete_tree(operand, work)
+                else:
+                    self.deleted.add(definition.pc)
+                    for use in definition.uses:
+                        self._release(use, work)
+
+    def emit(self):
+        n = len(self.bytecode)
+        keep = [self.block_at[pc].reachable and pc not in self.deleted for pc in range(n)]
+        while True:
+            # next_kept[pc]: first kept pc at or after pc
+            next_kept = [n] * (n + 1)
+            for pc in range(n - 1, -1, -1):
+                next_kept[pc] = pc if keep[pc] else next_kept[pc + 1]
+            dropped = False
+            for pc in range(n):
+                if keep[pc] and self.name(pc) == 'JUMP':
+                    target = self.target(pc)
+                    if 0 <= target <= n and next_kept[pc + 1] == next_kept[target]:
+                        keep[pc] = False
+                        dropped = True
+            if not dropped:
+                break
+        new_pc, count = [0] * (n + 1), 0
+        for pc in range(n + 1):
+            new_pc[pc] = count
+            if pc < n and keep[pc]:
+                count += 1
+
+        def remap(target):
+            return new_pc[next_kept[target]] if 0 <= target <= n else target
+
+        out = []
+        for pc in range(n):
+            if not keep[pc]:
+                continue
+            opcode, args = self.bytecode[pc]
+            args = list(self.rewrites.get(pc, args))
+            name = self.name(pc)
+            if (name in BRANCHES or name in ('CALL', 'THREAD')) and args:
+                args[0] = remap(args[0])
+            elif name == 'QUEUE' and len(args) > 1:
+                args[1] = remap(args[1])
+            out.append((opcode, args))
+        return out
+
+    # --- Debugging ---
+
+    def to_dict(self):
+        return {
+            "ssa_vars": self.ssa_vars,
+            "roots": self.roots,
+            "idom": {str(k): v for k, v in self.idom.items() if k != VROOT},
+            "blocks": [block.to_dict() for block in self.blocks],
+            "copies": {k: list(v) for k, v in self.copies.items()},
+            "rewrites": {str(k): v for k, v in self.rewrites.items()},
+            "deleted": sorted(self.deleted),
+        }
+
+    def dump(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+def build_ir(bytecode, ops, entries=()):
+    return IR(bytecode, ops, entries)
+
+
+def optimize(bytecode, ops, entries=()):
+    ir = build_ir(bytecode, ops, entries)
+    ir.eliminate_dead_code()
+    return ir.emit()
@@ -0,0 +1,140 @@
+# Tokenizer for ModuSynthX source
+#
+# tokenize() scans a whole source buffer once and yields (kind, text, line,
+# col) tuples with 1-based positions. A dotted modifier chain is one NAME token,
+# split by the parser, so a typical statement is a handful of tokens:
+#
+#   write.quick.on @console "Hello, ModuSynthX World!"
+#   NAME           SYSTEM   STRING                     NEWLINE
+#
+#   sift.purge.on $TempTokens (after: 5 interactions)
+#   NAME          USER        LPAREN NAME COLON NUMBER NAME RPAREN
+#
+# '#' starts a comment that runs to the end of the line. A character that fits
+# no token is a LexError; whitespace, including at the very end, is skipped.
+#
+# The scan is a findall() per 64 KiB run of whole lines (no token spans a
+# line) with a pattern that captures the whitespace before each token, so
+# positions are running sums rather than a match object per token, and the
+# kind comes from the token's first character.
+#
+# fields() is the line-level split for the "<modifier> <command> <args>"
+# compilers: whitespace-separated fields, except that a field starting with a
+# quote runs to the closing quote, spaces included. Lines without quotes take
+# str.split().
+import re
+import string
+
+NAME = "NAME"          # write, interaction-heavy, write.quick.on
+NUMBER = "NUMBER"
+STRING = "STRING"
+SYSTEM = "SYSTEM"      # @object
+VIRTUAL = "VIRTUAL"    # %name
+USER = "USER"          # $name
+CELL = "CELL"          # cell[x,y]
+DOT = "DOT"
+BIND = "BIND"          # ::
+REDIRECT = "REDIRECT"  # >
+LPAREN = "LPAREN"
+RPAREN = "RPAREN"
+COLON = "COLON"
+COMMA = "COMMA"
+NEWLINE = "NEWLINE"
+_ERROR = "ERROR"
+_SIGILS = (SYSTEM, VIRTUAL, USER)
+
+CHUNK = 1 << 16
+
+_NUMBER = r"[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?"
+_TOKEN = re.compile(r"""([ \t\r\f\v]*)(
+    cell\[[^\]\n]*\]
+  | [A-Za-z_][\w-]*(?:\.[\w-]+)*
+  | \n
+  | [@%$][\w-]+(?:\.[\w-]+)*
+  | '[^'\n]*' | "[^"\n]*"
+  | """ + _NUMBER + r"""(?![\w-])
+  | \d[\w-]*
+  | :: | [:>(),.]
+  | \#[^\n]*
+  | \Z
+  | .)""", re.VERBOSE)
+_NUMBER_RE = re.compile(_NUMBER + r"\Z")
+
+_KINDS = {"'": STRING, '"': STRING, "@": SYSTEM, "%": VIRTUAL, "$": USER, ".": DOT, ">": REDIRECT,
+          "(": LPAREN, ")": RPAREN, ",": COMMA, ":": COLON, "\n": NEWLINE, "#": None}
+_KINDS.update(dict.fromkeys(string.ascii_letters + "_", NAME))
+_KINDS.update(dict.fromkeys(string.digits + "+-", NUMBER))
+
+_FIELD = re.compile(r"""'[^']*'|"[^"]*"|\S+""")
+
+
+class LexError(ValueError):
+    def __init__(self, message, line, col):
+        super().__init__(f"line {line}, column {col}: {message}")
+        self.line = line
+        self.col = col
+
+
+# Settle the tokens whose first character does not decide their kind
+def _classify(kind, text, line, col):
+    if kind == NUMBER:
+        if _NUMBER_RE.match(text):
+            return NUMBER
+        if text[0].isdigit():
+            return NAME  # 5_interactions
+    elif kind == STRING:
+        if len(text) > 1:
+            return STRING
+        raise LexError("unterminated string", line, col)
+    elif kind == DOT:
+        return NUMBER  # .5
+    elif kind == COLON:
+        return BIND
+    elif text[0].isalpha():
+        return NAME  # non-ASCII identifier
+    raise LexError(f"unexpected character {text[0]!r}", line, col)
+
+
+def _chunks(source):
+    start, end = 0, len(source)
+    while start < end:
+        stop = source.find("\n", start + CHUNK)
+        stop = end if stop < 0 else stop + 1
+        yield source[start:stop]
+        start = stop
+
+
+def tokenize(source):
+    kinds = _KINDS
+    pos, line, line_start = 0, 1, 0
+    for space, text in (token for chunk in _chunks(source) for token in _TOKEN.findall(chunk)):
+        pos += len(space)
+        if not text:
+            continue  # whitespace at the end of the source
+        kind = kinds.get(text[0], _ERROR)
+        if kind is NEWLINE:
+            yield NEWLINE, text, line, pos - line_start + 1
+            pos += 1
+            line += 1
+            line_start = pos
+            continue
+        if kind is NAME:
+            if text[-1] == "]":
+                kind = CELL
+        elif kind is None:
+            pos += len(text)  # comment
+            continue
+        elif kind in _SIGILS:
+            if len(text) == 1:
+                raise LexError(f"{text} without a name", line, pos - line_start + 1)
+        elif len(text) > 1 or kind is NUMBER or kind is STRING or kind is _ERROR:
+            kind = _classify(kind, text, line, pos - line_start + 1)
+        yield kind, text, line, pos - line_start + 1
+        pos += len(text)
+
+
+# Split one line into fields, keeping quoted strings whole
+def fields(line):
+    if "'" in line or '"' in line:
+        return _FIELD.findall(line)
+    return line.split()
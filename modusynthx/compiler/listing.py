@@ -0,0 +1,104 @@
+# MSX_xx listings: the text form of the msx tier's bytecode (see ReturnScript.synth)
+#
+#   MSX_01  optimize                                 # MODSET: Apply 'optimize' modifier
+#   MSX_02  @console  'Hello, ModuSynthX World!'     # WRITEOUT
+#   MSX_FF                                           # END
+#
+# One instruction per line: an opcode from vm_bytecode, then its arguments
+# separated by whitespace. A quoted argument keeps its quotes, as the compiler's
+# string arguments do, and may contain spaces and '#'. Everything after an
+# unquoted '#' is a comment.
+#
+# Both directions stream: assemble() reads any iterable of lines, such as an
+# open file, one line at a time, and write_listing() writes each line as it is
+# formatted, so neither holds more than the instructions.
+# Repeated lines are parsed and formatted once.
+import gc
+import re
+
+from ..opcodes import vm_bytecode
+
+NAMES = {code: name for name, code in vm_bytecode.items()}
+COMMENT_COLUMN = 49
+LINE_CACHE = 4096     # distinct lines remembered; hand-tuned listings repeat a lot
+
+_FIELD = re.compile(r"""'[^']*'|"[^"]*"|#.*|[^\s'"#]+|['"]""")
+_ARG = re.compile(r"""'[^']*'|"[^"]*"|[^\s'"#]+""")
+
+
+class ListingError(ValueError):
+    pass
+
+
+def _quoted_fields(line, number):
+    fields = []
+    for field in _FIELD.findall(line):
+        if field[0] == "#":
+            break
+        if field in ("'", '"'):
+            raise ListingError(f"line {number}: unterminated string")
+        fields.append(field)
+    return fields
+
+
+def _fields(line, number):
+    if "'" in line or '"' in line:
+        fields = _quoted_fields(line, number)
+    else:
+        fields = line.partition("#")[0].split()
+    if fields and fields[0] not in NAMES:
+        raise ListingError(f"line {number}: unknown opcode {fields[0]!r}")
+    return fields
+
+
+# Listing -> instructions for ModuSynthXVM, as compile_msx_instructions returns.
+# The result holds no reference cycles, so the collector is paused while it is
+# built rather than rescanning it every few hundred instructions (about half
+# the time on a large listing). The pause is process-wide; the state found on
+# entry is put back however assemble() exits.
+def assemble(lines):
+    program = []
+    append = program.append
+    seen = {}
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for number, line in enumerate(lines, 1):
+            fields = seen.get(line)
+            if fields is None:
+                fields = _fields(line, number)
+                if len(seen) < LINE_CACHE:
+                    seen[line] = fields
+            if fields:
+                append({"opcode": fields[0], "args": fields[1:]})
+    finally:
+        if enabled:
+            gc.enable()
+    return program
+
+
+def format_instruction(opcode, args):
+    if opcode not in NAMES:
+        raise ListingError(f"unknown opcode {opcode!r}")
+    for arg in args:
+        if not _ARG.fullmatch(str(arg)):
+            raise ListingError(f"{NAMES[opcode]} argument {arg!r} cannot be written to a listing")
+    code = f"{opcode:<7} {'  '.join(map(str, args))}".rstrip()
+    return f"{code:<{COMMENT_COLUMN - 1}} # {NAMES[opcode]}\n"
+
+
+# Write instructions (dicts or compile_to_vm_bytecode tuples) to `out` as a listing
+def write_listing(instructions, out):
+    seen = {}
+    write = out.write
+    for op in instructions:
+        if isinstance(op, dict):
+            key = (op["opcode"], *op.get("args", ()))
+        else:
+            key = tuple(op)
+        line = seen.get(key)
+        if line is None:
+            line = format_instruction(key[0], key[1:])
+            if len(seen) < LINE_CACHE:
+                seen[key] = line
+        write(line)
@@ -0,0 +1,269 @@
+# Loop optimizations for advanced bytecode, on top of the CFG/SSA IR
+#
+# optimize_loops() runs three passes over resolved bytecode, each on a fresh IR:
+#
+#   hoist_invariants  - pure READ/ADD/SUB/MUL expressions whose variables are
+#                       not written in a natural loop are computed once in a
+#                       preheader and stored to a hidden ~invN variable; the
+#                       loop reads that instead
+#   reduce_strength   - in a single-block loop with an induction variable
+#                       i = i +/- step, repeated products i * k are kept in a
+#                       ~srN variable that is advanced by step * k each
+#                       iteration. MUL and ADD cost the same to dispatch here,
+#                       so this only applies when it removes instructions.
+#   unroll_loops      - a single-block loop ending "READ i; JNZ top" whose
+#                       trip count is known at compile time is unrolled fully
+#                       (up to FULL_UNROLL iterations) or by 4 or 2, dropping
+#                       the per-iteration test
+#
+# Loops containing CALL, and programs the IR leaves out of variable SSA
+# (THREAD, QUEUE, DISPATCH, SWITCH, SIFT), are not touched. The ~ variables
+# show up in the page alongside the program's own variables.
+from .ir import Instr, build_ir
+from .typed import decode_literal
+
+FULL_UNROLL = 8        # fully unroll loops of at most this many iterations
+UNROLL_FACTORS = (4, 2)
+UNROLL_BUDGET = 64     # instructions an unrolled loop body may grow to
+
+WRITES = ('WRITE', 'WRITEK', 'WRITEV', 'STORE')
+HOISTABLE = tuple(op + suffix for op in ('ADD', 'SUB', 'MUL') for suffix in ('', '_I', '_F'))
+
+
+# Re-emit bytecode with some pcs replaced and code inserted before others.
+#   replace: {pc: [(opcode, args), ...]} - new code for an original pc ([] deletes it)
+#   prefix:  {pc: [(opcode, args), ...]} - code run before pc when entered from outside
+#   inner:   {pc: set of pcs}            - branches from these pcs skip pc's prefix
+# Branch targets in replacement code are original pcs.
+def rewrite(bytecode, ir, replace, prefix, inner):
+    n = len(bytecode)
+    out, start, body = [], [0] * (n + 1), [0] * (n + 1)
+    pending = []
+    for pc in range(n):
+        start[pc] = len(out)
+        out.extend(prefix.get(pc, ()))
+        body[pc] = len(out)
+        for op in replace.get(pc, [bytecode[pc]]):
+            pending.append((len(out), pc))
+            out.append(op)
+    start[n] = body[n] = len(out)
+
+    def remap(target, source):
+        if not 0 <= target <= n:
+            return target
+        return body[target] if source in inner.get(target, ()) else start[target]
+
+    for index, source in pending:
+        opcode, args = out[index]
+        name = ir.names.get(opcode)
+        if name in ('JUMP', 'JZ', 'JNZ', 'CALL', 'THREAD') and args:
+            out[index] = (opcode, [remap(args[0], source)] + list(args[1:]))
+        elif name == 'QUEUE' and len(args) > 1:
+            out[index] = (opcode, [args[0], remap(args[1], source)] + list(args[2:]))
+    return out
+
+
+def _constant(ir, version):
+    definition = ir.defs.get(version)
+    if not isinstance(definition, Instr) or len(definition.args) < 1:
+        return None
+    if definition.op == 'WRITEK' and type(definition.args[1]) is int:
+        return definition.args[1]
+    if definition.op == 'WRITE':
+        literal = decode_literal(str(definition.args[1])) if len(definition.args) > 1 else ('int', 0)
+        if literal and literal[0] == 'int':
+            return literal[1]
+    return None
+
+
+def _loop_info(ir, header, body):
+    block = ir.blocks[header]
+    if block.start in ir.roots:
+        return None
+    pcs = {pc for b in body for pc in range(ir.blocks[b].start, ir.blocks[b].end)}
+    # The preheader goes right before the header, so nothing in the loop may fall into it
+    prev = block.start - 1
+    if prev in pcs and ir.name(prev) not in ('JUMP', 'RET', 'END'):
+        return None
+    code = [instr for b in sorted(body) for instr in ir.blocks[b].code]
+    if any(instr.op == 'CALL' for instr in code):
+        return None
+    written = {instr.args[0] for instr in code if instr.op in WRITES and instr.args}
+    return pcs, code, written
+
+
+def _ops(ir):
+    return {name: code for code, name in ir.names.items()}
+
+
+def hoist_invariants(bytecode, ops):
+    ir = build_ir(bytecode, ops)
+    if not ir.ssa_vars:
+        return bytecode
+    replace, prefix, inner, count = {}, {}, {}, 0
+    codes = _ops(ir)
+    # Outermost loops first, so an expression moves as far out as it can
+    for header, body in sorted(ir.loops().items(), key=lambda item: -len(item[1])):
+        info = _loop_info(ir, header, body)
+        if info is None:
+            continue
+        pcs, _, written = info
+        exiting = [b for b in body if ir.blocks[b].exits or any(s not in body for s in ir.blocks[b].succs)]
+        hoisted = {}
+        header_pc = ir.blocks[header].start
+        for b in sorted(body):
+            # Only code that runs on every trip may be computed ahead of the loop
+            if not all(ir.dominates(b, e) for e in exiting):
+                continue
+            trees = {}    # temp -> (first pc, size)
+            operands = set()
+            for instr in ir.blocks[b].code:
+                if instr.pc in replace:
+                    continue
+                if instr.op == 'READ' and instr.args and instr.args[0] not in written:
+                    trees[instr.dest] = (instr.pc, 1)
+                elif instr.op in HOISTABLE:
+                    a, c = instr.uses
+                    ta, tc = trees.get(a), trees.get(c)
+                    if ta and tc and ir.uses[a] == 1 and ir.uses[c] == 1 \
+                            and ta[0] + ta[1] == tc[0] and tc[0] + tc[1] == instr.pc:
+                        trees[instr.dest] = (ta[0], ta[1] + tc[1] + 1)
+                        operands.update((a, c))
+            for temp, (first, size) in trees.items():
+                if size < 3 or temp in operands:
+                    continue
+                code = tuple((bytecode[pc][0], tuple(bytecode[pc][1])) for pc in range(first, first + size))
+                if code not in hoisted:
+                    hoisted[code] = f"~inv{count}"
+                    count += 1
+                    prefix.setdefault(header_pc, []).extend(
+                        [(op, list(args)) for op, args in code] + [(codes['STORE'], [hoisted[code]])])
+                for pc in range(first, first + size - 1):
+                    replace[pc] = []
+                replace[first + size - 1] = [(codes['READ'], [hoisted[code]])]
+        if hoisted:
+            inner[header_pc] = pcs
+    if not prefix:
+        return bytecode
+    return rewrite(bytecode, ir, replace, prefix, inner)
+
+
+# Single-block loops "top: ... STORE i ... READ i JNZ top" with i = i +/- step.
+# Yields (ir, block, var, store instr, op, step var, initial version).
+def _counted_loops(ir):
+    if not ir.ssa_vars:
+        return
+    for header, body in ir.loops().items():
+        block = ir.blocks[header]
+        if body != {header} or len(block.code) < 3 or _loop_info(ir, header, body) is None:
+            continue
+        test, latch = block.code[-2], block.code[-1]
+        if latch.op != 'JNZ' or latch.args[0] != block.start or test.op != 'READ':
+            continue
+        var = test.args[0]
+        stores = [instr for instr in block.code if instr.op in WRITES and instr.args[0] == var]
+        if len(stores) != 1 or stores[0].op != 'STORE' or test.uses[0] != stores[0].dest:
+            continue
+        update = ir.defs.get(stores[0].uses[0])
+        if not isinstance(update, Instr) or update.op[:3] not in ('ADD', 'SUB') or update.op[3:] == '_F':
+            continue
+        a, b = (ir.defs.get(use) for use in update.uses)
+        if not (isinstance(a, Instr) and isinstance(b, Instr) and a.op == b.op == 'READ'):
+            continue
+        phi = block.phis.get(var)
+        if phi is None:
+            continue
+        if a.args[0] == var and a.uses[0] == phi.dest:
+            step = b.args[0]
+        elif b.args[0] == var and b.uses[0] == phi.dest and update.op[:3] == 'ADD':
+            step = a.args[0]
+        else:
+            continue
+        if step == var or any(instr.op in WRITES and instr.args[0] == step for instr in block.code):
+            continue
+        initial = {version for pred, version in phi.args.items() if pred != header}
+        if len(initial) != 1:
+            continue
+        yield block, var, stores[0], update.op[:3], step, initial.pop()
+
+
+def reduce_strength(bytecode, ops):
+    ir = build_ir(bytecode, ops)
+    codes = _ops(ir)
+    replace, prefix, inner, count = {}, {}, {}, 0
+    for block, var, store, op, step, _ in _counted_loops(ir):
+        phi = block.phis[var]
+        # Products of the phi version of var with a loop-invariant k, in source order
+        products = {}
+        for instr in block.code:
+            if instr.op[:3] != 'MUL' or instr.op[3:] == '_F':
+                continue
+            a, b = (ir.defs.get(use) for use in instr.uses)
+            if not (isinstance(a, Instr) and isinstance(b, Instr) and a.op == b.op == 'READ'):
+                continue
+            if a.pc + 1 != b.pc or b.pc + 1 != instr.pc or instr.pc > store.pc:
+                continue
+            if a.args[0] == var and a.uses[0] == phi.dest:
+                k = b.args[0]
+            elif b.args[0] == var and b.uses[0] == phi.dest:
+                k = a.args[0]
+            else:
+                continue
+            if k == var or any(i.op in WRITES and i.args[0] == k for i in block.code):
+                continue
+            products.setdefault(k, []).append(instr.pc)
+        for k, sites in products.items():
+            # Each site drops 2 instructions; the update adds 4
+            if 2 * len(sites) <= 4:
+                continue
+            acc, delta = f"~sr{count}", f"~sr{count}d"
+            count += 1
+            prefix.setdefault(block.start, []).extend([
+                (codes['READ'], [var]), (codes['READ'], [k]), (codes['MUL'], []), (codes['STORE'], [acc]),
+                (codes['READ'], [step]), (codes['READ'], [k]), (codes['MUL'], []), (codes['STORE'], [delta]),
+            ])
+            for pc in sites:
+                replace[pc - 2] = []
+                replace[pc - 1] = []
+                replace[pc] = [(codes['READ'], [acc])]
+            replace[store.pc] = replace.get(store.pc, [bytecode[store.pc]]) + [
+                (codes['READ'], [acc]), (codes['READ'], [delta]), (codes[op], []), (codes['STORE'], [acc]),
+            ]
+            inner[block.start] = set(range(block.start, block.end))
+    if not replace:
+        return bytecode
+    return rewrite(bytecode, ir, replace, prefix, inner)
+
+
+def unroll_loops(bytecode, ops):
+    ir = build_ir(bytecode, ops)
+    replace = {}
+    for block, var, store, op, step, initial in _counted_loops(ir):
+        start = _constant(ir, initial)
+        delta = _constant(ir, block.entry.get(step))
+        if start is None or not delta:
+            continue
+        # i runs start, start -/+ delta, ... and the loop exits when it reaches 0
+        trips, rest = divmod(start if op == 'SUB' else -start, delta)
+        if rest or trips < 1:
+            continue
+        body = [bytecode[pc] for pc in range(block.start, block.end - 2)]
+        if trips <= FULL_UNROLL and len(body) * trips <= UNROLL_BUDGET:
+            code = body * trips
+        else:
+            factor = next((f for f in UNROLL_FACTORS if trips % f == 0 and len(body) * f <= UNROLL_BUDGET), None)
+            if factor is None:
+                continue
+            code = body * factor + [bytecode[block.end - 2], bytecode[block.end - 1]]
+        replace[block.start] = [(opcode, list(args)) for opcode, args in code]
+        for pc in range(block.start + 1, block.end):
+            replace[pc] = []
+    if not replace:
+        return bytecode
+    return rewrite(bytecode, ir, replace, {}, {})
+
+
+def optimize_loops(bytecode, ops):
+    bytecode = hoist_invariants(bytecode, ops)
+    bytecode = reduce_strength(bytecode, ops)
+    return unroll_loops(bytecode, ops)
@@ -0,0 +1,337 @@
+# Multi-file programs for the advanced tier: separate compilation and linking
+#
+#   do IMPORT util            # util.synth next to the main file
+#   do IMPORT lib.strings     # lib/strings.synth
+#   do EXPORT loop_top        # make a label reachable from other modules
+#
+# Each module compiles on its own, through the same parse/slots/inline/IR/loop
+# passes as advanced_clv_compile, into a relocatable ModuleObject: bytecode
+# whose addresses are module-relative, the pcs that hold addresses, and the
+# functions and exported labels it defines. Calls and jumps to names the module
+# does not define are left as placeholders (EXTERNAL + index into `externals`).
+# Inlining and the IR/loop passes therefore only see one module at a time.
+#
+# link() lays the modules out main first, then in import order, each followed by
+# an END so no module falls into the next one, and patches every address. A name
+# is looked up in the referring module, then as "module.name", then in every
+# module; an undefined or ambiguous name is a LinkError. Type specialization and
+# the % variable rewrite run on the linked program, because variable types are
+# a whole-program property.
+#
+# Project caches objects in memory and in `<root>/.msxcache/`, keyed by source
+# digest, so a rebuild compiles only modules whose text changed. Changed modules
+# compile in parallel in a process pool when there is more than one of them.
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ..opcodes import advanced_instruction_set
+from ..tiers import CompileError
+from .advanced import lower, parse_statements, persistent_ops
+from .inline import INLINE_LIMIT
+from .ir import optimize as optimize_ir
+from .loops import optimize_loops
+from .typed import specialize
+
+SUFFIX = ".synth"
+OBJECT_SUFFIX = ".msxo"
+OBJECT_FORMAT = "msx-object"
+OBJECT_VERSION = 1
+CACHE_DIR = ".msxcache"
+EXTERNAL = 1 << 30     # placeholder addresses start here; never a real pc
+
+_NAMES = {code: name for name, code in advanced_instruction_set.items()}
+_CALL, _END = advanced_instruction_set['CALL'], advanced_instruction_set['END']
+
+
+class LinkError(ValueError):
+    pass
+
+
+# Index of the address argument of an instruction, or None
+def address_arg(opcode, args):
+    name = _NAMES.get(opcode)
+    if name in ('JUMP', 'JZ', 'JNZ', 'CALL', 'THREAD') and args:
+        return 0
+    if name == 'QUEUE' and len(args) > 1:
+        return 1
+    return None
+
+
+# IMPORT and EXPORT lines, read without compiling
+def directives(lines):
+    imports, exports = [], []
+    for line in lines:
+        parts = line.split()
+        if len(parts) > 2 and parts[1].upper() in ('IMPORT', 'EXPORT'):
+            (imports if parts[1].upper() == 'IMPORT' else exports).extend(parts[2:])
+    return imports, exports
+
+
+def module_path(root, name):
+    return os.path.join(root, *name.split(".")) + SUFFIX
+
+
+def digest(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ModuleObject:
+    def __init__(self, name, digest, imports, bytecode, relocs, externals, functions, labels, declared):
+        self.name = name
+        self.digest = digest
+        self.imports = imports
+        self.bytecode = bytecode      # [(opcode, args)], addresses relative to the module
+        self.relocs = relocs          # pcs whose address argument needs patching
+        self.externals = externals    # names behind EXTERNAL + i placeholders
+        self.functions = functions    # name -> (pc, argc, frame size)
+        self.labels = labels          # exported label -> pc
+        self.declared = declared      # TYPE declarations
+        self.stat = None              # (mtime_ns, size) of the source it was built from
+
+    def to_dict(self):
+        return {"format": OBJECT_FORMAT, "version": OBJECT_VERSION, "name": self.name, "digest": self.digest,
+                "imports": self.imports, "bytecode": self.bytecode, "relocs": self.relocs,
+                "externals": self.externals, "functions": self.functions, "labels": self.labels,
+                "declared": self.declared, "stat": self.stat}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != OBJECT_FORMAT or data.get("version") != OBJECT_VERSION:
+            return None
+        obj = cls(data["name"], data["digest"], data["imports"], [tuple(op) for op in data["bytecode"]],
+                  data["relocs"], data["externals"], {k: tuple(v) for k, v in data["functions"].items()},
+                  data["labels"], data["declared"])
+        obj.stat = tuple(data["stat"]) if data.get("stat") else None
+        return obj
+
+
+def compile_module(name, text, inline=True, inline_limit=INLINE_LIMIT, optimize=True):
+    lines = text.splitlines()
+    imports, exports = directives(lines)
+    statements, declared = parse_statements(lines)
+    externals, slots = [], {}
+
+    def unresolved(symbol):
+        if symbol not in slots:
+            slots[symbol] = len(externals)
+            externals.append(symbol)
+        return EXTERNAL + slots[symbol]
+
+    bytecode, labels, functions, frames = lower(statements, inline, inline_limit, unresolved)
+    missing = [label for label in exports if label not in labels]
+    if missing:
+        raise LinkError(f"module {name}: EXPORT of undefined label {', '.join(missing)}")
+    # Exported entry points are called from outside, so the passes must keep them
+    # and remap them: a trailing block of CALLs to each of them rides along as a
+    # root and is stripped afterwards.
+    symbols = list(functions) + [label for label in exports if label not in functions]
+    table = dict(labels, **functions)
+    stubs = len(bytecode)
+    bytecode = bytecode + [(_CALL, [table[symbol]]) for symbol in symbols]
+    if optimize:
+        bytecode = optimize_ir(bytecode, advanced_instruction_set, entries=(stubs,))
+        bytecode = optimize_loops(bytecode, advanced_instruction_set)
+    stubs = len(bytecode) - len(symbols)
+    addresses = dict(zip(symbols, (args[0] for _, args in bytecode[stubs:])))
+    bytecode = bytecode[:stubs]
+    relocs = [pc for pc, (opcode, args) in enumerate(bytecode) if address_arg(opcode, args) is not None]
+    return ModuleObject(
+        name, digest(text), imports, bytecode, relocs, externals,
+        {f: (addresses[f],) + frames.get(f, (0, 0)) for f in functions},
+        {label: addresses[label] for label in exports if label not in functions}, declared)
+
+
+# Worker entry point for the process pool; like load_tier's compilers, it
+# reports a source the compiler trips over as CompileError
+def _compile_job(job):
+    name, text, options = job
+    try:
+        return compile_module(name, text, **options)
+    except (IndexError, KeyError, TypeError) as e:
+        raise CompileError(f"module {name}: {type(e).__name__}: {e}") from e
+
+
+def _resolve(symbol, obj, objects):
+    if symbol in obj.functions or symbol in obj.labels:
+        return obj.name, symbol
+    module, _, local = symbol.rpartition(".")
+    if module in objects and (local in objects[module].functions or local in objects[module].labels):
+        return module, local
+    found = [other.name for other in objects.values() if symbol in other.functions or symbol in other.labels]
+    if not found:
+        raise LinkError(f"module {obj.name}: undefined symbol {symbol}")
+    if len(found) > 1:
+        raise LinkError(f"module {obj.name}: {symbol} is defined in {', '.join(sorted(found))}")
+    return found[0], symbol
+
+
+# Lay out `order` (module names, entry module first) and patch every address.
+# Returns unspecialized bytecode; see link() for the full pipeline.
+def link_objects(objects, order):
+    objects = {name: objects[name] for name in order}
+    base, pc = {}, 0
+    for name in order:
+        base[name] = pc
+        pc += len(objects[name].bytecode) + 1
+    program = []
+    for name in order:
+        obj = objects[name]
+        code = list(obj.bytecode)
+        externals = [_resolve(symbol, obj, objects) for symbol in obj.externals]
+        for at in obj.relocs:
+            opcode, args = code[at]
+            args = list(args)
+            index = address_arg(opcode, args)
+            target = args[index]
+            if target < EXTERNAL:
+                args[index] = base[name] + target
+            else:
+                module, symbol = externals[target - EXTERNAL]
+                other = objects[module]
+                if symbol in other.functions:
+                    address, argc, size = other.functions[symbol]
+                else:
+                    address, argc, size = other.labels[symbol], 0, 0
+                args[index] = base[module] + address
+                callee = _NAMES[opcode]
+                if callee == 'CALL' and size:
+                    args[1:] = [argc, size]
+                elif callee in ('THREAD', 'QUEUE') and size:
+                    args[index + 1:] = [size]
+            code[at] = (opcode, args)
+        program.extend(code)
+        program.append((_END, []))
+    return program
+
+
+def link(objects, order, typed=True):
+    declared = {}
+    for name in order:
+        for var, kind in objects[name].declared.items():
+            if declared.setdefault(var, kind) != kind:
+                raise LinkError(f"{var} is declared {declared[var]} and {kind} in different modules")
+    bytecode = link_objects(objects, order)
+    if typed:
+        try:
+            bytecode = specialize(bytecode, advanced_instruction_set, declared)[0]
+        except TypeError as e:  # a TYPE declaration that some module's writes contradict
+            raise LinkError(str(e)) from e
+    return persistent_ops(bytecode)
+
+
+class Project:
+    def __init__(self, root, workers=None, cache_dir=None, typed=True):
+        self.root = root
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = os.path.join(root, CACHE_DIR) if cache_dir is None else cache_dir
+        self.typed = typed
+        self.objects = {}        # module name -> ModuleObject
+        self.last = {}
+
+    def _object_file(self, name):
+        return os.path.join(self.cache_dir, name + OBJECT_SUFFIX)
+
+    def _cached(self, name):
+        if name in self.objects or not self.cache_dir:
+            return self.objects.get(name)
+        try:
+            with open(self._object_file(name)) as f:
+                return ModuleObject.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save(self, obj):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._object_file(obj.name)
+            with open(path + ".tmp", "w") as f:
+                json.dump(obj.to_dict(), f, separators=(",", ":"))
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass  # the cache is an optimization; a read-only tree still builds
+
+    def _source(self, name, path, main, main_text):
+        if name == main and main_text is not None:
+            return main_text, None
+        try:
+            st = os.stat(path)
+            with open(path) as f:
+                return f.read(), (st.st_mtime_ns, st.st_size)
+        except OSError as e:
+            raise LinkError(f"cannot read module {name} ({path}): {e.strerror}")
+
+    # Find every module reachable from `main`; returns (order, stale) where
+    # stale maps module name -> (source text, stat) for modules to compile.
+    # An object is reused when the source's size and mtime match, or failing
+    # that when its text still has the same digest.
+    def _scan(self, main, main_text=None):
+        order, stale, seen, work = [], {}, set(), [main]
+        while work:
+            name = work.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            order.append(name)
+            obj = self._cached(name)
+            path = module_path(self.root, name)
+            if obj is None or obj.stat is None or name == main and main_text is not None \
+                    or _stat(path) != obj.stat:
+                text, stat = self._source(name, path, main, main_text)
+                if obj is None or obj.digest != digest(text):
+                    stale[name] = (text, stat)
+                    work.extend(reversed(directives(text.splitlines())[0]))
+                    continue
+                obj.stat = stat
+            self.objects[name] = obj
+            work.extend(reversed(obj.imports))
+        return order, stale
+
+    def _compile(self, stale):
+        jobs = [(name, text, {}) for name, (text, _) in stale.items()]
+        if len(jobs) > 1 and self.workers > 1:
+            workers = min(self.workers, len(jobs))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                built = list(pool.map(_compile_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+        else:
+            built = [_compile_job(job) for job in jobs]
+        for obj in built:
+            obj.stat = stale[obj.name][1]
+            self.objects[obj.name] = obj
+            self._save(obj)
+
+    # Compile what changed and link; `main` is a module name under root
+    def build(self, main, main_text=None):
+        start = time.perf_counter()
+        order, stale = self._scan(main, main_text)
+        scanned = time.perf_counter()
+        self._compile(stale)
+        compiled = time.perf_counter()
+        bytecode = link(self.objects, order, self.typed)
+        self.last = {"modules": len(order), "compiled": len(stale), "reused": len(order) - len(stale),
+                     "scan_ms": (scanned - start) * 1000, "compile_ms": (compiled - scanned) * 1000,
+                     "link_ms": (time.perf_counter() - compiled) * 1000}
+        return bytecode
+
+    def stats(self):
+        return dict(self.last)
+
+
+# Build the program whose entry module is the file at `path`
+def build_program(path, text=None, workers=None):
+    root, base = os.path.split(os.path.abspath(path))
+    name = base[:-len(SUFFIX)] if base.endswith(SUFFIX) else base
+    project = Project(root, workers)
+    return project.build(name, text), project.stats()
@@ -0,0 +1,38 @@
+# Compiler for the page-managed VM (FUNC/ENDFUNC blocks, keyword-first lines)
+from ..opcodes import paged_instruction_set as instruction_set
+from .lexer import fields
+
+
+def compile_script(lines):
+    functions = {}
+    macros = {}
+    bytecode = []
+    pc = 0
+    in_func = False
+    func_name = ""
+
+    for line in lines:
+        parts = fields(line)
+        if not parts:
+            continue
+        if parts[0].upper() == 'FUNC':
+            in_func = True
+            func_name = parts[1]
+            functions[func_name] = pc
+            continue
+        elif parts[0].upper() == 'ENDFUNC':
+            in_func = False
+            continue
+        elif parts[0].upper() == 'MACRO':
+            macros[parts[1]] = parts[2:]
+            continue
+
+        opcode = instruction_set.get(parts[0].upper(), None)
+        if opcode is not None:
+            args = parts[1:]
+            if parts[0].upper() == 'CALL':
+                args = [functions.get(parts[1], 0)]
+            bytecode.append((opcode, args))
+            pc += 1
+
+    return bytecode
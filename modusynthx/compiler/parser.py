@@ -0,0 +1,118 @@
+# Parser for the dotted statement grammar of modu_synthx_spec
+#
+#   keyword.modifier.modifier... operand* [(option: words, ...)] [> operand] [a :: b]
+#
+#   write.quick.on @console "Hello, ModuSynthX World!"
+#   sift.purge.on $TempTokens (after: 5 interactions)
+#   trigger.release.on interaction-heavy > $ResponseMem
+#
+# One statement per line. The first token is a dotted NAME whose first part
+# must be one of the spec's keywords (a set lookup); the rest of the chain is
+# kept in order as `chain`, and `modifiers` are the parts that are spec
+# modifiers. Prepositions (on, in, from, ...) between operands are dropped.
+# parse() consumes tokenize()'s stream once, so it is linear in the source,
+# and anything it cannot place is a ParseError with the line and column.
+from ..spec import modu_synthx_spec
+from .lexer import (BIND, CELL, COLON, COMMA, LPAREN, NAME, NEWLINE, NUMBER, REDIRECT, RPAREN, STRING,
+                    SYSTEM, USER, VIRTUAL, tokenize)
+
+KEYWORDS = frozenset(modu_synthx_spec["keywords"])
+MODIFIERS = frozenset(modu_synthx_spec["modifiers"])
+PREPOSITIONS = frozenset(("on", "in", "to", "from", "for", "of", "with", "at", "into"))
+
+OPERANDS = frozenset((NAME, NUMBER, STRING, SYSTEM, USER, VIRTUAL, CELL))
+
+
+class ParseError(ValueError):
+    def __init__(self, message, line, col):
+        super().__init__(f"line {line}, column {col}: {message}")
+        self.line = line
+        self.col = col
+
+
+class Statement:
+    __slots__ = ('keyword', 'chain', 'operands', 'options', 'redirect', 'bindings', 'line')
+
+    def __init__(self, keyword, chain, line):
+        self.keyword = keyword
+        self.chain = chain          # chain parts after the keyword
+        self.operands = []
+        self.options = {}           # (name: words) -> {name: "words"}
+        self.redirect = None        # operand after >
+        self.bindings = {}          # a :: b -> {a: b}
+        self.line = line
+
+    @property
+    def modifiers(self):
+        return [part for part in self.chain if part in MODIFIERS]
+
+    def __repr__(self):
+        return (f"Statement({'.'.join([self.keyword] + self.chain)}, operands={self.operands!r}, "
+                f"options={self.options!r}, redirect={self.redirect!r}, bindings={self.bindings!r}, "
+                f"line={self.line})")
+
+
+# Read "(name: words, name: words)" after its LPAREN into `options`
+def _options(tokens, options, line, col):
+    name, words = None, []
+    for kind, text, line, col in tokens:
+        if kind is RPAREN or kind is COMMA:
+            if name is None and words:
+                name, words = words[0], words[1:]
+            if name is not None:
+                options[name] = " ".join(words)
+            if kind is RPAREN:
+                return
+            name, words = None, []
+        elif kind is COLON and name is None and len(words) == 1:
+            name, words = words[0], []
+        elif kind in OPERANDS:
+            words.append(text)
+        elif kind is NEWLINE:
+            break
+        else:
+            raise ParseError(f"unexpected {text!r} in options", line, col)
+    raise ParseError("unclosed '('", line, col)  # the source ran out or the line ended
+
+
+def parse(source):
+    if not isinstance(source, str):
+        source = "\n".join(source)
+    statements = []
+    current, pending = None, None
+    tokens = tokenize(source)
+    for kind, text, line, col in tokens:
+        if kind is NEWLINE:
+            if pending is not None:
+                raise ParseError(f"{pending[0]} needs an operand", line, col)
+            current = None
+        elif current is None:
+            if kind is not NAME:
+                raise ParseError(f"expected keyword.modifier..., found {text!r}", line, col)
+            chain = text.split(".")
+            keyword = chain[0].lower()
+            if keyword not in KEYWORDS:
+                raise ParseError(f"unknown keyword {chain[0]!r}", line, col)
+            current = Statement(keyword, chain[1:], line)
+            statements.append(current)
+        elif kind in OPERANDS:
+            if pending is None:
+                if kind is not NAME or text not in PREPOSITIONS:
+                    current.operands.append(text)
+            elif pending[0] == ">":
+                current.redirect = text
+                pending = None
+            else:
+                current.bindings[pending[1]] = text
+                pending = None
+        elif kind is REDIRECT and pending is None:
+            pending = (">",)
+        elif kind is BIND and pending is None and current.operands:
+            pending = ("::", current.operands.pop())
+        elif kind is LPAREN and pending is None:
+            _options(tokens, current.options, line, col)
+        else:
+            raise ParseError(f"unexpected {text!r}", line, col)
+    if pending is not None:
+        raise ParseError(f"{pending[0]} needs an operand", line, col)
+    return statements
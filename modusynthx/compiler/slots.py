@@ -0,0 +1,88 @@
+# Compile-time slot assignment for function locals
+#
+#   do FUNC name [param ...]   parameters are popped off the stack by CALL
+#   do LOCAL name [name ...]   further locals of the enclosing function
+#
+# A function's body is every statement reachable from its FUNC without entering
+# a CALL, so main code placed after the functions is never captured. Inside a
+# body, READ/STORE/WRITE of a parameter or LOCAL become LOADL/STOREL/WRITEL on
+# a slot index; every other name stays a page variable. Locals start at 0.
+from .typed import decode_literal
+
+
+def _reachable(statements, start, labels):
+    seen, work = set(), [start]
+    while work:
+        i = work.pop()
+        if i in seen or i >= len(statements):
+            continue
+        seen.add(i)
+        _, cmd, args = statements[i]
+        if cmd in ('RET', 'END'):
+            continue
+        if cmd in ('JUMP', 'JZ', 'JNZ') and args and args[0] in labels:
+            work.append(labels[args[0]])
+            if cmd == 'JUMP':
+                continue
+        work.append(i + 1)
+    return seen
+
+
+# Returns {function: (argc, {name: slot})} and, per statement index, the
+# functions whose body contains it
+def function_scopes(statements):
+    labels = {args[0]: i for i, (_, cmd, args) in enumerate(statements) if cmd == 'LABEL' and args}
+    scopes, owners = {}, {}
+    for i, (_, cmd, args) in enumerate(statements):
+        if cmd != 'FUNC' or not args:
+            continue
+        name, params = args[0], args[1:]
+        if len(set(params)) != len(params):
+            raise ValueError(f"Duplicate parameter in FUNC {name}")
+        slots = {param: n for n, param in enumerate(params)}
+        body = _reachable(statements, i + 1, labels)
+        for j in sorted(body):
+            if statements[j][1] == 'LOCAL':
+                for local in statements[j][2]:
+                    slots.setdefault(local, len(slots))
+            owners.setdefault(j, []).append(name)
+        scopes[name] = (len(params), slots)
+    return scopes, owners
+
+
+def assign_slots(statements):
+    scopes, owners = function_scopes(statements)
+    frames = {name: (argc, len(slots)) for name, (argc, slots) in scopes.items()}
+    out = []
+    for i, (mod, cmd, args) in enumerate(statements):
+        if cmd == 'LOCAL':
+            if i not in owners:
+                raise ValueError(f"LOCAL {' '.join(args)} outside a function")
+            continue
+        funcs = owners.get(i, ())
+
+        def slot(name):
+            found = {scopes[f][1].get(name) for f in funcs}
+            if len(found) > 1:
+                raise ValueError(f"{name} is a local of some functions sharing this code but not others: "
+                                 f"{', '.join(funcs)}")
+            return found.pop() if found else None
+
+        if cmd == 'READ' and args and slot(args[0]) is not None:
+            out.append((mod, 'LOADL', [slot(args[0])]))
+        elif cmd == 'STORE' and args and slot(args[0]) is not None:
+            out.append((mod, 'STOREL', [slot(args[0])]))
+        elif cmd == 'WRITE' and args:
+            target = slot(args[0])
+            literal = decode_literal(args[1]) if len(args) > 1 else ('int', 0)
+            source = None if literal else slot(args[1])
+            if target is None and source is None:
+                out.append((mod, cmd, args))
+            elif literal:
+                out.append((mod, 'WRITEL', [target, literal[1]]))
+            else:
+                out.append((mod, 'READ', [args[1]]) if source is None else (mod, 'LOADL', [source]))
+                out.append((mod, 'STORE', [args[0]]) if target is None else (mod, 'STOREL', [target]))
+        else:
+            out.append((mod, cmd, args))
+    return out, frames
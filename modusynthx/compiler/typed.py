@@ -0,0 +1,235 @@
+# Compile-time literal decoding, type inference and arithmetic specialization
+#
+# specialize() rewrites compiled extended/advanced bytecode so that:
+#   WRITE x <literal>  -> WRITEK x <decoded value>   (no int() / except at run time)
+#   WRITE x <name>     -> WRITEV x <name>
+#   ADD/SUB/MUL/DIV/MOD -> *_I or *_F when both operand types are known
+#
+# A decoded literal rides in its WRITEK instruction, so storing it at run time
+# needs no lookup.
+#
+# Types are 'int', 'float', 'str' and 'any'. Variable types are inferred
+# flow-insensitively (the join of every write to that name on any page or
+# thread); stack types are tracked per pc with a worklist over the jumps.
+# "TYPE <name> <type>" lines declare a variable's type; a conflicting write is
+# a compile-time TypeError.
+import re
+
+TYPES = ('int', 'float', 'str', 'any')
+
+_INT_RE = re.compile(r'[+-]?\d+\Z')
+_FLOAT_RE = re.compile(r'[+-]?(?:\d+\.\d*|\.\d+|\d+(?=[eE]))(?:[eE][+-]?\d+)?\Z')
+
+ARITH_OPS = ('ADD', 'SUB', 'MUL', 'DIV', 'MOD')
+
+# Stack types tracked per pc; deeper entries read back as 'any'. Keeps long runs
+# of pushes from copying an ever-growing tuple at every instruction.
+STACK_LIMIT = 64
+# Names tracked as definitely assigned along a path. Past this, further names are
+# treated as possibly unassigned (their reads also join 'int'), so a long run of
+# writes to distinct names does not rebuild an ever-growing set at every write.
+ASSIGNED_LIMIT = 256
+
+
+# Decode a single source token; returns (type, value) or None for a variable name
+def decode_literal(token):
+    if _INT_RE.match(token):
+        return 'int', int(token)
+    if _FLOAT_RE.match(token):
+        return 'float', float(token)
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "'\"":
+        return 'str', token[1:-1]
+    return None
+
+
+def join(a, b):
+    if a is None:
+        return b
+    if b is None or a == b:
+        return a
+    return 'any'
+
+
+def arith_result(name, a, b):
+    if a is None or b is None:
+        return None
+    if a == b == 'int':
+        return 'float' if name == 'DIV' else 'int'
+    if a in ('int', 'float') and b in ('int', 'float'):
+        return 'float'
+    if name == 'ADD' and a == b == 'str':
+        return 'str'
+    return 'any'
+
+
+def _join_states(old, new):
+    if old is None:
+        return new
+    old_stack, old_assigned = old
+    new_stack, new_assigned = new
+    if old_stack is None or new_stack is None or len(old_stack) != len(new_stack):
+        stack = None
+    else:
+        stack = tuple(join(a, b) for a, b in zip(old_stack, new_stack))
+    return stack, old_assigned & new_assigned
+
+
+# Run the stack/definite-assignment dataflow once for the given variable types.
+# Returns (states per pc, variable types implied by the writes seen).
+def _flow(bytecode, ops, var_types, declared, track_assigned):
+    names = {code: name for name, code in ops.items()}
+    entry = ((), frozenset())
+    states = [None] * len(bytecode)
+    # THREAD and QUEUE targets start on a child VM with an empty stack
+    entries = [0]
+    for opcode, args in bytecode:
+        if names.get(opcode) == 'THREAD' and args:
+            entries.append(args[0])
+        elif names.get(opcode) == 'QUEUE' and len(args) >= 2:
+            entries.append(args[1])
+    work = []
+    for pc in entries:
+        if 0 <= pc < len(bytecode):
+            states[pc] = _join_states(states[pc], entry)
+            work.append(pc)
+    writes = {}
+
+    def read_type(name, assigned):
+        if name[:1] == '%' and name not in declared:
+            return 'any'  # % variables may hold anything a previous run stored
+        kind = declared.get(name) or var_types.get(name)
+        if name in assigned:
+            return kind  # None until a write to the name has been seen
+        return join(kind, 'int')  # unassigned names read as 0
+
+    def record(name, kind):
+        writes[name] = join(writes.get(name), kind)
+
+    while work:
+        pc = work.pop()
+        stack, assigned = states[pc]
+        opcode, args = bytecode[pc]
+        name = names.get(opcode)
+        stack = None if stack is None else list(stack)
+        succ = [pc + 1]
+
+        def pop():
+            if stack is None:
+                return 'any'
+            if not stack:
+                return 'any'
+            return stack.pop()
+
+        if name in ('WRITE', 'WRITEK', 'WRITEV'):
+            if name == 'WRITEK':
+                kind = type(args[1]).__name__
+            elif name == 'WRITEV':
+                kind = read_type(args[1], assigned)
+            else:
+                literal = decode_literal(args[1]) if len(args) > 1 else ('int', 0)
+                kind = literal[0] if literal else read_type(args[1], assigned)
+            record(args[0], kind)
+            if args[0] not in assigned and len(assigned) < ASSIGNED_LIMIT:
+                assigned = assigned | {args[0]}
+        elif name == 'READ':
+            if stack is not None:
+                stack.append(read_type(args[0], assigned))
+        elif name == 'LOADL':
+            if stack is not None:
+                stack.append('any')
+        elif name == 'STOREL':
+            pop()
+        elif name == 'STORE':
+            record(args[0], pop())
+            if args[0] not in assigned and len(assigned) < ASSIGNED_LIMIT:
+                assigned = assigned | {args[0]}
+        elif name in ARITH_OPS or (name and name[:-2] in ARITH_OPS and name[-2:] in ('_I', '_F')):
+            b, a = pop(), pop()
+            if stack is not None:
+                stack.append(arith_result(name[:3], a, b))
+        elif name in ('JZ', 'JNZ'):
+            pop()
+            succ.append(args[0])
+        elif name == 'JUMP':
+            succ = [args[0]]
+        elif name == 'PRINT':
+            pop()
+        elif name == 'CALL':
+            for _ in range(args[1] if len(args) > 1 else 0):
+                pop()  # arguments move into the callee's frame
+            succ = [args[0]]
+            # The return lands on pc + 1 with whatever the callee left behind
+            ret_state = (None, assigned if track_assigned else frozenset())
+            if pc + 1 < len(bytecode):
+                merged = _join_states(states[pc + 1], ret_state)
+                if merged != states[pc + 1]:
+                    states[pc + 1] = merged
+                    work.append(pc + 1)
+        elif name in ('RET', 'END'):
+            succ = []
+        elif name == 'SWITCH':
+            assigned = frozenset()
+        elif name in ('OPTIMIZE', 'FLOWCMP', 'RELEASE'):
+            stack = None
+        elif name == 'SIFT':
+            assigned = frozenset()
+
+        if not track_assigned:
+            assigned = frozenset()
+        out = (None if stack is None else tuple(stack[-STACK_LIMIT:]), assigned)
+        for target in succ:
+            if 0 <= target < len(bytecode):
+                merged = _join_states(states[target], out)
+                if merged != states[target]:
+                    states[target] = merged
+                    work.append(target)
+    return states, writes
+
+
+def infer_types(bytecode, ops, declared=None):
+    declared = declared or {}
+    for name, kind in declared.items():
+        if kind not in TYPES:
+            raise ValueError(f"Unknown type for {name}: {kind} (choose from {', '.join(TYPES)})")
+    names = {code: name for name, code in ops.items()}
+    # SIFT can delete a variable at any time, so definite assignment is only
+    # trusted in programs that never sift.
+    track_assigned = not any(names.get(op) == 'SIFT' for op, _ in bytecode)
+    var_types = dict(declared)
+    while True:
+        states, writes = _flow(bytecode, ops, var_types, declared, track_assigned)
+        updated = dict(var_types)
+        for name, kind in writes.items():
+            updated[name] = join(updated.get(name), kind)
+        if updated == var_types:
+            break
+        var_types = updated
+    for name, kind in declared.items():
+        if kind != 'any' and writes.get(name) not in (None, kind):
+            raise TypeError(f"{name} is declared {kind} but assigned {writes[name]}")
+    return var_types, states
+
+
+def specialize(bytecode, ops, declared=None):
+    var_types, states = infer_types(bytecode, ops, declared)
+    names = {code: name for name, code in ops.items()}
+    out = []
+    for pc, (opcode, args) in enumerate(bytecode):
+        name = names.get(opcode)
+        if name == 'WRITE' and args:
+            literal = decode_literal(args[1]) if len(args) > 1 else ('int', 0)
+            if literal:
+                value = literal[1]
+                out.append((ops['WRITEK'], [args[0], value]))
+            else:
+                out.append((ops['WRITEV'], [args[0], args[1]]))
+            continue
+        if name in ARITH_OPS and states[pc] is not None and states[pc][0] is not None \
+                and len(states[pc][0]) >= 2:
+            a, b = states[pc][0][-2:]
+            if a == b == 'int':
+                opcode = ops[name + '_I']
+            elif a in ('int', 'float') and b in ('int', 'float'):
+                opcode = ops[name + '_F']
+        out.append((opcode, args))
+    return out, var_types
@@ -0,0 +1,353 @@
+# Load-time verifier for advanced bytecode
+#
+# verify() proves before a run what AdvancedVM would otherwise find out
+# mid-run, as an IndexError from an empty stack or a page read defaulting to 0:
+#
+#   - every opcode is known and has the arguments its handler indexes
+#   - jump, CALL, THREAD and QUEUE targets lie inside the program (a target
+#     equal to its length ends the run), and local slots inside their frame
+#   - the stack never underflows. Depths are exact: paths that meet must agree
+#     on the depth, and every RET of a function leaves the same net effect. The
+#     deepest the stack can get is reported as max_depth.
+#   - page variables are written before they are read, on every path
+#
+# Each routine (pc 0 and every CALL, THREAD and QUEUE target) is summarized
+# once: values it needs below its entry depth, its net effect, its peak depth,
+# the names it always defines and the names it may delete. CALL applies the
+# callee's summary, and recursion is solved as a fixed point; a recursive call
+# made above the entry depth grows the stack without bound and is rejected.
+#
+# The result carries the program's fast form: READ and WRITEV become LOADG and
+# MOVEG, which index the page without a default and are the first opcodes the
+# VM tests. Anything that cannot be proved raises VerifyError with its pc.
+from ..opcodes import FLOW_SETTINGS, advanced_instruction_set
+
+ARITH = tuple(op + suffix for op in ('ADD', 'SUB', 'MUL', 'DIV', 'MOD') for suffix in ('', '_I', '_F'))
+PUSH = ('READ', 'LOADG', 'LOADL', 'LOADP')
+POP = ('STORE', 'STOREL', 'STOREP', 'PRINT', 'JZ', 'JNZ')
+
+# (fewest, most) arguments each handler reads; None for no upper bound
+ARITY = {
+    'READ': (1, 1), 'LOADG': (1, 1), 'STORE': (1, 1), 'LOADP': (1, 1), 'STOREP': (1, 1),
+    'LOADL': (1, 1), 'STOREL': (1, 1), 'WRITEL': (2, 2),
+    'WRITE': (1, None), 'WRITEK': (2, 2), 'WRITEV': (2, 2), 'MOVEG': (2, 2), 'WRITEP': (2, 2), 'MOVEP': (2, 2),
+    'JUMP': (1, 1), 'JZ': (1, 1), 'JNZ': (1, 1), 'CALL': (1, 3), 'THREAD': (1, 2), 'QUEUE': (2, 3),
+    'SWITCH': (0, 1), 'MODE': (2, 2), 'FLOW': (1, 2),
+}
+# Position of the code address in an instruction's arguments
+TARGETS = {'JUMP': 0, 'JZ': 0, 'JNZ': 0, 'CALL': 0, 'THREAD': 0, 'QUEUE': 1}
+
+EVERYTHING = None   # a kill set meaning every name (SWITCH, bare SIFT)
+
+
+class VerifyError(ValueError):
+    def __init__(self, message, pc=None):
+        super().__init__(message if pc is None else f"pc {pc}: {message}")
+        self.pc = pc
+
+
+class Summary:
+    __slots__ = ('need', 'need_pc', 'effect', 'peak', 'defines', 'kills', 'resets')
+
+    def __init__(self):
+        self.need = 0          # values popped from below the entry depth
+        self.need_pc = None    # first instruction that pops them
+        self.effect = None     # net depth change at RET; None if it never returns
+        self.peak = 0          # deepest the stack gets above the entry depth
+        self.defines = None    # names defined at every RET
+        self.kills = frozenset()
+        self.resets = None     # first OPTIMIZE, FLOWCMP or RELEASE
+
+    def key(self):
+        return self.need, self.effect, self.peak, self.defines, self.kills
+
+
+class Verification:
+    __slots__ = ('bytecode', 'max_depth', 'routines', 'reads')
+
+    def __init__(self, bytecode, max_depth, routines, reads):
+        self.bytecode = bytecode      # the fast form
+        self.max_depth = max_depth
+        self.routines = routines
+        self.reads = reads            # page reads proved defined
+
+    def stats(self):
+        return {"max_depth": self.max_depth, "routines": self.routines, "reads": self.reads}
+
+
+def _int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _kill(defined, kills):
+    return frozenset() if kills is EVERYTHING else defined - kills
+
+
+def _union(a, b):
+    return EVERYTHING if a is EVERYTHING or b is EVERYTHING else a | b
+
+
+# The page variable a WRITE or MOVEP source token reads, or None for an int
+# literal (the VM's _eval tries int() first)
+def _source(token):
+    try:
+        int(token)
+        return None
+    except (TypeError, ValueError):
+        return token
+
+
+class _Verifier:
+    def __init__(self, bytecode, ops):
+        self.bytecode = bytecode
+        self.ops = ops
+        self.names = {code: name for name, code in ops.items()}
+        self.summaries = {}
+        self.queued = set()     # QUEUE targets, run by DISPATCH
+
+    def check_shapes(self):
+        end = len(self.bytecode)
+        for pc, instruction in enumerate(self.bytecode):
+            if not isinstance(instruction, (tuple, list)) or len(instruction) != 2:
+                raise VerifyError("malformed instruction", pc)
+            opcode, args = instruction
+            name = self.names.get(opcode)
+            if name is None:
+                raise VerifyError(f"unknown opcode {opcode!r}", pc)
+            fewest, most = ARITY.get(name, (0, None))
+            if len(args) < fewest or (most is not None and len(args) > most):
+                raise VerifyError(f"{name} cannot take {len(args)} arguments", pc)
+            if name in TARGETS:
+                target = args[TARGETS[name]]
+                if not _int(target) or not 0 <= target <= end:
+                    raise VerifyError(f"{name} target {target!r} is outside the program", pc)
+            if name == 'CALL' and len(args) == 2:
+                raise VerifyError("CALL takes a target, or a target, argument count and frame size", pc)
+            sizes = args[1:] if name in ('CALL', 'THREAD') else args[2:] if name == 'QUEUE' else ()
+            if not all(_int(size) and size >= 0 for size in sizes):
+                raise VerifyError(f"{name} frame sizes must be counts", pc)
+            if name == 'CALL' and len(args) == 3 and args[1] > args[2]:
+                raise VerifyError(f"CALL passes {args[1]} arguments to a frame of {args[2]}", pc)
+            if name in ('LOADL', 'STOREL', 'WRITEL') and not (_int(args[0]) and args[0] >= 0):
+                raise VerifyError(f"{name} slot {args[0]!r} is not a slot number", pc)
+            if name == 'SWITCH' and args and _source(args[0]) is not None:
+                raise VerifyError(f"SWITCH page {args[0]!r} is not a number", pc)
+            if name == 'FLOW' and args[0] not in FLOW_SETTINGS:
+                raise VerifyError(f"unknown flow setting {args[0]!r}", pc)
+            if name == 'QUEUE':
+                self.queued.add(args[1])
+
+    # Entry points: pc 0 plus every CALL, THREAD and QUEUE target. Roots start on
+    # a VM of their own with an empty stack; CALL targets continue the caller's.
+    def entries(self):
+        called, roots = set(), {0}
+        for opcode, args in self.bytecode:
+            name = self.names[opcode]
+            if name == 'CALL':
+                called.add(args[0])
+            elif name in ('THREAD', 'QUEUE'):
+                roots.add(args[TARGETS[name]])
+        return called, roots
+
+    def dispatch_kills(self):
+        kills = frozenset()
+        for target in self.queued:
+            summary = self.summaries.get(target)
+            if summary is not None:
+                kills = _union(kills, summary.kills)
+        return kills
+
+    # Walk one routine from `entry` with depth 0 and `defined` names; returns its
+    # Summary and the (depth, defined) state at every instruction it reaches
+    def walk(self, entry, defined):
+        bytecode, names, end = self.bytecode, self.names, len(self.bytecode)
+        summary = Summary()
+        states = {entry: (0, defined)}
+        work = [entry]
+
+        def flow(pc, depth, defined):
+            old = states.get(pc)
+            if old is None:
+                states[pc] = (depth, defined)
+                work.append(pc)
+            elif old[0] != depth:
+                raise VerifyError(f"stack depth is {old[0]} on one path here and {depth} on another", pc)
+            elif not old[1] <= defined:
+                states[pc] = (depth, old[1] & defined)
+                work.append(pc)
+
+        def pop(pc, depth, n):
+            if depth - n < -summary.need:
+                summary.need, summary.need_pc = n - depth, pc
+            return depth - n
+
+        while work:
+            pc = work.pop()
+            if pc == end:
+                continue    # ran off the end: the run is over
+            depth, defined = states[pc]
+            opcode, args = bytecode[pc]
+            name = names[opcode]
+            if name in PUSH:
+                depth += 1
+            elif name in POP:
+                depth = pop(pc, depth, 1)
+            elif name in ARITH:
+                depth = pop(pc, depth, 2) + 1
+            summary.peak = max(summary.peak, depth)
+
+            if name in ('WRITE', 'WRITEK', 'WRITEV', 'MOVEG', 'STORE'):
+                defined = defined | {args[0]}
+            elif name == 'MOVEP' and args[0][:1] != '%':
+                defined = defined | {args[0]}
+            elif name == 'SWITCH':
+                defined, summary.kills = frozenset(), EVERYTHING
+            elif name == 'SIFT':
+                kills = frozenset(args) if args else EVERYTHING
+                defined, summary.kills = _kill(defined, kills), _union(summary.kills, kills)
+            elif name == 'DISPATCH':
+                kills = self.dispatch_kills()
+                defined, summary.kills = _kill(defined, kills), _union(summary.kills, kills)
+            elif name in ('OPTIMIZE', 'FLOWCMP', 'RELEASE'):
+                # Depths here are only right in a routine that owns its stack
+                if summary.resets is None:
+                    summary.resets = pc
+                if name == 'OPTIMIZE' and depth > 1:
+                    raise VerifyError("OPTIMIZE leaves a stack depth that depends on the values", pc)
+                depth = min(depth, 256) if name == 'FLOWCMP' else 0 if name == 'RELEASE' else depth
+
+            if name == 'JUMP':
+                flow(args[0], depth, defined)
+            elif name in ('JZ', 'JNZ'):
+                flow(args[0], depth, defined)
+                flow(pc + 1, depth, defined)
+            elif name == 'CALL':
+                callee = self.summaries.get(args[0])
+                if callee is None:
+                    continue    # not summarized yet: the fixed point comes back here
+                low = pop(pc, depth, args[1] if len(args) > 1 else 0)
+                pop(pc, low, callee.need)
+                summary.peak = max(summary.peak, low + callee.peak)
+                summary.kills = _union(summary.kills, callee.kills)
+                if callee.effect is not None:
+                    flow(pc + 1, low + callee.effect, _kill(defined, callee.kills) | callee.defines)
+            elif name == 'RET':
+                if summary.effect is None:
+                    summary.effect, summary.defines = depth, defined
+                elif summary.effect != depth:
+                    raise VerifyError(f"RET leaves {depth} values where another RET leaves {summary.effect}", pc)
+                else:
+                    summary.defines &= defined
+            elif name != 'END':
+                flow(pc + 1, depth, defined)
+        return summary, states
+
+    # Summaries of every routine, iterated until none changes
+    def summarize(self, entries):
+        limit = 2 * len(entries) + 4
+        for _ in range(limit):
+            changed = None
+            for entry in sorted(entries):
+                summary = self.walk(entry, frozenset())[0]
+                old = self.summaries.get(entry)
+                if old is None or old.key() != summary.key():
+                    self.summaries[entry] = summary
+                    changed = entry
+            if changed is None:
+                return
+        raise VerifyError("the stack grows without bound through recursive CALLs", changed)
+
+    # Walk each reachable routine with the names defined wherever it is entered
+    # and check its reads, slots and calls against that
+    def check(self, defined, called, roots):
+        bytecode, names = self.bytecode, self.names
+        context = {0: (frozenset(defined), 0)}   # entry -> (defined on entry, frame size)
+        walked, reads, max_depth = {}, 0, 0
+        work = [0]
+
+        def enter(target, defined, size):
+            old = context.get(target)
+            new = (defined, size) if old is None else (old[0] & defined, min(old[1], size))
+            if new != old:
+                context[target] = new
+                work.append(target)
+
+        while work:
+            entry = work.pop()
+            defined, size = context[entry]
+            summary, states = self.walk(entry, defined)
+            walked[entry] = (summary, states, size)
+            for pc, (depth, defined) in states.items():
+                if pc == len(bytecode):
+                    continue
+                opcode, args = bytecode[pc]
+                name = names[opcode]
+                if name == 'CALL':
+                    enter(args[0], defined, args[2] if len(args) > 1 else 0)
+                elif name == 'THREAD':
+                    enter(args[0], defined, args[1] if len(args) > 1 else 0)
+                elif name == 'DISPATCH':
+                    for target in self.queued:
+                        enter(target, defined, self.queue_size(target))
+
+        for entry, (summary, states, size) in walked.items():
+            if entry in roots:
+                if summary.need:
+                    raise VerifyError("pops an empty stack", summary.need_pc)
+                max_depth = max(max_depth, summary.peak)
+            if entry in called and summary.resets is not None:
+                raise VerifyError("a called function reshapes its caller's stack", summary.resets)
+            for pc, (depth, defined) in states.items():
+                if pc == len(bytecode):
+                    continue
+                opcode, args = bytecode[pc]
+                name = names[opcode]
+                if name in ('LOADL', 'STOREL', 'WRITEL') and args[0] >= size:
+                    raise VerifyError(f"{name} slot {args[0]} is outside a frame of {size}", pc)
+                for variable in self.reads(name, args):
+                    if variable not in defined:
+                        raise VerifyError(f"{variable} may be read before it is written", pc)
+                    reads += 1
+        return max_depth, len(walked), reads
+
+    def queue_size(self, target):
+        sizes = [args[2] if len(args) > 2 else 0 for opcode, args in self.bytecode
+                 if self.names[opcode] == 'QUEUE' and args[1] == target]
+        return min(sizes)
+
+    @staticmethod
+    def reads(name, args):
+        if name in ('READ', 'LOADG'):
+            return (args[0],)
+        if name in ('WRITEV', 'MOVEG'):
+            return (args[1],)
+        if name == 'WRITE' and len(args) > 1 and _source(args[1]) is not None:
+            return (args[1],)
+        if name == 'MOVEP' and args[1][:1] != '%' and _source(args[1]) is not None:
+            return (args[1],)
+        return ()
+
+    # READ and variable copies index the page directly once their names are proved
+    def fast_form(self):
+        ops, names = self.ops, self.names
+        out = []
+        for opcode, args in self.bytecode:
+            name = names[opcode]
+            if name == 'READ':
+                out.append((ops['LOADG'], args))
+            elif name == 'WRITEV' or (name == 'WRITE' and len(args) > 1 and _source(args[1]) is not None):
+                out.append((ops['MOVEG'], [args[0], args[1]]))
+            else:
+                out.append((opcode, args))
+        return out
+
+
+# Verify advanced bytecode; `defined` names the page variables the host sets
+# before the run. Returns a Verification, or raises VerifyError.
+def verify(bytecode, ops=advanced_instruction_set, defined=()):
+    verifier = _Verifier(list(bytecode), ops)
+    verifier.check_shapes()
+    called, roots = verifier.entries()
+    verifier.summarize(called | roots)
+    max_depth, routines, reads = verifier.check(defined, called, roots)
+    return Verification(verifier.fast_form(), max_depth, routines, reads)
@@ -0,0 +1,197 @@
+# msx daemon - long-running VM host on a UNIX socket
+#
+#   msx daemon --socket /tmp/msx.sock [--workers N] [--tiers full,advanced]
+#   msx run script.synth --daemon /tmp/msx.sock
+#
+# A short script spends most of a fresh "msx run" on interpreter start-up,
+# imports and VM construction. The daemon pays those once: the tiers it serves
+# are imported at start, each gets a VMPool that is filled up front, and
+# released VMs are reset() in place rather than rebuilt. Compiled programs stay
+# in a ProgramCache and can be run again by id.
+#
+# The protocol is one JSON object per line in each direction:
+#
+#   {"op": "compile", "tier": "full", "source": [lines]}  -> {"ok": true, "program": id, ...}
+#   {"op": "run", "tier": "full", "source": [lines]}      -> {"ok": true, "output": "...", ...}
+#   {"op": "run", "program": id}
+#   {"op": "stats"}
+#
+# `workers` bounds how many runs execute at once across all tiers; each tier's
+# pool holds that many VMs, so a run never waits on a pool once it holds a slot.
+# A socket already at the path is only replaced when no daemon answers on it.
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+
+from .compiler.cache import ProgramCache
+from .tiers import DEFAULT_TIER, SERVED_TIERS, load_tier
+from .vm.pool import VMPool
+
+DEFAULT_SOCKET = "/tmp/msx.sock"
+DEFAULT_WORKERS = 4
+RUN_TIMEOUT = 10.0     # seconds before a run is stopped
+
+
+class DaemonError(Exception):
+    pass
+
+
+# Remove a socket left behind by a daemon that has exited. Anything else at the
+# path - a regular file, or the socket of a daemon still accepting - is in use.
+def remove_stale_socket(path):
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise DaemonError(f"{path} is in use and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    except OSError as e:
+        raise DaemonError(f"{path} is in use: {e.strerror or e}")
+    finally:
+        probe.close()
+    raise DaemonError(f"{path} is in use by a running daemon")
+
+
+class VMDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path=DEFAULT_SOCKET, workers=DEFAULT_WORKERS, tiers=SERVED_TIERS, timeout=RUN_TIMEOUT):
+        for tier in tiers:
+            if tier not in SERVED_TIERS:
+                raise ValueError(f"tier '{tier}' cannot be served (choose from {', '.join(SERVED_TIERS)})")
+        self.path = path
+        self.workers = workers
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(workers)
+        self.cache = ProgramCache()
+        self.compilers = {}
+        self.pools = {}
+        for tier in tiers:
+            compile_fn, vm_class, _ = load_tier(tier)
+            self.compilers[tier] = compile_fn
+            self.pools[tier] = pool = VMPool(vm_class, workers)
+            pool.release(pool.acquire())  # build one VM per tier up front
+        self.requests = 0
+        remove_stale_socket(path)
+        super().__init__(path, DaemonHandler)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            remove_stale_socket(self.path)
+        except DaemonError:
+            pass  # something else took the path over; leave it alone
+
+    def handle_request_message(self, message):
+        self.requests += 1
+        op = message.get("op")
+        if op == "stats":
+            return {"ok": True, "requests": self.requests, "workers": self.workers, "cache": self.cache.stats(),
+                    "pools": {tier: pool.stats() for tier, pool in self.pools.items()}}
+        if op not in ("compile", "run"):
+            raise DaemonError(f"unknown op: {op!r}")
+        start = time.perf_counter()
+        if "program" in message:
+            entry = self.cache.lookup(message["program"])
+            if entry is None:
+                raise DaemonError(f"unknown program {message['program']} (compile it again)")
+            (tier, bytecode), key, cached = entry, message["program"], True
+        else:
+            tier = message.get("tier", DEFAULT_TIER)
+            if tier not in self.compilers:
+                raise DaemonError(f"tier '{tier}' is not served here (serving {', '.join(self.compilers)})")
+            bytecode, key, cached = self.cache.compile(tier, message.get("source", []), self.compilers[tier])
+        reply = {"ok": True, "program": key, "tier": tier, "instructions": len(bytecode), "cached": cached,
+                 "compile_ms": (time.perf_counter() - start) * 1000}
+        if op == "run":
+            reply.update(self.run(tier, bytecode))
+        return reply
+
+    def run(self, tier, bytecode):
+        with self.slots:
+            pool = self.pools[tier]
+            vm = pool.acquire()
+            out = vm.out = io.StringIO()
+            expired = threading.Event()
+            timer = threading.Timer(self.timeout, lambda: (expired.set(), vm.stop()))
+            timer.start()
+            start = time.perf_counter()
+            try:
+                vm.execute(list(bytecode))
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                timer.cancel()
+                pool.release(vm)
+        result = {"output": out.getvalue(), "run_ms": (time.perf_counter() - start) * 1000,
+                  "timed_out": expired.is_set()}
+        if error:
+            result["error"] = error
+        return result
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = self.server.handle_request_message(json.loads(line))
+            except (DaemonError, ValueError, TypeError, KeyError) as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+def serve(path=DEFAULT_SOCKET, workers=DEFAULT_WORKERS, tiers=SERVED_TIERS):
+    daemon = VMDaemon(path, workers, tiers)
+    try:
+        daemon.serve_forever()
+    finally:
+        daemon.server_close()
+
+
+# --- Client ---
+
+class DaemonClient:
+    def __init__(self, path=DEFAULT_SOCKET):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(path)
+        except OSError as e:
+            self.sock.close()
+            raise DaemonError(f"cannot connect to {path}: {e.strerror or e}")
+        self.file = self.sock.makefile("rwb")
+
+    def request(self, message):
+        self.file.write(json.dumps(message).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise DaemonError("daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error", "request failed"))
+        return reply
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,24 @@
+# Tk front ends. Each editor module imports tkinter itself, so nothing here is
+# loaded until an editor is actually requested.
+import importlib
+
+_LAZY = {
+    "ModuSynthX_App": (".app", "ModuSynthX_App"),
+    "GridModel": (".grid", "GridModel"),
+    "VirtualGrid": (".grid", "VirtualGrid"),
+    "ScriptRunner": (".runner", "ScriptRunner"),
+    "launch_app": (".app", "launch_app"),
+    "launch_editor": (".editor", "launch_editor"),
+    "launch_advanced_editor": (".advanced_editor", "launch_advanced_editor"),
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _LAZY[name]
+    value = getattr(importlib.import_module(module, __name__), attr)
+    globals()[name] = value
+    return value
@@ -0,0 +1,16 @@
+# python -m modusynthx.gui [app|editor|advanced]
+import sys
+
+from . import launch_advanced_editor, launch_app, launch_editor
+
+LAUNCHERS = {
+    "app": launch_app,
+    "editor": launch_editor,
+    "advanced": launch_advanced_editor,
+}
+
+if __name__ == '__main__':
+    choice = sys.argv[1] if len(sys.argv) > 1 else "editor"
+    if choice not in LAUNCHERS:
+        sys.exit(f"usage: python -m modusynthx.gui [{'|'.join(LAUNCHERS)}]")
+    LAUNCHERS[choice]()
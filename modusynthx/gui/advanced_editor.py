@@ -0,0 +1,37 @@
+import tkinter as tk
+
+from ..compiler.paged import compile_script
+from ..vm.paged_vm import AdvancedVM
+from .runner import ScriptRunner
+
+
+def launch_advanced_editor():
+    root = tk.Tk()
+    root.title("ModuSynthX Advanced Editor")
+    root.geometry("1000x700")
+
+    status = tk.StringVar(value="ready")
+    tk.Label(root, textvariable=status, anchor="w").pack(side="bottom", fill="x")
+
+    buttons = tk.Frame(root)
+    buttons.pack(side="bottom")
+
+    output = tk.Text(root, font=("Courier", 10), height=10, state="disabled")
+    output.pack(side="bottom", fill="x")
+
+    text_area = tk.Text(root, font=("Courier", 12), wrap="none")
+    text_area.pack(expand=True, fill="both")
+
+    # Compile and run on the runner's worker; output reaches the pane through pump()
+    runner = ScriptRunner()
+    runner.pump(root, output, status)
+
+    def run_code():
+        script = text_area.get("1.0", tk.END).strip().split("\n")
+        runner.submit(compile_script, script, AdvancedVM)
+
+    tk.Button(buttons, text="Compile & Run", command=run_code).pack(side="left")
+    tk.Button(buttons, text="Stop", command=runner.cancel).pack(side="left")
+
+    root.mainloop()
+    runner.shutdown()
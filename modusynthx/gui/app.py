@@ -0,0 +1,72 @@
+# GUI App with Tkinter Drag-and-Drop Editor
+import tkinter as tk
+
+from ..compiler.clv import clv_compile
+from ..compiler.incremental import IncrementalCompiler
+from ..vm.threaded_vm import ModuSynthX_VM
+from .grid import GridModel, VirtualGrid
+from .runner import ScriptRunner
+
+
+class ModuSynthX_App:
+    def __init__(self, master, grid_size=8, rows=None, cols=None):
+        self.master = master
+        self.master.title("ModuSynthX Visual Compiler")
+        self.vm = ModuSynthX_VM()
+        self.grid_size = grid_size
+        self.dirty = set()  # rows edited since the last compile
+        self.model = GridModel(rows or grid_size, cols or grid_size)
+        self.model.listeners.append(lambda x, y: self.dirty.add(y))
+        self.compiler = IncrementalCompiler(clv_compile)
+        self.runner = ScriptRunner()  # one worker; a new run cancels the previous one
+        self.status = tk.StringVar(master, value="ready")
+        self.build_interface()
+        self.runner.pump(self.master, status=self.status)
+
+    def build_interface(self):
+        self.canvas = tk.Canvas(self.master, width=800, height=600, bg='black')
+        self.canvas.pack()
+
+        # Only the cells in view are drawn, so the sheet can be far larger than the window
+        self.grid_view = VirtualGrid(self.canvas, self.model)
+        self.grid_view.place(x=50, y=50, width=720, height=530)
+
+        self.run_button = tk.Button(self.master, text="Compile & Run", command=self.run_script, bg='purple', fg='white')
+        self.run_button.place(x=50, y=20)
+
+        self.stop_button = tk.Button(self.master, text="Stop", command=self.runner.cancel, bg='red', fg='white')
+        self.stop_button.place(x=200, y=20)
+
+        self.status_label = tk.Label(self.master, textvariable=self.status, bg='black', fg='lime')
+        self.status_label.place(x=260, y=22)
+
+    def row_text(self, y):
+        return self.model.row_text(y)
+
+    def get_script_from_grid(self):
+        script = []
+        for y in self.model.used_rows():
+            line = self.row_text(y)
+            if line:
+                script.append(line)
+        return script
+
+    # Recompile only the rows edited since the last call; returns the cached bytecode
+    def compile_grid(self):
+        self.grid_view.commit()
+        for y in sorted(self.dirty):
+            self.compiler.update(y, self.row_text(y))
+        self.dirty.clear()
+        return self.compiler.bytecode
+
+    def run_script(self):
+        # The VM gets a snapshot, so later edits can patch the cache while it runs
+        bytecode = list(self.compile_grid())
+        self.runner.submit(lambda code: code, bytecode, lambda: self.vm)
+
+
+def launch_app(rows=None, cols=None):
+    root = tk.Tk()
+    app = ModuSynthX_App(root, rows=rows, cols=cols)
+    root.mainloop()
+    app.runner.shutdown()
@@ -0,0 +1,208 @@
+# Virtualized cell grid for the Tk editor
+#
+# GridModel is the backing store: a sparse {row: {column: text}} map, so a
+# 500x500 sheet costs memory only for the cells that hold text. VirtualGrid
+# draws it on a Canvas, creating rectangle/text items only for the cells in
+# view and recycling them as the view scrolls, and edits a cell by placing one
+# pooled Entry over it. Widget and item counts depend on the window size, not on
+# the size of the sheet.
+import tkinter as tk
+
+
+class GridModel:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.data = {}        # row -> {column: text}, non-empty cells only
+        self.listeners = []   # called as listener(x, y) after a cell changes
+
+    def get(self, x, y):
+        return self.data.get(y, {}).get(x, "")
+
+    def set(self, x, y, text):
+        if text == self.get(x, y):
+            return
+        row = self.data.setdefault(y, {})
+        if text:
+            row[x] = text
+        else:
+            row.pop(x, None)
+            if not row:
+                del self.data[y]
+        for listener in self.listeners:
+            listener(x, y)
+
+    def row_text(self, y):
+        row = self.data.get(y)
+        if not row:
+            return ""
+        return " ".join(v for v in (row[x].strip() for x in sorted(row)) if v)
+
+    def used_rows(self):
+        return sorted(self.data)
+
+
+class VirtualGrid(tk.Frame):
+    def __init__(self, master, model, cell_width=150, cell_height=24, bg='black', fg='lime'):
+        super().__init__(master, bg=bg)
+        self.model = model
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.fg = fg
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.vbar = tk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.hbar = tk.Scrollbar(self, orient='horizontal', command=self.xview)
+        self.canvas.configure(yscrollcommand=self.vbar.set, xscrollcommand=self.hbar.set,
+                              scrollregion=(0, 0, model.cols * cell_width, model.rows * cell_height),
+                              xscrollincrement=cell_width, yscrollincrement=cell_height)
+        self.canvas.grid(row=0, column=0, sticky='nsew')
+        self.vbar.grid(row=0, column=1, sticky='ns')
+        self.hbar.grid(row=1, column=0, sticky='ew')
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.items = {}       # (x, y) -> (rect, text) items currently drawn
+        self.free = []        # hidden item pairs ready for reuse
+        self.editors = []     # idle Entry widgets
+        self.editing = None   # (x, y, entry, window item)
+        self._pending = None
+
+        self.canvas.bind('<Configure>', lambda e: self.schedule())
+        self.canvas.bind('<Button-1>', self._click)
+        self.canvas.bind('<MouseWheel>', self._wheel)
+        self.canvas.bind('<Button-4>', lambda e: self.yview('scroll', -3, 'units'))
+        self.canvas.bind('<Button-5>', lambda e: self.yview('scroll', 3, 'units'))
+        model.listeners.append(self._cell_changed)
+
+    # --- Scrolling ---
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.schedule()
+
+    def xview(self, *args):
+        self.canvas.xview(*args)
+        self.schedule()
+
+    def _wheel(self, event):
+        self.yview('scroll', -1 if event.delta > 0 else 1, 'units')
+
+    # Scroll just enough to bring a cell into view
+    def see(self, x, y):
+        left, top, width, height = self._viewport()
+        if x * self.cell_width < left or (x + 1) * self.cell_width > left + width:
+            self.canvas.xview_moveto(x / self.model.cols)
+        if y * self.cell_height < top or (y + 1) * self.cell_height > top + height:
+            self.canvas.yview_moveto(y / self.model.rows)
+        self.schedule()
+
+    # --- Drawing ---
+
+    def schedule(self):
+        # Coalesce bursts of scroll/resize events into one redraw
+        if self._pending is None:
+            self._pending = self.after_idle(self.redraw)
+
+    def _viewport(self):
+        return (self.canvas.canvasx(0), self.canvas.canvasy(0),
+                self.canvas.winfo_width(), self.canvas.winfo_height())
+
+    def visible(self):
+        left, top, width, height = self._viewport()
+        cols = range(max(0, int(left // self.cell_width)),
+                     min(self.model.cols, int((left + width) // self.cell_width) + 1))
+        rows = range(max(0, int(top // self.cell_height)),
+                     min(self.model.rows, int((top + height) // self.cell_height) + 1))
+        return cols, rows
+
+    def redraw(self):
+        self._pending = None
+        cols, rows = self.visible()
+        wanted = {(x, y) for y in rows for x in cols}
+        for key in [key for key in self.items if key not in wanted]:
+            pair = self.items.pop(key)
+            for item in pair:
+                self.canvas.itemconfigure(item, state='hidden')
+            self.free.append(pair)
+        for key in wanted:
+            if key not in self.items:
+                self.items[key] = self._draw(*key)
+
+    def _draw(self, x, y):
+        x0, y0 = x * self.cell_width, y * self.cell_height
+        x1, y1 = x0 + self.cell_width - 2, y0 + self.cell_height - 2
+        if self.free:
+            rect, text = self.free.pop()
+            self.canvas.coords(rect, x0, y0, x1, y1)
+            self.canvas.coords(text, x0 + 4, y0 + self.cell_height // 2)
+            self.canvas.itemconfigure(rect, state='normal')
+            self.canvas.itemconfigure(text, state='normal', text=self.model.get(x, y))
+        else:
+            rect = self.canvas.create_rectangle(x0, y0, x1, y1, outline='white', fill='black')
+            text = self.canvas.create_text(x0 + 4, y0 + self.cell_height // 2, anchor='w', fill=self.fg,
+                                           text=self.model.get(x, y), font=('Courier', 10))
+        return rect, text
+
+    def _cell_changed(self, x, y):
+        pair = self.items.get((x, y))
+        if pair is not None:
+            self.canvas.itemconfigure(pair[1], text=self.model.get(x, y))
+
+    # --- Editing ---
+
+    def _click(self, event):
+        x = int(self.canvas.canvasx(event.x) // self.cell_width)
+        y = int(self.canvas.canvasy(event.y) // self.cell_height)
+        if 0 <= x < self.model.cols and 0 <= y < self.model.rows:
+            self.edit(x, y)
+
+    def edit(self, x, y):
+        self.commit()
+        self.see(x, y)
+        entry = self.editors.pop() if self.editors else self._new_editor()
+        entry.delete(0, tk.END)
+        entry.insert(0, self.model.get(x, y))
+        window = self.canvas.create_window(x * self.cell_width, y * self.cell_height, window=entry,
+                                           anchor='nw', width=self.cell_width - 2,
+                                           height=self.cell_height - 2)
+        self.editing = (x, y, entry, window)
+        entry.focus_set()
+
+    def _new_editor(self):
+        entry = tk.Entry(self.canvas, bg='black', fg=self.fg, insertbackground=self.fg)
+        entry.bind('<Return>', lambda e: self._move(0, 1))
+        entry.bind('<Tab>', lambda e: self._move(1, 0))
+        entry.bind('<Shift-Tab>', lambda e: self._move(-1, 0))
+        entry.bind('<Escape>', lambda e: self.commit(save=False))
+        entry.bind('<FocusOut>', self._focus_out)
+        return entry
+
+    def _focus_out(self, event):
+        # Ignore a stale FocusOut from a pooled Entry that has since been reopened
+        if self.editing is not None and self.editing[2] is event.widget \
+                and event.widget.focus_get() is not event.widget:
+            self.commit()
+
+    def _move(self, dx, dy):
+        if self.editing is None:
+            return 'break'
+        x, y = self.editing[0] + dx, self.editing[1] + dy
+        if dx and not 0 <= x < self.model.cols:
+            x, y = (0, y + 1) if dx > 0 else (self.model.cols - 1, y - 1)
+        if 0 <= y < self.model.rows:
+            self.edit(x, y)
+        else:
+            self.commit()
+        return 'break'
+
+    # Store the open editor's text (unless cancelled) and return it to the pool
+    def commit(self, save=True):
+        if self.editing is None:
+            return
+        x, y, entry, window = self.editing
+        self.editing = None
+        if save:
+            self.model.set(x, y, entry.get())
+        self.canvas.delete(window)
+        self.editors.append(entry)
+        self.canvas.focus_set()
@@ -0,0 +1,133 @@
+# Background script execution for the Tk editors
+#
+# ScriptRunner owns one worker thread. submit() hands it a job (compile + run)
+# and cancels whatever was running; the worker never touches Tk. The VM's PRINT
+# output and status changes go into an event queue, and pump() drains that
+# queue on the Tk thread with after(): at most one widget update per interval,
+# with each tick's output joined into a single insert.
+import queue
+import threading
+import time
+import tkinter as tk
+
+DRAIN_INTERVAL_MS = 50       # ~20 UI updates per second at most
+DRAIN_LIMIT = 2000           # events handled per tick; the rest wait for the next one
+OUTPUT_MAX_LINES = 5000      # older output is trimmed from the widget
+
+
+class QueueWriter:
+    """File-like PRINT target that forwards text to the runner's event queue."""
+
+    def __init__(self, events, job):
+        self.events = events
+        self.job = job
+
+    def write(self, text):
+        if text:
+            self.events.put((self.job, 'output', text))
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class ScriptRunner:
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()
+        self.job = 0              # id of the latest submitted job
+        self.vm = None            # VM of the running job
+        self.stopped = False      # set when the running job is cancelled
+        self.lock = threading.Lock()
+        self.worker = None
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self._work, name="msx-runner", daemon=True)
+            self.worker.start()
+
+    # Queue a run; any job still running or waiting is cancelled
+    def submit(self, compile_fn, source, vm_factory):
+        with self.lock:
+            self.job += 1
+            job = self.job
+        self.cancel()
+        self._ensure_worker()
+        self.jobs.put((job, compile_fn, source, vm_factory))
+        return job
+
+    def cancel(self):
+        with self.lock:
+            if self.vm is not None:
+                self.stopped = True
+                self.vm.stop()
+
+    def shutdown(self):
+        self.cancel()
+        self.jobs.put(None)
+
+    def busy(self):
+        return self.vm is not None
+
+    def _work(self):
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                return
+            job, compile_fn, source, vm_factory = item
+            if job != self.job:
+                continue  # superseded before it started
+            self.events.put((job, 'status', 'compiling'))
+            start = time.perf_counter()
+            try:
+                bytecode = compile_fn(source)
+                vm = vm_factory()
+                vm.out = QueueWriter(self.events, job)
+                with self.lock:
+                    if job != self.job:
+                        continue
+                    self.vm = vm
+                    self.stopped = False
+                self.events.put((job, 'status', f'running {len(bytecode)} instructions'))
+                vm.execute(bytecode)
+                elapsed = (time.perf_counter() - start) * 1000
+                state = 'stopped' if self.stopped else 'finished'
+                self.events.put((job, 'status', f"{state} in {elapsed:.1f} ms"))
+            except Exception as e:
+                self.events.put((job, 'error', f"{type(e).__name__}: {e}"))
+            finally:
+                with self.lock:
+                    self.vm = None
+
+    # Drain up to `limit` events; returns (output text, last status or error)
+    def drain(self, limit=DRAIN_LIMIT):
+        chunks, status = [], None
+        for _ in range(limit):
+            try:
+                job, kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'output':
+                chunks.append(payload)
+            elif kind == 'status':
+                status = payload
+            else:
+                status = f"error: {payload}"
+        return "".join(chunks), status
+
+    # Start the Tk-side drain loop that feeds an output Text widget and a status variable
+    def pump(self, widget, output=None, status=None, interval=DRAIN_INTERVAL_MS):
+        def tick():
+            text, state = self.drain()
+            if text and output is not None:
+                output.configure(state='normal')
+                output.insert(tk.END, text)
+                lines = int(output.index('end-1c').split('.')[0])
+                if lines > OUTPUT_MAX_LINES:
+                    output.delete('1.0', f'{lines - OUTPUT_MAX_LINES}.0')
+                output.see(tk.END)
+                output.configure(state='disabled')
+            if state is not None and status is not None:
+                status.set(state)
+            widget.after(interval, tick)
+        widget.after(interval, tick)
@@ -0,0 +1,167 @@
+# ModuSynthX opcode tables shared by the compilers and VMs
+
+# GM (Grid Machine) bytecode instructions
+gm_bytecode_instructions = {
+    "MODSET": "0x01",       # Apply modifier to next instruction
+    "WRITEOUT": "0x02",     # Output to system or user space
+    "ALLOCREG": "0x03",     # Allocate virtual register/memory
+    "LINK": "0x04",         # Link modules or contexts
+    "FLOWCMP": "0x05",      # Compress execution flow
+    "RELEASE": "0x06",      # Release compressed flow
+    "PING": "0x07",         # Error correction trigger
+    "SIFT": "0x08",         # Garbage sifting and cleanup
+    "INFER": "0x09",        # Trigger contextual inference
+    "TRIGGER": "0x0A",      # Explicit trigger execution
+    "PAUSE": "0x0B",        # Execution pause
+    "END": "0x0C"           # End of block/script
+}
+
+# ModuSynthX VM bytecode opcodes
+vm_bytecode = {
+    "MODSET": "MSX_01",       # Apply modifier
+    "WRITEOUT": "MSX_02",     # Output to system object
+    "ALLOCREG": "MSX_03",     # Allocate virtual memory/register
+    "LINK": "MSX_04",         # Link contexts/modules
+    "FLOWCMP": "MSX_05",      # Compress execution flow
+    "RELEASE": "MSX_06",      # Release flow
+    "PING": "MSX_07",         # Ping for error correction
+    "SIFT": "MSX_08",         # Sift memory garbage
+    "INFER": "MSX_09",        # Inference-based execution
+    "TRIGGER": "MSX_0A",      # Trigger module
+    "PAUSE": "MSX_0B",        # Pause
+    "END": "MSX_FF"           # End script
+}
+
+# Instruction set of the dict-driven ModuSynthXVM
+MSX_INSTRUCTION_SET = {
+    "MODSET": "MSX_01",   # Modifier application
+    "WRITEOUT": "MSX_02", # Write output
+    "INFER": "MSX_09",    # AI inference call
+    "PING": "MSX_07",     # Error correction
+    "FLOWCMP": "MSX_05",  # Memory compression flow
+    "RELEASE": "MSX_06",  # Memory release flow
+    "SIFT": "MSX_08",     # Garbage collection
+    "PAUSE": "MSX_0B",    # Pause execution
+    "END": "MSX_FF"       # End script
+}
+
+# Instruction set of compile_script / the basic ModuSynthX_VM
+BASIC_INSTRUCTION_SET = {
+    'OPTIMIZE': 0x01,
+    'INFER': 0x09,
+    'PING': 0x07,
+    'FLOWCMP': 0x05,
+    'SIFT': 0x08,
+    'RELEASE': 0x06,
+    'PAUSE': 0x0B,
+    'END': 0xFF
+}
+
+# Instruction set of clv_compile / the threaded ModuSynthX_VM
+CLV_INSTRUCTION_SET = {
+    **BASIC_INSTRUCTION_SET,
+    'WRITE': 0x10,
+    'READ': 0x11
+}
+
+MODIFIER_SET = {
+    'quick': 'OPTIMIZE',
+    'auto': 'PING',
+    'active': 'FLOWCMP',
+    'soft': 'SIFT',
+    'high_load': 'RELEASE'
+}
+
+# Execution policy selected by a statement's modifier on the advanced tier
+# (see vm/policy.py); modifiers not listed inherit their block's policy
+MODIFIER_POLICY = {
+    'quick': 'optimized',
+    'fast': 'optimized',
+    'lowpower': 'lowpower',
+    'idle': 'lowpower',
+    'heavy': 'heavy'
+}
+
+# Limits a flow.<setting> statement can adjust (see vm/flow.py)
+FLOW_SETTINGS = ('quantum', 'rate', 'burst', 'deadline', 'unlimited')
+
+# Extended instruction set (FullVM / full_clv_compile)
+extended_instruction_set = {
+    'OPTIMIZE': 0x01,
+    'INFER': 0x09,
+    'PING': 0x07,
+    'FLOWCMP': 0x05,
+    'SIFT': 0x08,
+    'RELEASE': 0x06,
+    'PAUSE': 0x0B,
+    'END': 0xFF,
+    'WRITE': 0x10,
+    'READ': 0x11,
+    'ADD': 0x12,
+    'SUB': 0x13,
+    'MUL': 0x14,
+    'DIV': 0x15,
+    'MOD': 0x16,
+    'JUMP': 0x17,
+    'JZ': 0x18,
+    'JNZ': 0x19,
+    'PRINT': 0x1A,
+    'LABEL': 0x1B,
+    'STORE': 0x1C,      # Pop stack top into a variable
+    'WRITEK': 0x1D,     # Write a compile-time decoded constant
+    'WRITEV': 0x1E,     # Copy one variable into another
+    'ADD_I': 0x50,      # Type-specialized arithmetic (int operands)
+    'SUB_I': 0x51,
+    'MUL_I': 0x52,
+    'DIV_I': 0x53,
+    'MOD_I': 0x54,
+    'ADD_F': 0x58,      # Type-specialized arithmetic (float / mixed numeric operands)
+    'SUB_F': 0x59,
+    'MUL_F': 0x5A,
+    'DIV_F': 0x5B,
+    'MOD_F': 0x5C
+}
+
+# Advanced instruction set (AdvancedVM / advanced_clv_compile)
+advanced_instruction_set = {
+    **extended_instruction_set,
+    'FUNC': 0x20,
+    'CALL': 0x21,
+    'RET': 0x22,
+    'DEFINE': 0x23,
+    'TYPE': 0x24,
+    'MACRO': 0x25,
+    'THREAD': 0x26,
+    'JOIN': 0x27,
+    'PAGE': 0x28,
+    'SWITCH': 0x29,
+    'QUEUE': 0x2A,
+    'DISPATCH': 0x2B,
+    'LOCAL': 0x2C,      # Declare function locals (compile time only)
+    'LOADL': 0x2D,      # Push a local slot of the current call frame
+    'STOREL': 0x2E,     # Pop stack top into a local slot
+    'WRITEL': 0x2F,     # Write a compile-time decoded constant into a local slot
+    'LOADP': 0x60,      # Push a % (persistent) variable
+    'STOREP': 0x61,     # Pop stack top into a % variable
+    'WRITEP': 0x62,     # Write a compile-time decoded constant into a % variable
+    'MOVEP': 0x63,      # Copy between variables when either side is a % variable
+    'MODE': 0x64,       # Switch the execution policy: MODE policy modifier
+    'FLOW': 0x65,       # Adjust flow limits: FLOW quantum|rate|burst|deadline|unlimited [value]
+    'LOADG': 0x66,      # READ of a page variable verified to be defined (compiler/verifier.py)
+    'MOVEG': 0x67       # WRITEV whose source is verified to be defined
+}
+
+# Instruction set of the page-managed VM (gui/advanced_editor.py project)
+paged_instruction_set = {
+    'FUNC': 0x30,
+    'CALL': 0x31,
+    'RET': 0x32,
+    'MACRO': 0x33,
+    'DEFINE': 0x34,
+    'THREAD': 0x40,
+    'TYPE': 0x35,
+    'END': 0xFF,
+    'ADD': 0x12,
+    'SUB': 0x13,
+    'PRINT': 0x1A,
+}
@@ -0,0 +1,352 @@
+# msx serve - local execution server for VisualEditor.html
+#
+#   GET  /            the editor page
+#   GET  /ws          WebSocket: row diffs in, compile/run results streamed out
+#   POST /rows        the same exchange as one JSON request/response
+#   GET  /stats       cache and VM pool counters
+#
+# The page keeps a table of (Modifier, Command, Scope, Target, Value) rows and
+# sends only the rows that changed:
+#
+#   {"type": "rows", "count": 12, "rows": {"3": ["quick", "write", "on", "x", "5"]}, "run": true}
+#
+# Each connection has a Session holding the rows and their compiled form. For
+# tiers whose instructions depend only on their own line, an IncrementalCompiler
+# recompiles just the changed rows; other tiers recompile the program, looking it
+# up first in a server-wide cache keyed by its source lines. Runs borrow a VM
+# from a per-tier VMPool, and PRINT output is streamed back as it is produced.
+# Standard library only; the WebSocket framing (RFC 6455) is implemented here.
+#
+# A source the compiler rejects is a 400 on /rows and an {"type": "error"}
+# message on the WebSocket. Requests that carry an Origin must come from the
+# page this server hands out, and /rows only takes application/json, so another
+# site open in the browser cannot post rows and run them. The Host header must
+# name the server by a loopback name or its bound address, so a site whose DNS
+# name is rebound to 127.0.0.1 is not treated as that page.
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from .compiler.cache import ProgramCache
+from .compiler.incremental import IncrementalCompiler
+from .tiers import SERVED_TIERS, load_tier
+from .vm.pool import VMPool
+
+DEFAULT_PORT = 8765
+DEFAULT_TIER = "full"
+DEFAULT_POOL = 4           # VMs per tier, and so concurrent runs per tier
+LINE_LOCAL_TIERS = ("threaded",)   # no labels: each line compiles on its own
+RUN_TIMEOUT = 5.0          # seconds before a run is stopped
+OUTPUT_CHUNK = 4096        # characters buffered before an output message is sent
+MAX_MESSAGE = 1 << 22      # bytes in one WebSocket message, all its frames together
+PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "VisualEditor.html")
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+
+
+# The table's Scope column ("on", "for", ...) is a natural-language modifier
+# that the CLV tiers have no instruction for, so it is not compiled.
+def row_line(cells):
+    modifier, command, _, target, value = (list(cells) + [""] * 5)[:5]
+    return " ".join(str(cell).strip() for cell in (modifier, command, target, value) if str(cell).strip())
+
+
+class Session:
+    def __init__(self, tier, cache):
+        if tier not in SERVED_TIERS:
+            raise ValueError(f"tier '{tier}' cannot be served (choose from {', '.join(SERVED_TIERS)})")
+        self.tier = tier
+        self.cache = cache
+        self.compile_fn, _, _ = load_tier(tier)
+        self.lines = []
+        self.compiler = IncrementalCompiler(self.compile_fn) if tier in LINE_LOCAL_TIERS else None
+        self.bytecode = None      # compiled program, None after an edit
+
+    # Same rows, compiled for another tier
+    def retarget(self, tier):
+        session = Session(tier, self.cache)
+        for row, line in enumerate(self.lines):
+            session.lines.append(line)
+            if session.compiler is not None:
+                session.compiler.update(row, line)
+        return session
+
+    # Apply a {"count": n, "rows": {index: cells}} diff; returns the rows changed
+    def apply(self, diff):
+        changed = 0
+        count = diff.get("count", len(self.lines))
+        if count < len(self.lines):
+            for row in range(count, len(self.lines)):
+                changed += self._set(row, "")
+            del self.lines[count:]
+        for key, cells in diff.get("rows", {}).items():
+            row = int(key)
+            if 0 <= row < count:
+                while len(self.lines) <= row:
+                    self.lines.append("")
+                changed += self._set(row, row_line(cells))
+        return changed
+
+    def _set(self, row, line):
+        if row < len(self.lines) and self.lines[row] == line:
+            return 0
+        if self.compiler is not None:
+            self.compiler.update(row, line)  # first, so a row that fails to compile stays unchanged
+        if row < len(self.lines):
+            self.lines[row] = line
+        self.bytecode = None
+        return 1
+
+    # Returns (bytecode, cached)
+    def compile(self):
+        if self.compiler is not None:
+            cached = self.bytecode is not None
+            self.bytecode = self.compiler.bytecode
+            return self.bytecode, cached
+        if self.bytecode is not None:
+            return self.bytecode, True
+        self.bytecode, cached = self.cache.get(self.tier, [line for line in self.lines if line], self.compile_fn)
+        return self.bytecode, cached
+
+
+class OutputStream:
+    """File-like PRINT target that forwards output in chunks through `send`."""
+
+    def __init__(self, send):
+        self.send = send
+        self.buffer = []
+        self.size = 0
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= OUTPUT_CHUNK:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            text = "".join(self.buffer)
+            self.buffer, self.size = [], 0
+            self.send({"type": "output", "text": text})
+
+
+class ExecutionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, tier=DEFAULT_TIER, pool_size=DEFAULT_POOL, page=PAGE, timeout=RUN_TIMEOUT):
+        Session(tier, None)  # reject unservable tiers before binding
+        super().__init__(address, RequestHandler)
+        host, port = self.server_address[:2]
+        names = LOOPBACK_HOSTS + ((host,) if host not in ("0.0.0.0", "") else ())
+        self.hosts = {f"{name}:{port}" for name in names} | (set(names) if port == 80 else set())
+        self.tier = tier
+        self.page = page
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.cache = ProgramCache()
+        self.pools = {}
+        self.pools_lock = threading.Lock()
+
+    def pool(self, tier):
+        with self.pools_lock:
+            pool = self.pools.get(tier)
+            if pool is None:
+                _, vm_class, _ = load_tier(tier)
+                pool = self.pools[tier] = VMPool(vm_class, self.pool_size)
+            return pool
+
+    # Handle one message from a client; results go through send(message)
+    def handle_message(self, session, message, send):
+        start = time.perf_counter()
+        changed = session.apply(message)
+        bytecode, cached = session.compile()
+        compile_ms = (time.perf_counter() - start) * 1000
+        send({"type": "compiled", "changed": changed, "instructions": len(bytecode),
+              "cached": cached, "compile_ms": compile_ms})
+        if message.get("run"):
+            self.run(session.tier, bytecode, send)
+
+    def run(self, tier, bytecode, send):
+        pool = self.pool(tier)
+        vm = pool.acquire(self.timeout)
+        out = OutputStream(send)
+        vm.out = out
+        expired = threading.Event()
+        timer = threading.Timer(self.timeout, lambda: (expired.set(), vm.stop()))
+        timer.start()
+        start = time.perf_counter()
+        try:
+            vm.execute(list(bytecode))
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            timer.cancel()
+            pool.release(vm)
+        out.flush()
+        result = {"type": "done", "run_ms": (time.perf_counter() - start) * 1000, "timed_out": expired.is_set()}
+        if error:
+            result["error"] = error
+        send(result)
+
+    def stats(self):
+        return {"cache": self.cache.stats(), "pools": {tier: pool.stats() for tier, pool in self.pools.items()}}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server_version = "msx-serve"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/ws":
+            return self.websocket()
+        if self.path == "/stats":
+            return self.reply(200, "application/json", json.dumps(self.server.stats()).encode())
+        if self.path in ("/", "/VisualEditor.html"):
+            try:
+                with open(self.server.page, "rb") as f:
+                    return self.reply(200, "text/html; charset=utf-8", f.read())
+            except OSError:
+                pass
+        self.reply(404, "text/plain", b"not found")
+
+    def do_POST(self):
+        if self.path != "/rows":
+            return self.reply(404, "text/plain", b"not found")
+        if not self.same_origin():
+            return self.reply(403, "text/plain", b"cross-origin request refused")
+        if self.headers.get_content_type() != "application/json":
+            return self.reply(415, "text/plain", b"expected application/json")
+        replies = []
+        try:
+            message = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            session = Session(message.get("tier", self.server.tier), self.server.cache)
+            self.server.handle_message(session, message, replies.append)
+        except TimeoutError as e:
+            return self.reply(503, "text/plain", str(e).encode())
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            return self.reply(400, "text/plain", f"{type(e).__name__}: {e}".encode())
+        self.reply(200, "application/json", json.dumps(replies).encode())
+
+    # Browsers send Origin on cross-site requests; other clients may leave it out.
+    # A rebound DNS name makes a foreign page same-origin, so Host is checked first.
+    def same_origin(self):
+        host = self.headers.get("Host")
+        if host not in self.server.hosts:
+            return False
+        origin = self.headers.get("Origin")
+        return origin is None or urlsplit(origin).netloc == host
+
+    def reply(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # --- WebSocket ---
+
+    def websocket(self):
+        key = self.headers.get("Sec-WebSocket-Key")
+        if self.headers.get("Upgrade", "").lower() != "websocket" or not key:
+            return self.reply(400, "text/plain", b"expected a WebSocket upgrade")
+        if not self.same_origin():
+            return self.reply(403, "text/plain", b"cross-origin request refused")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.close_connection = True
+
+        session = Session(self.server.tier, self.server.cache)
+        send_lock = threading.Lock()
+
+        def send(message):
+            with send_lock:
+                self.send_frame(0x1, json.dumps(message).encode())
+
+        while True:
+            frame = self.recv_message()
+            if frame is None:
+                return
+            try:
+                message = json.loads(frame)
+                if message.get("tier", session.tier) != session.tier:
+                    session = session.retarget(message["tier"])
+                self.server.handle_message(session, message, send)
+            except ConnectionError:
+                return    # the client closed before the replies were sent
+            except (ValueError, TypeError, KeyError, AttributeError, TimeoutError) as e:
+                send({"type": "error", "error": f"{type(e).__name__}: {e}"})
+
+    def recv_exact(self, n):
+        data = self.rfile.read(n)
+        if len(data) < n:
+            raise ConnectionError("connection closed")
+        return data
+
+    # Read one complete (possibly fragmented) data message; None once the client
+    # closes, or after closing a connection whose message exceeds MAX_MESSAGE
+    def recv_message(self):
+        parts, size = [], 0
+        try:
+            while True:
+                first, second = self.recv_exact(2)
+                opcode = first & 0x0F
+                length = second & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", self.recv_exact(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", self.recv_exact(8))[0]
+                size += length
+                if size > MAX_MESSAGE:
+                    self.send_frame(0x8, struct.pack("!H", 1009))  # message too big
+                    return None
+                mask = self.recv_exact(4) if second & 0x80 else None
+                payload = self.recv_exact(length)
+                if mask and length:
+                    key = int.from_bytes((mask * (length // 4 + 1))[:length], "big")
+                    payload = (int.from_bytes(payload, "big") ^ key).to_bytes(length, "big")
+                if opcode == 0x8:
+                    self.send_frame(0x8, payload[:2])
+                    return None
+                if opcode == 0x9:
+                    self.send_frame(0xA, payload)
+                    continue
+                if opcode == 0xA:
+                    continue
+                parts.append(payload)
+                if first & 0x80:
+                    return b"".join(parts).decode()
+        except (ConnectionError, OSError, ValueError):
+            return None
+
+    def send_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        self.wfile.write(header + payload)
+        self.wfile.flush()
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, tier=DEFAULT_TIER, pool_size=DEFAULT_POOL):
+    server = ExecutionServer((host, port), tier=tier, pool_size=pool_size)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,76 @@
+# Foundational elements of the ModuSynthX programming language, as a Python dictionary spec.
+
+modu_synthx_spec = {
+    "keywords": [
+        "create", "infuse", "link", "ping", "sift", "flow", "trigger",
+        "override", "write", "pause", "auto", "allocate", "commit"
+    ],
+    "modifiers": [
+        "quick", "briefly", "smart", "contextually", "unique", "fast",
+        "temporarily", "unsafe", "lowpower", "heavy", "idle"
+    ],
+    "symbols": {
+        "@": "System Object",
+        "%": "Virtual Memory Space",
+        "$": "User Data Space",
+        "::": "Binding Operator",
+        ".": "Modifier chaining",
+        ">": "Execution Redirect",
+        "cell[x,y]": "Manual Grid Cell Reference"
+    },
+    "memory_model": {
+        "VRMA": "Virtual Register Memory Allowance",
+        "cell_grid": "Stack + Spreadsheet cell referencing",
+        "compress_release": "Low-power compression & high-load release"
+    },
+    "gc": {
+        "sifting": {
+            "type": "time/context-based",
+            "command": "sift.purge.on <var> (after: <cycle>)"
+        }
+    },
+    "error_handling": {
+        "ping": {
+            "type": "modifier-based error resolution",
+            "command": "ping.recalibrate.<modifier>"
+        }
+    },
+    "execution": {
+        "flow": {
+            "commands": [
+                "flow.compress.<modifier>",
+                "trigger.release.on <task> > <memory zone>"
+            ]
+        }
+    },
+    "abstraction": {
+        "contextual_inference": {
+            "trigger": "auto.infer.methods.for <entity> (if: <condition>)",
+            "override": "override.inference of <entity> with <template>"
+        }
+    },
+    "syntax_sample": {
+        "hello_world": 'write.quick.on @console "Hello, ModuSynthX World!"',
+        "ai_agent": [
+            "create.named $AssistantCore",
+            "infuse.smart.learning.modules from @NeuroPack",
+            "link.contextually.to $UserProfile",
+            "ping.validate.logic in $AssistantCore",
+            "sift.purge.on $TempTokens (after: 5 interactions)",
+            "flow.compress.idle",
+            "trigger.release.on interaction-heavy > $ResponseMem",
+            "auto.infer.methods.for $AssistantCore (if: undefined_calls)"
+        ]
+    }
+}
+
+# Sample program from the original compiler demo
+sample_code = [
+    "write.quick.on @console 'Hello, ModuSynthX World!'",
+    "ping.recalibrate.smart",
+    "sift.purge.on $TempTokens (after: 5 interactions)",
+    "flow.compress.idle",
+    "trigger.release.on interaction-heavy > $ResponseMem",
+    "auto.infer.methods.for $AssistantCore (if: undefined_calls)",
+    "pause.briefly"
+]
@@ -0,0 +1,57 @@
+# VM tier registry: which compiler, VM and opcode table belong together.
+# Entries are import paths so that picking one tier never loads the others.
+import functools
+import importlib
+
+TIERS = {
+    "msx": ("modusynthx.compiler.gm:compile_msx_instructions", "modusynthx.vm.msx_vm:ModuSynthXVM",
+            "vm_bytecode"),
+    "basic": ("modusynthx.compiler.clv:compile_script", "modusynthx.vm.basic_vm:ModuSynthX_VM",
+              "BASIC_INSTRUCTION_SET"),
+    "threaded": ("modusynthx.compiler.clv:clv_compile", "modusynthx.vm.threaded_vm:ModuSynthX_VM",
+                 "CLV_INSTRUCTION_SET"),
+    "full": ("modusynthx.compiler.clv:full_clv_compile", "modusynthx.vm.full_vm:FullVM",
+             "extended_instruction_set"),
+    "advanced": ("modusynthx.compiler.advanced:advanced_clv_compile", "modusynthx.vm.advanced_vm:AdvancedVM",
+                 "advanced_instruction_set"),
+    "paged": ("modusynthx.compiler.paged:compile_script", "modusynthx.vm.paged_vm:AdvancedVM",
+              "paged_instruction_set"),
+}
+
+DEFAULT_TIER = "advanced"
+
+# Tiers the long-running servers accept: their VMs can be stopped, reset, and
+# write PRINT output to vm.out. "basic" and "msx" print status lines straight
+# to stdout, and "basic" PAUSE waits on stdin.
+SERVED_TIERS = ("threaded", "full", "advanced", "paged")
+
+
+# A source that the tier's compiler rejects. The legacy compilers index their
+# fields directly, so a malformed line can fail as IndexError, KeyError or
+# TypeError; the compiler load_tier returns reports those as CompileError, and
+# every compile failure is then a ValueError.
+class CompileError(ValueError):
+    pass
+
+
+def _checked(compile_fn):
+    @functools.wraps(compile_fn)
+    def compile_lines(lines, *args, **kwargs):
+        try:
+            return compile_fn(lines, *args, **kwargs)
+        except (IndexError, KeyError, TypeError) as e:
+            raise CompileError(f"{type(e).__name__}: {e}") from e
+    return compile_lines
+
+
+def _resolve(path):
+    module, attr = path.split(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def load_tier(name):
+    if name not in TIERS:
+        raise ValueError(f"Unknown VM tier: {name} (choose from {', '.join(TIERS)})")
+    compiler, vm_class, opcodes = TIERS[name]
+    opcodes = getattr(importlib.import_module("modusynthx.opcodes"), opcodes)
+    return _checked(_resolve(compiler)), _resolve(vm_class), opcodes
@@ -0,0 +1,33 @@
+# Virtual machines, resolved lazily so importing one tier does not load the others
+import importlib
+
+_LAZY = {
+    "AdvancedVM": (".advanced_vm", "AdvancedVM"),
+    "BasicVM": (".basic_vm", "ModuSynthX_VM"),
+    "FullVM": (".full_vm", "FullVM"),
+    "ModuSynthXVM": (".msx_vm", "ModuSynthXVM"),
+    "ModuSynthX_VM": (".threaded_vm", "ModuSynthX_VM"),
+    "RingStack": (".stack", "RingStack"),
+    "Frame": (".frames", "Frame"),
+    "FramePool": (".frames", "FramePool"),
+    "VMPool": (".pool", "VMPool"),
+    "PageRefs": (".cow", "PageRefs"),
+    "PersistentStore": (".persist", "PersistentStore"),
+    "FlowControl": (".flow", "FlowControl"),
+    "FlowScheduler": (".flow", "FlowScheduler"),
+    "HOOK_EVENTS": (".hooks", "HOOK_EVENTS"),
+    "VMHooks": (".hooks", "VMHooks"),
+    "InstructionTrace": (".hooks", "InstructionTrace"),
+    "EventCounter": (".hooks", "EventCounter"),
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _LAZY[name]
+    value = getattr(importlib.import_module(module, __name__), attr)
+    globals()[name] = value
+    return value
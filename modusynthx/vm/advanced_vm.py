@@ -0,0 +1,712 @@
+# VM with threading, pages, queues, and full memory mgmt
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from ..opcodes import advanced_instruction_set
+from .frames import Frame, FramePool
+from .hooks import VMHooks
+from .cow import PageRefs
+from .flow import FlowControl
+from .policy import HEAVY, LOWPOWER, LOWPOWER_QUANTUM, OPTIMIZED, ModifierStats, in_worker, submit
+from .stack import RingStack, dedupe, keep_last, make_stack
+
+# Every opcode is a module constant, so a test in the dispatch chain is one
+# global load and compare. _execute_fast tests them roughly in order of how
+# often they run: variable loads and stores, int arithmetic and branches first,
+# paging, threads and policy switches last.
+_OPS = ('READ', 'WRITE', 'STORE', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'JUMP', 'JZ', 'JNZ', 'PRINT', 'CALL', 'RET',
+        'PAGE', 'SWITCH', 'THREAD', 'JOIN', 'QUEUE', 'DISPATCH', 'SIFT', 'INFER', 'OPTIMIZE', 'FLOWCMP',
+        'RELEASE', 'PAUSE', 'END')
+(READ, WRITE, STORE, ADD, SUB, MUL, DIV, MOD, JUMP, JZ, JNZ, PRINT, CALL, RET, PAGE, SWITCH, THREAD, JOIN,
+ QUEUE, DISPATCH, SIFT, INFER, OPTIMIZE, FLOWCMP, RELEASE, PAUSE, END) = (advanced_instruction_set[n] for n in _OPS)
+# Typed opcodes emitted by compiler.typed.specialize. Their handlers run the
+# same operators as ADD..MOD: CPython's int and float routines are already
+# chosen by the operands, so there is no cheaper body to give them. What the
+# types buy is placement - the int forms that loop counters use sit with the
+# hot opcodes, the float forms further down - and a literal WRITE decoded once.
+WRITEK = advanced_instruction_set['WRITEK']
+WRITEV = advanced_instruction_set['WRITEV']
+ADD_I, SUB_I, MUL_I, DIV_I, MOD_I = (advanced_instruction_set[n + '_I'] for n in ('ADD', 'SUB', 'MUL', 'DIV', 'MOD'))
+ADD_F, SUB_F, MUL_F, DIV_F, MOD_F = (advanced_instruction_set[n + '_F'] for n in ('ADD', 'SUB', 'MUL', 'DIV', 'MOD'))
+# Frame-local slot access emitted for FUNC parameters and LOCAL names
+LOADL = advanced_instruction_set['LOADL']
+STOREL = advanced_instruction_set['STOREL']
+WRITEL = advanced_instruction_set['WRITEL']
+# % (persistent) variables, kept in vm.persist rather than in the pages
+LOADP = advanced_instruction_set['LOADP']
+STOREP = advanced_instruction_set['STOREP']
+WRITEP = advanced_instruction_set['WRITEP']
+MOVEP = advanced_instruction_set['MOVEP']
+# Execution policy switch emitted for modifiers (see vm/policy.py)
+MODE = advanced_instruction_set['MODE']
+# flow.* bandwidth limits (see vm/flow.py)
+FLOW = advanced_instruction_set['FLOW']
+# Page accesses compiler.verifier proved defined: READ and WRITEV without the default
+LOADG = advanced_instruction_set['LOADG']
+MOVEG = advanced_instruction_set['MOVEG']
+
+JOIN_TIMEOUT = 1.0   # seconds reset() waits for leftover THREAD tasks, before and after stopping them
+
+
+# --- AI Inference Simulation ---
+def simulate_inference(payload):
+    return {"result": "VACU-aligned output", "payload": payload}
+
+
+def _copy_frame(frame):
+    copy = Frame(frame.return_pc, frame.argc, 0)
+    copy.slots = list(frame.slots)
+    return copy
+
+
+class AdvancedVM:
+    def __init__(self, stack_capacity=None, overflow='spill'):
+        self.vrma = {}
+        self.stack = make_stack(stack_capacity, overflow)
+        self.pages = [{}]
+        self.page_index = 0
+        self.queue = queue.PriorityQueue()
+        self.threads = []
+        self.children = []        # THREAD and DISPATCH child VMs still running
+        self.running = False
+        self.cancelled = False    # a child whose parent was stopped: never (re)starts
+        self.call_stack = []      # Frames of the active calls, innermost last
+        self.frames = FramePool()
+        self.root_frame = Frame(None, 0, 0)
+        self.frame = self.root_frame
+        self.hooks = VMHooks()
+        self.out = None           # file PRINT writes to (None: sys.stdout)
+        self.pc = 0               # where the last execute() stopped; resume() continues there
+        self.refs = None          # PageRefs shared with forks, None until the first fork()
+        self.private = None       # ids of pages this VM may write in place while refs is set
+        self.persist = {}         # % variables: a dict, or a PersistentStore to keep them across runs
+        self.policy = OPTIMIZED   # set by MODE; see vm/policy.py
+        self.lowpower = False     # policy == LOWPOWER
+        self.branches = 0         # taken jumps under lowpower, toward the next yield
+        self.flow = None          # FlowControl limits, None for none
+        self.safepoints = False   # lowpower or flow: taken jumps, CALL and RET call _safepoint
+        self.segment = 0          # pc where the current straight run of instructions began
+        self.modifier = None      # modifier of the last MODE, None before the first
+        self.mode_since = 0.0
+        self.policy_stats = ModifierStats()
+
+    def execute(self, bytecode, pc=0):
+        # Pick the loop variant once per run so the plain loop carries no hook checks
+        self.segment = pc
+        self.safepoints = self.lowpower or self.flow is not None
+        if self.hooks:
+            self._execute_traced(bytecode, pc)
+        else:
+            self._execute_fast(bytecode, pc)
+        if self.flow is not None and self.pc > self.segment:
+            self.flow.executed += self.pc - self.segment
+        if self.modifier is not None:
+            self._mode(self.policy, self.modifier, entered=False)
+
+    def _execute_fast(self, bytecode, pc=0):
+        self.running = not self.cancelled
+        while pc < len(bytecode) and self.running:
+            opcode, args = bytecode[pc]
+
+            if opcode == READ:
+                self.stack.append(self._page().get(args[0], 0))
+            elif opcode == LOADG:
+                self.stack.append(self.pages[self.page_index][args[0]])
+            elif opcode == STORE:
+                self._wpage()[args[0]] = self.stack.pop()
+            elif opcode == WRITEK:
+                self._wpage()[args[0]] = args[1]
+            elif opcode == LOADL:
+                self.stack.append(self.frame.slots[args[0]])
+            elif opcode == STOREL:
+                self.frame.slots[args[0]] = self.stack.pop()
+            elif opcode == ADD_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a + b)
+            elif opcode == SUB_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a - b)
+            elif opcode == JNZ:
+                if self.stack.pop() != 0:
+                    if self.safepoints:
+                        self._safepoint(pc, args[0])
+                    pc = args[0] - 1
+            elif opcode == JZ:
+                if self.stack.pop() == 0:
+                    if self.safepoints:
+                        self._safepoint(pc, args[0])
+                    pc = args[0] - 1
+            elif opcode == JUMP:
+                if self.safepoints:
+                    self._safepoint(pc, args[0])
+                pc = args[0] - 1
+            elif opcode == ADD:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a + b)
+            elif opcode == SUB:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a - b)
+            elif opcode == MUL_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a * b)
+            elif opcode == MUL:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a * b)
+            elif opcode == CALL:
+                if len(args) > 1:
+                    self.frame = self.frames.acquire(pc, args[1], args[2], self.stack)
+                else:
+                    self.frame = self.frames.acquire(pc, 0, 0)
+                self.call_stack.append(self.frame)
+                if self.safepoints:
+                    self._safepoint(pc, args[0])
+                pc = args[0] - 1
+            elif opcode == RET:
+                if not self.call_stack:
+                    break
+                if self.safepoints:
+                    self._safepoint(pc, self.call_stack[-1].return_pc + 1)
+                pc = self._leave()
+            elif opcode == WRITEL:
+                self.frame.slots[args[0]] = args[1]
+            elif opcode == WRITEV:
+                self._wpage()[args[0]] = self._page().get(args[1], 0)
+            elif opcode == MOVEG:
+                self._wpage()[args[0]] = self.pages[self.page_index][args[1]]
+            elif opcode == ADD_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a + b)
+            elif opcode == SUB_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a - b)
+            elif opcode == MUL_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a * b)
+            elif opcode == DIV_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a / b)
+            elif opcode == DIV_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a / b)
+            elif opcode == DIV:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a / b)
+            elif opcode == MOD_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a % b)
+            elif opcode == MOD_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a % b)
+            elif opcode == MOD:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a % b)
+            elif opcode == WRITE:
+                self._wpage()[args[0]] = self._eval(args[1:])
+            elif opcode == PRINT:
+                print(self.stack.pop(), file=self.out)
+            elif opcode == LOADP:
+                self.stack.append(self.persist.get(args[0], 0))
+            elif opcode == STOREP:
+                self.persist[args[0]] = self.stack.pop()
+            elif opcode == WRITEP:
+                self.persist[args[0]] = args[1]
+            elif opcode == MOVEP:
+                self._move(args[0], args[1])
+            elif opcode == PAGE:
+                self.pages.append({})
+            elif opcode == SWITCH:
+                self.page_index = int(args[0]) if args else 0
+            elif opcode == THREAD:
+                self._spawn(bytecode, *args)
+            elif opcode == JOIN:
+                self._join()
+            elif opcode == QUEUE:
+                self.queue.put((args[0], args[1], args[2] if len(args) > 2 else 0))
+            elif opcode == DISPATCH:
+                self._dispatch(bytecode)
+            elif opcode == SIFT:
+                self._sift(args)
+            elif opcode == INFER:
+                self._infer(" ".join(map(str, args)))
+            elif opcode == OPTIMIZE:
+                dedupe(self.stack)
+            elif opcode == FLOWCMP:
+                keep_last(self.stack, 256)
+            elif opcode == RELEASE:
+                self.stack.clear()
+            elif opcode == MODE:
+                self._mode(args[0], args[1])
+            elif opcode == FLOW:
+                self._flow_set(pc, args)
+            elif opcode == PAUSE:
+                time.sleep(0.25)
+            elif opcode == END:
+                break
+            pc += 1
+        self.pc = pc
+
+    def _execute_traced(self, bytecode, pc=0):
+        hooks = self.hooks
+        self.running = not self.cancelled
+        while pc < len(bytecode) and self.running:
+            opcode, args = bytecode[pc]
+            hooks.emit('instruction', self, pc, opcode, args)
+
+            if opcode == SIFT:
+                hooks.emit('sift', self, self._sift(args))
+            elif opcode == INFER:
+                payload = " ".join(map(str, args))
+                hooks.emit('infer', self, payload, self._infer(payload))
+            elif opcode == SWITCH:
+                old_index = self.page_index
+                self._step(bytecode, pc, opcode, args)
+                hooks.emit('page_switch', self, old_index, self.page_index)
+            else:
+                if opcode == CALL:
+                    hooks.emit('call', self, pc, args[0])
+                elif opcode == RET and self.call_stack:
+                    hooks.emit('ret', self, pc, self.call_stack[-1].return_pc)
+                next_pc = self._step(bytecode, pc, opcode, args)
+                if next_pc is None:
+                    break
+                pc = next_pc
+                continue
+            pc += 1
+        self.pc = pc
+
+    # Single-instruction dispatch used by the traced loop; returns the next pc or None to stop.
+    # It repeats _execute_fast branch for branch, in the same order, so that the
+    # plain loop keeps its handlers inline; tests/test_advanced_vm.py runs every
+    # opcode through both.
+    def _step(self, bytecode, pc, opcode, args):
+        if opcode == READ:
+            self.stack.append(self._page().get(args[0], 0))
+        elif opcode == LOADG:
+            self.stack.append(self.pages[self.page_index][args[0]])
+        elif opcode == STORE:
+            self._wpage()[args[0]] = self.stack.pop()
+        elif opcode == WRITEK:
+            self._wpage()[args[0]] = args[1]
+        elif opcode == LOADL:
+            self.stack.append(self.frame.slots[args[0]])
+        elif opcode == STOREL:
+            self.frame.slots[args[0]] = self.stack.pop()
+        elif opcode == ADD_I:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a + b)
+        elif opcode == SUB_I:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a - b)
+        elif opcode == JNZ:
+            if self.stack.pop() != 0:
+                if self.safepoints:
+                    self._safepoint(pc, args[0])
+                return args[0]
+        elif opcode == JZ:
+            if self.stack.pop() == 0:
+                if self.safepoints:
+                    self._safepoint(pc, args[0])
+                return args[0]
+        elif opcode == JUMP:
+            if self.safepoints:
+                self._safepoint(pc, args[0])
+            return args[0]
+        elif opcode == ADD:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a + b)
+        elif opcode == SUB:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a - b)
+        elif opcode == MUL_I:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a * b)
+        elif opcode == MUL:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a * b)
+        elif opcode == CALL:
+            if len(args) > 1:
+                self.frame = self.frames.acquire(pc, args[1], args[2], self.stack)
+            else:
+                self.frame = self.frames.acquire(pc, 0, 0)
+            self.call_stack.append(self.frame)
+            if self.safepoints:
+                self._safepoint(pc, args[0])
+            return args[0]
+        elif opcode == RET:
+            if not self.call_stack:
+                return None
+            if self.safepoints:
+                self._safepoint(pc, self.call_stack[-1].return_pc + 1)
+            return self._leave() + 1
+        elif opcode == WRITEL:
+            self.frame.slots[args[0]] = args[1]
+        elif opcode == WRITEV:
+            self._wpage()[args[0]] = self._page().get(args[1], 0)
+        elif opcode == MOVEG:
+            self._wpage()[args[0]] = self.pages[self.page_index][args[1]]
+        elif opcode == ADD_F:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a + b)
+        elif opcode == SUB_F:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a - b)
+        elif opcode == MUL_F:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a * b)
+        elif opcode == DIV_I:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a / b)
+        elif opcode == DIV_F:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a / b)
+        elif opcode == DIV:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a / b)
+        elif opcode == MOD_I:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a % b)
+        elif opcode == MOD_F:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a % b)
+        elif opcode == MOD:
+            b, a = self.stack.pop(), self.stack.pop()
+            self.stack.append(a % b)
+        elif opcode == WRITE:
+            self._wpage()[args[0]] = self._eval(args[1:])
+        elif opcode == PRINT:
+            print(self.stack.pop(), file=self.out)
+        elif opcode == LOADP:
+            self.stack.append(self.persist.get(args[0], 0))
+        elif opcode == STOREP:
+            self.persist[args[0]] = self.stack.pop()
+        elif opcode == WRITEP:
+            self.persist[args[0]] = args[1]
+        elif opcode == MOVEP:
+            self._move(args[0], args[1])
+        elif opcode == PAGE:
+            self.pages.append({})
+        elif opcode == SWITCH:
+            self.page_index = int(args[0]) if args else 0
+        elif opcode == THREAD:
+            self._spawn(bytecode, *args)
+        elif opcode == JOIN:
+            self._join()
+        elif opcode == QUEUE:
+            self.queue.put((args[0], args[1], args[2] if len(args) > 2 else 0))
+        elif opcode == DISPATCH:
+            self._dispatch(bytecode)
+        elif opcode == SIFT:
+            self._sift(args)
+        elif opcode == INFER:
+            self._infer(" ".join(map(str, args)))
+        elif opcode == OPTIMIZE:
+            dedupe(self.stack)
+        elif opcode == FLOWCMP:
+            keep_last(self.stack, 256)
+        elif opcode == RELEASE:
+            self.stack.clear()
+        elif opcode == MODE:
+            self._mode(args[0], args[1])
+        elif opcode == FLOW:
+            self._flow_set(pc, args)
+        elif opcode == PAUSE:
+            time.sleep(0.25)
+        elif opcode == END:
+            return None
+        return pc + 1
+
+    # Stop this VM and every THREAD or DISPATCH child it has running
+    def stop(self):
+        self.running = False
+        for child in list(self.children):
+            child.cancelled = True
+            child.stop()
+
+    # Continue a stopped or restored VM from where it left off
+    def resume(self, bytecode):
+        return self.execute(bytecode, self.pc)
+
+    # Copy-on-write clone: the fork gets its own page list, stack, call frames and
+    # queue, while page contents stay shared until either side writes to a page
+    def fork(self):
+        child = AdvancedVM()
+        if isinstance(self.stack, RingStack):
+            child.stack = RingStack(self.stack.capacity, self.stack.overflow)
+        for value in self.stack:
+            child.stack.append(value)
+        child.vrma = dict(self.vrma)
+        self._share_pages(child)
+        child.page_index = self.page_index
+        child.root_frame = _copy_frame(self.root_frame)
+        child.call_stack = [_copy_frame(frame) for frame in self.call_stack]
+        child.frame = child.call_stack[-1] if child.call_stack else child.root_frame
+        for item in list(self.queue.queue):
+            child.queue.put(item)
+        child.hooks = self.hooks
+        child.out = self.out
+        child.persist = self.persist
+        child.pc = self.pc
+        child.policy, child.modifier, child.mode_since = self.policy, self.modifier, self.mode_since
+        child.lowpower = self.lowpower
+        child.flow = self.flow.child() if self.flow is not None else None
+        child.policy_stats = self.policy_stats
+        return child
+
+    # Give `child` its own list of this VM's pages, shared copy-on-write
+    def _share_pages(self, child):
+        if self.refs is None:
+            self.refs = PageRefs()
+        self.refs.share(self.pages)
+        self.private = set()
+        child.pages = list(self.pages)
+        child.refs = self.refs
+        child.private = set()
+
+    # Copy-on-write counters for this VM and everything forked or spawned from it
+    def page_stats(self):
+        stats = {"pages": len(self.pages), "shared_pages": 0, "shares": 0, "copies": 0, "copied_entries": 0}
+        if self.refs is not None:
+            stats.update(self.refs.stats())
+            stats["refcounts"] = [self.refs.refcount(page) for page in self.pages]
+        return stats
+
+    # Per-modifier counters for this VM and its THREAD/DISPATCH children
+    def modifier_stats(self):
+        return self.policy_stats.snapshot()
+
+    # Compact binary image of the VM state (see vm/snapshot.py)
+    def snapshot(self):
+        from .snapshot import dump_vm
+        return dump_vm(self)
+
+    @classmethod
+    def restore(cls, data):
+        from .snapshot import load_vm
+        return load_vm(data, cls())
+
+    # Clear run state in place so a pooled VM can be reused; the frame pool and
+    # hooks are kept. THREAD tasks still running get `timeout` seconds to finish
+    # and are then stopped; if one still has not exited, returns False and the
+    # VM must be dropped rather than reused.
+    def reset(self, timeout=JOIN_TIMEOUT):
+        if not self._join(timeout):
+            self.stop()
+            if not self._join(timeout):
+                return False
+        while self.call_stack:
+            self.frames.release(self.call_stack.pop())
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.vrma.clear()
+        self.stack.clear()
+        if type(self.persist) is dict:
+            self.persist.clear()  # an attached PersistentStore is meant to outlive runs
+        if self.refs is not None:
+            # Pages may still be shared with forks: drop them rather than clear them
+            self.refs.release(self.pages)
+            self.pages = [{}]
+            self.refs = self.private = None
+        else:
+            del self.pages[1:]
+            self.pages[0].clear()
+        self.page_index = 0
+        self.pc = 0
+        self.root_frame.slots[:] = [0] * len(self.root_frame.slots)
+        self.frame = self.root_frame
+        self.running = False
+        self.cancelled = False
+        self.out = None
+        self.policy, self.modifier, self.lowpower, self.branches = OPTIMIZED, None, False, 0
+        self.flow = None
+        self.policy_stats.clear()
+
+    # Pop the innermost frame back into the pool; returns the pc of its CALL
+    def _leave(self):
+        frame = self.call_stack.pop()
+        self.frame = self.call_stack[-1] if self.call_stack else self.root_frame
+        self.frames.release(frame)
+        return frame.return_pc
+
+    def _page(self):
+        return self.pages[self.page_index]
+
+    # MODE: close the time spent under the previous modifier and switch to
+    # `policy`. Restating the current mode, as code after a LABEL does, is free.
+    def _mode(self, policy, modifier, entered=True):
+        if entered and modifier == self.modifier and policy == self.policy:
+            return policy
+        now = time.perf_counter()
+        stats = self.policy_stats
+        if self.modifier is not None:
+            stats.add(self.modifier, self.policy, seconds=now - self.mode_since)
+        if entered:
+            stats.add(modifier, policy, entries=1)
+            if policy == LOWPOWER and self.policy != LOWPOWER:
+                frames, saved = self._compress()
+                stats.add(modifier, policy, frames_freed=frames, bytes_saved=saved)
+        self.policy, self.modifier, self.mode_since = policy, modifier, now
+        self.lowpower = policy == LOWPOWER
+        self.safepoints = self.lowpower or self.flow is not None
+        return policy
+
+    # A taken jump, CALL or RET at `pc` going to `target`. Under lowpower every
+    # LOWPOWER_QUANTUM of them let other threads run; under flow limits charge
+    # the straight run that ends here, and stop when the limits say so.
+    def _safepoint(self, pc, target):
+        executed = pc - self.segment + 1
+        self.segment = target
+        if self.lowpower:
+            self.branches += 1
+            if self.branches >= LOWPOWER_QUANTUM:
+                self.branches = 0
+                time.sleep(0)
+                self.policy_stats.add(self.modifier, LOWPOWER, yields=1)
+        if self.flow is not None and not self.flow.charge(max(executed, 1)):
+            self.running = False
+
+    # FLOW name [value]: a flow.* statement adjusting this VM's limits. The run
+    # up to here is charged under the old limits first; a stop takes effect
+    # after the new ones are set.
+    def _flow_set(self, pc, args):
+        if self.flow is None:
+            self.flow = FlowControl()
+        elif pc > self.segment and not self.flow.charge(pc - self.segment):
+            self.running = False
+        self.flow.set(args[0], args[1] if len(args) > 1 else None)
+        self.safepoints = True
+        self.segment = pc
+
+    # Entering lowpower: drop the frame pool's spare frames and rebuild pages that
+    # deletions left oversized (dicts never shrink in place). Pages shared
+    # copy-on-write are left alone, since PageRefs tracks them by identity.
+    def _compress(self):
+        frames = sum(len(free) for free in self.frames.free.values())
+        self.frames.free.clear()
+        saved = 0
+        if self.refs is None:
+            for index, page in enumerate(self.pages):
+                compact = dict(page)
+                shrunk = sys.getsizeof(page) - sys.getsizeof(compact)
+                if shrunk > 0:
+                    self.pages[index] = compact
+                    saved += shrunk
+        return frames, saved
+
+    # MOVEP dest src: a variable copy where either name may be a % variable
+    def _move(self, dest, src):
+        value = self.persist.get(src, 0) if src[:1] == '%' else self._eval([src])
+        if dest[:1] == '%':
+            self.persist[dest] = value
+        else:
+            self._wpage()[dest] = value
+
+    # The current page for writing; a page still shared with a fork is copied first
+    def _wpage(self):
+        page = self.pages[self.page_index]
+        if self.private is None or id(page) in self.private:
+            return page
+        page = self.refs.writable(self.pages, self.page_index)
+        self.private.add(id(page))
+        return page
+
+    def _eval(self, tokens):
+        try:
+            return int(tokens[0]) if tokens else 0
+        except ValueError:
+            return self._page().get(tokens[0], 0)
+
+    # Drop the named entries (or every None-valued entry) from the current page
+    def _sift(self, args):
+        page = self._page()
+        if args:
+            freed = [name for name in args if name in page]
+        else:
+            freed = [k for k, v in page.items() if v is None]
+        if freed:
+            page = self._wpage()
+            for name in freed:
+                del page[name]
+        return freed
+
+    def _infer(self, payload):
+        result = simulate_inference(payload)
+        self.vrma['ai_result'] = result
+        return result
+
+    # A child VM runs a THREAD or queued function body; the body's locals live in
+    # the child's root frame. A queued (DISPATCH) child runs on this thread and
+    # works on this VM's pages directly. A THREAD child gets a copy-on-write view
+    # instead: its own page list whose pages stay shared with this VM until one
+    # side writes to them, so tasks cannot see each other's writes. % variables,
+    # vrma and modifier stats are shared by both kinds.
+    def _child(self, size=0, cow=False):
+        child = AdvancedVM()
+        child.vrma = self.vrma
+        if cow:
+            self._share_pages(child)
+        else:
+            child.pages = self.pages
+            child.refs, child.private = self.refs, self.private
+        child.page_index = self.page_index
+        child.hooks = self.hooks
+        child.out = self.out
+        child.persist = self.persist
+        child.policy_stats = self.policy_stats
+        if self.flow is not None:
+            child.flow = self.flow.child()
+        if size:
+            child.root_frame = child.frame = Frame(None, 0, size)
+        self.children.append(child)
+        if not self.running:
+            child.cancelled = True  # stop() ran before the child was listed
+        return child
+
+    def _spawn(self, bytecode, target, size=0):
+        child = self._child(size, cow=True)
+
+        def run():
+            try:
+                child.execute(bytecode, target)
+            finally:
+                self.children.remove(child)
+                child.refs.release(child.pages)  # this VM can then write them in place again
+
+        if self.policy == HEAVY and not in_worker():
+            self.threads.append(submit(run))
+            self.policy_stats.add(self.modifier, HEAVY, pooled=1)
+            return
+        thread = threading.Thread(target=run)
+        self.threads.append(thread)
+        thread.start()
+
+    # Wait for THREAD tasks: threads, or futures of tasks on the heavy pool.
+    # Returns False if one is still running after `timeout` seconds.
+    def _join(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.threads:
+            task = self.threads[-1]
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if isinstance(task, threading.Thread):
+                task.join(left)
+                if task.is_alive():
+                    return False
+            else:
+                try:
+                    task.result(left)
+                except FutureTimeout:
+                    return False
+            self.threads.pop()
+        return True
+
+    # DISPATCH drains the priority queue, running each queued function to its RET
+    def _dispatch(self, bytecode):
+        while not self.queue.empty():
+            _, target, size = self.queue.get()
+            child = self._child(size)
+            try:
+                child.execute(bytecode, target)
+            finally:
+                self.children.remove(child)
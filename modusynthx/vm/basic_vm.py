@@ -0,0 +1,93 @@
+# --- Basic ModuSynthX VM (compile_script bytecode) ---
+import random
+
+from ..opcodes import BASIC_INSTRUCTION_SET as INSTRUCTION_SET
+
+
+# --- Virtual Register Memory Allocation (VRMA) ---
+class VRMA:
+    def __init__(self):
+        self.registers = {}
+        self.counter = 0
+
+    def alloc(self, name):
+        self.registers[name] = {"value": None, "id": self.counter}
+        self.counter += 1
+        return self.registers[name]
+
+    def write(self, name, value):
+        if name in self.registers:
+            self.registers[name]['value'] = value
+
+    def read(self, name):
+        return self.registers[name]['value'] if name in self.registers else None
+
+
+# --- Garbage Handler (Sifting) ---
+class Sifter:
+    def __init__(self, vrma):
+        self.vrma = vrma
+
+    def collect(self):
+        print("[SIFT] Running garbage collector...")
+        unused = [k for k, v in self.vrma.registers.items() if v['value'] is None]
+        for reg in unused:
+            print(f"  - Discarding unused register: {reg}")
+            del self.vrma.registers[reg]
+
+
+# --- Ping-Based Error Handling ---
+def ping_check(command):
+    if random.random() < 0.05:  # simulate 5% error chance
+        print("[PING] Error detected in:", command)
+        print("[PING] Auto-correcting...")
+        return False
+    return True
+
+
+# --- AI Inference Simulation ---
+def simulate_ai_call(payload):
+    print(f"[AI] Inference Engine Processing: {payload}")
+    return {"result": "VACU-aligned output"}
+
+
+# --- Execution Engine ---
+class ModuSynthX_VM:
+    def __init__(self):
+        self.vrma = VRMA()
+        self.sifter = Sifter(self.vrma)
+        self.stack = []
+        self.running = True
+
+    def execute(self, bytecode):
+        pc = 0
+        while pc < len(bytecode) and self.running:
+            opcode, args = bytecode[pc]
+            if opcode == INSTRUCTION_SET['OPTIMIZE']:
+                print("[VM] OPTIMIZE :: Modifying stack layout for performance.")
+            elif opcode == INSTRUCTION_SET['INFER']:
+                result = simulate_ai_call(" ".join(args))
+                self.vrma.write('ai_result', result)
+            elif opcode == INSTRUCTION_SET['PING']:
+                if not ping_check(args): continue
+            elif opcode == INSTRUCTION_SET['FLOWCMP']:
+                print("[VM] FLOWCMP :: Memory compressed.")
+            elif opcode == INSTRUCTION_SET['SIFT']:
+                self.sifter.collect()
+            elif opcode == INSTRUCTION_SET['RELEASE']:
+                print("[VM] RELEASE :: Memory released to subsystems.")
+            elif opcode == INSTRUCTION_SET['PAUSE']:
+                input("[VM] Execution paused. Press Enter to continue.")
+            elif opcode == INSTRUCTION_SET['END']:
+                print("[VM] Program complete.")
+                self.running = False
+            else:
+                print("[VM] Unknown opcode:", opcode)
+            pc += 1
+
+    # Clear run state in place so a pooled VM can be reused
+    def reset(self):
+        self.vrma.registers.clear()
+        self.vrma.counter = 0
+        self.stack.clear()
+        self.running = True
@@ -0,0 +1,63 @@
+# --- Copy-on-Write Pages ---
+# Forked VMs start with the same page dicts. PageRefs counts how many VMs hold
+# each shared page; a VM about to write a page that others still hold takes a
+# private copy first (writable), and a page held by one VM is written in place.
+# Counts are keyed by id(page) and only kept while above one, so a VM that is
+# dropped without release() can only cause an unneeded copy later, never a
+# missed one.
+import threading
+
+
+class PageRefs:
+    def __init__(self):
+        self.counts = {}          # id(page) -> holders, for pages held more than once
+        self.lock = threading.Lock()
+        self.shared = 0           # page references handed out by share()
+        self.copies = 0           # pages copied on first write
+        self.copied_entries = 0   # entries copied by those writes
+
+    # Another VM now holds every page in `pages`
+    def share(self, pages):
+        with self.lock:
+            counts = self.counts
+            for page in pages:
+                counts[id(page)] = counts.get(id(page), 1) + 1
+            self.shared += len(pages)
+
+    # pages[index], copied into `pages` first if other VMs still hold it
+    def writable(self, pages, index):
+        page = pages[index]
+        with self.lock:
+            held = self.counts.get(id(page), 1)
+            if held == 1:
+                return page
+            if held == 2:
+                del self.counts[id(page)]
+            else:
+                self.counts[id(page)] = held - 1
+            # Copy before the count drops is seen: once it reaches one, the last
+            # holder writes the page in place and the copy would pick that up
+            copy = dict(page)
+            self.copies += 1
+            self.copied_entries += len(page)
+        pages[index] = copy
+        return copy
+
+    # A VM is done with `pages`
+    def release(self, pages):
+        with self.lock:
+            for page in pages:
+                held = self.counts.get(id(page))
+                if held == 2:
+                    del self.counts[id(page)]
+                elif held:
+                    self.counts[id(page)] = held - 1
+
+    def refcount(self, page):
+        with self.lock:
+            return self.counts.get(id(page), 1)
+
+    def stats(self):
+        with self.lock:
+            return {"shared_pages": len(self.counts), "shares": self.shared,
+                    "copies": self.copies, "copied_entries": self.copied_entries}
@@ -0,0 +1,236 @@
+# --- Flow Control ---
+# `flow.` is the spec's execution bandwidth control. A FlowControl attached to
+# an AdvancedVM as vm.flow limits it three ways:
+#
+#   quantum   instructions per slice: execute() returns once a slice is used,
+#             with status 'quantum', and resume() carries on
+#   rate      instructions per second, a token bucket holding up to `burst`;
+#             an overdrawn VM sleeps, or under a FlowScheduler is set aside
+#             (status 'throttled') while the others run
+#   deadline  seconds of wall-clock time; past it the VM stops for good
+#             (status 'deadline')
+#
+# The VM charges instructions at its safepoints (taken jumps, CALL and RET) as
+# the length of the straight run since the last one, so a loop is always
+# charged and a slice overruns by at most one run of straight-line code.
+#
+# flow.quantum N, flow.rate N, flow.burst N, flow.deadline SECONDS and
+# flow.unlimited (FLOW instructions) change the limits from inside the program.
+# They can tighten the limits the host gave the FlowControl but never lift
+# them: rate and burst change the bucket in place, keeping its balance, and
+# neither goes above the host's. THREAD and DISPATCH children share the bucket
+# and the deadline, so a child's flow.rate slows its parent too.
+#
+# FlowScheduler runs many VMs round-robin on one thread, a quantum at a time.
+import heapq
+import threading
+import time
+from collections import deque
+
+DEFAULT_QUANTUM = 1000
+
+
+# Rate, burst and quantum must be above zero: a zero rate never refills and a
+# negative one would make charge() sleep a negative time
+def positive(name, value):
+    value = float(value)
+    if not value > 0:
+        raise ValueError(f"flow {name} must be above zero, got {value:g}")
+    return value
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = positive('rate', rate)
+        self.burst = float(burst) if burst else max(self.rate / 10, 1.0)
+        self.tokens = self.burst
+        self.stamp = time.perf_counter()
+        self.lock = threading.Lock()
+
+    # Spend n tokens; returns how long to wait before the balance is back to zero
+    def take(self, n, now):
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= n
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    # New rate and/or burst; the balance carries over, cut to the new burst
+    def adjust(self, rate=None, burst=None, now=None):
+        with self.lock:
+            now = time.perf_counter() if now is None else now
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if rate is not None:
+                self.rate = float(rate)
+            if burst is not None:
+                self.burst = float(burst)
+            self.tokens = min(self.tokens, self.burst)
+
+
+def _lower(value, ceiling):
+    if ceiling is None:
+        return value
+    return ceiling if value is None else min(value, ceiling)
+
+
+class FlowControl:
+    def __init__(self, quantum=None, rate=None, burst=None, deadline=None):
+        self.quantum = quantum
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.expires = None if deadline is None else time.perf_counter() + deadline
+        # Ceilings a program cannot lift: quantum, rate, deadline and burst
+        self.host = (quantum, rate, self.expires, self.bucket.burst if self.bucket is not None else None)
+        self.scheduled = False    # throttling preempts instead of sleeping
+        self.status = None        # why execute() last stopped: quantum, throttled, deadline
+        self.wake = 0.0           # perf_counter time a throttled VM may run again
+        self.used = 0             # instructions in the current slice
+        self.executed = 0
+        self.slices = 0
+        self.throttled_seconds = 0.0
+
+    # Limits for a THREAD or DISPATCH child: same bucket and deadline, no quantum
+    def child(self):
+        flow = FlowControl()
+        flow.bucket, flow.expires, flow.host = self.bucket, self.expires, (None,) + self.host[1:]
+        return flow
+
+    def begin(self):
+        self.used = 0
+        self.status = None
+        self.slices += 1
+
+    # FLOW name [value]
+    def set(self, name, value=None):
+        quantum, rate, expires, burst = self.host
+        if name == 'unlimited':
+            self.quantum, self.expires = quantum, expires
+            if not rate:
+                self.bucket = None
+            elif self.bucket is not None:
+                self.bucket.adjust(rate, burst)
+        elif name == 'quantum':
+            self.quantum = _lower(max(1, int(positive(name, value))), quantum)
+        elif name == 'rate':
+            if self.bucket is None:
+                self.bucket = TokenBucket(value)
+            else:
+                self.bucket.adjust(rate=_lower(positive(name, value), rate))
+        elif name == 'burst':
+            value = positive(name, value)
+            if self.bucket is not None:
+                self.bucket.adjust(burst=_lower(max(1.0, value), burst))
+        elif name == 'deadline':
+            self.expires = _lower(time.perf_counter() + float(value), expires)
+        else:
+            raise ValueError(f"Unknown flow setting: {name}")
+
+    # Count n instructions; False when the VM has to stop here
+    def charge(self, n):
+        self.executed += n
+        self.used += n
+        if self.expires is not None or self.bucket is not None:
+            now = time.perf_counter()
+            if self.expires is not None and now >= self.expires:
+                self.status = 'deadline'
+                return False
+            if self.bucket is not None:
+                wait = self.bucket.take(n, now)
+                if wait:
+                    self.throttled_seconds += wait
+                    if self.scheduled:
+                        self.status, self.wake = 'throttled', now + wait
+                        return False
+                    time.sleep(wait)
+        if self.quantum is not None and self.used >= self.quantum:
+            self.status = 'quantum'
+            return False
+        return True
+
+    # The limits as plain values for a snapshot, deadlines as seconds left
+    def state(self):
+        now = time.perf_counter()
+        quantum, rate, expires, burst = self.host
+        bucket = self.bucket
+        return (self.quantum, None if bucket is None else (bucket.rate, bucket.burst, bucket.tokens),
+                None if self.expires is None else self.expires - now,
+                (quantum, rate, None if expires is None else expires - now, burst), self.executed)
+
+    @classmethod
+    def from_state(cls, state):
+        now = time.perf_counter()
+        quantum, bucket, left, (host_quantum, host_rate, host_left, host_burst), executed = state
+        flow = cls(quantum)
+        if bucket is not None:
+            rate, burst, tokens = bucket
+            flow.bucket = TokenBucket(rate, burst)
+            flow.bucket.tokens = tokens
+        flow.expires = None if left is None else now + left
+        flow.host = (host_quantum, host_rate, None if host_left is None else now + host_left, host_burst)
+        flow.executed = executed
+        return flow
+
+    def stats(self):
+        return {"executed": self.executed, "slices": self.slices, "quantum": self.quantum,
+                "rate": self.bucket.rate if self.bucket is not None else None,
+                "throttled_seconds": self.throttled_seconds, "status": self.status}
+
+
+class FlowTask:
+    __slots__ = ('vm', 'bytecode', 'pc', 'name', 'status', 'error')
+
+    def __init__(self, vm, bytecode, pc, name):
+        self.vm = vm
+        self.bytecode = bytecode
+        self.pc = pc
+        self.name = name
+        self.status = 'ready'     # ready, done, deadline or error
+        self.error = None
+
+
+# Round-robin over VMs, one quantum each per turn; throttled VMs wait in a heap
+# keyed by when their bucket refills, so they cost nothing until then
+class FlowScheduler:
+    def __init__(self, quantum=DEFAULT_QUANTUM):
+        self.quantum = quantum
+        self.tasks = []
+        self.turns = 0
+
+    def add(self, vm, bytecode, pc=0, quantum=None, rate=None, burst=None, deadline=None, name=None):
+        vm.flow = FlowControl(quantum or self.quantum, rate, burst, deadline)
+        vm.flow.scheduled = True
+        task = FlowTask(vm, bytecode, pc, name if name is not None else len(self.tasks))
+        self.tasks.append(task)
+        return task
+
+    def run(self):
+        ready = deque(task for task in self.tasks if task.status == 'ready')
+        waiting = []
+        while ready or waiting:
+            now = time.perf_counter()
+            while waiting and waiting[0][0] <= now:
+                ready.append(heapq.heappop(waiting)[2])
+            if not ready:
+                time.sleep(waiting[0][0] - now)
+                continue
+            task = ready.popleft()
+            flow = task.vm.flow
+            flow.begin()
+            self.turns += 1
+            try:
+                task.vm.execute(task.bytecode, task.pc)
+            except Exception as e:
+                task.status, task.error = 'error', f"{type(e).__name__}: {e}"
+                continue
+            task.pc = task.vm.pc
+            if flow.status == 'quantum':
+                ready.append(task)
+            elif flow.status == 'throttled':
+                heapq.heappush(waiting, (flow.wake, id(task), task))
+            else:
+                task.status = flow.status or 'done'
+        return self.tasks
+
+    def stats(self):
+        return {"tasks": len(self.tasks), "turns": self.turns,
+                "per_task": {task.name: dict(task.vm.flow.stats(), status=task.status) for task in self.tasks}}
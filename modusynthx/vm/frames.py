@@ -0,0 +1,62 @@
+# --- Call Frames ---
+# A Frame holds what one CALL needs: the pc of the CALL (execution resumes just
+# after it), the argument count and a fixed-size array of local slots assigned
+# at compile time. FramePool keeps released frames in free lists keyed by slot
+# count, so a call in a hot loop or deep recursion reuses storage instead of
+# allocating a new frame and slot list each time.
+
+
+class Frame:
+    __slots__ = ('return_pc', 'argc', 'slots')
+
+    def __init__(self, return_pc, argc, size):
+        self.return_pc = return_pc
+        self.argc = argc
+        self.slots = [0] * size
+
+    def __repr__(self):
+        return f"Frame(return_pc={self.return_pc}, argc={self.argc}, slots={self.slots!r})"
+
+
+class FramePool:
+    def __init__(self, limit=1024):
+        self.limit = limit    # free frames kept per slot count
+        self.free = {}
+        self.zeros = {}
+        self.allocated = 0
+        self.reused = 0
+
+    # Take a frame with `size` zeroed slots, moving `argc` arguments off the stack
+    def acquire(self, return_pc, argc, size, stack=None):
+        free = self.free.get(size)
+        if free:
+            frame = free.pop()
+            frame.return_pc = return_pc
+            frame.argc = argc
+            self.reused += 1
+        else:
+            frame = Frame(return_pc, argc, size)
+            self.allocated += 1
+        slots = frame.slots
+        for i in range(argc - 1, -1, -1):
+            slots[i] = stack.pop()
+        return frame
+
+    # Return a frame to the pool; its slots are zeroed in place for the next call
+    def release(self, frame):
+        size = len(frame.slots)
+        free = self.free.setdefault(size, [])
+        if len(free) < self.limit:
+            if size:
+                zeros = self.zeros.get(size)
+                if zeros is None:
+                    zeros = self.zeros[size] = (0,) * size
+                frame.slots[:] = zeros
+            free.append(frame)
+
+    def stats(self):
+        return {
+            "allocated": self.allocated,
+            "reused": self.reused,
+            "free": sum(len(free) for free in self.free.values()),
+        }
@@ -0,0 +1,119 @@
+# Updated VM to support all instructions
+from ..opcodes import extended_instruction_set
+
+# Every opcode is a module constant, so a test in the dispatch chain is one
+# global load and compare, tested roughly in order of how often it runs:
+# variable loads and stores, int arithmetic and branches first. The typed forms
+# from compiler.typed.specialize run the same operators as the generic ones
+# (CPython already picks the int or float routine); what they buy is placement
+# - the int forms loop counters use sit with the hot opcodes - and a literal
+# WRITE decoded once at compile time.
+(READ, WRITE, STORE, ADD, SUB, MUL, DIV, MOD, JUMP, JZ, JNZ, PRINT, END) = (
+    extended_instruction_set[n] for n in
+    ('READ', 'WRITE', 'STORE', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'JUMP', 'JZ', 'JNZ', 'PRINT', 'END'))
+WRITEK = extended_instruction_set['WRITEK']
+WRITEV = extended_instruction_set['WRITEV']
+ADD_I, SUB_I, MUL_I, DIV_I, MOD_I = (extended_instruction_set[n + '_I'] for n in ('ADD', 'SUB', 'MUL', 'DIV', 'MOD'))
+ADD_F, SUB_F, MUL_F, DIV_F, MOD_F = (extended_instruction_set[n + '_F'] for n in ('ADD', 'SUB', 'MUL', 'DIV', 'MOD'))
+
+
+class FullVM:
+    def __init__(self):
+        self.vrma = {}
+        self.stack = []
+        self.running = False
+        self.out = None  # file PRINT writes to (None: sys.stdout)
+
+    def execute(self, bytecode):
+        self.running = True
+        pc = 0
+        while pc < len(bytecode) and self.running:
+            opcode, args = bytecode[pc]
+
+            if opcode == READ:
+                self.stack.append(self.vrma.get(args[0], 0))
+            elif opcode == STORE:
+                self.vrma[args[0]] = self.stack.pop()
+            elif opcode == WRITEK:
+                self.vrma[args[0]] = args[1]
+            elif opcode == ADD_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a + b)
+            elif opcode == SUB_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a - b)
+            elif opcode == JNZ:
+                val = self.stack.pop()
+                if val != 0:
+                    pc = args[0] - 1
+            elif opcode == JZ:
+                val = self.stack.pop()
+                if val == 0:
+                    pc = args[0] - 1
+            elif opcode == JUMP:
+                pc = args[0] - 1
+            elif opcode == ADD:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a + b)
+            elif opcode == SUB:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a - b)
+            elif opcode == MUL_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a * b)
+            elif opcode == MUL:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a * b)
+            elif opcode == WRITEV:
+                self.vrma[args[0]] = self.vrma.get(args[1], 0)
+            elif opcode == WRITE:
+                self.vrma[args[0]] = self._evaluate(args[1:])
+            elif opcode == PRINT:
+                val = self.stack.pop()
+                print(val, file=self.out)
+            elif opcode == ADD_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a + b)
+            elif opcode == SUB_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a - b)
+            elif opcode == MUL_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a * b)
+            elif opcode == DIV_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a / b)
+            elif opcode == DIV_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a / b)
+            elif opcode == DIV:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a / b)
+            elif opcode == MOD_I:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a % b)
+            elif opcode == MOD_F:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a % b)
+            elif opcode == MOD:
+                b, a = self.stack.pop(), self.stack.pop()
+                self.stack.append(a % b)
+            elif opcode == END:
+                break
+            pc += 1
+
+    def stop(self):
+        self.running = False
+
+    # Clear run state in place so a pooled VM can be reused
+    def reset(self):
+        self.vrma.clear()
+        self.stack.clear()
+        self.running = False
+        self.out = None
+
+    def _evaluate(self, tokens):
+        try:
+            return int(tokens[0]) if tokens else 0
+        except ValueError:
+            return self.vrma.get(tokens[0], 0)
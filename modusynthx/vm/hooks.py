@@ -0,0 +1,71 @@
+# --- VM Instrumentation Hooks ---
+# A VM checks its hooks once per execute() call. With nothing registered it
+# runs the plain interpreter loop; otherwise it switches to the traced loop,
+# which is the only place events are emitted.
+
+HOOK_EVENTS = (
+    'instruction',  # fn(vm, pc, opcode, args)
+    'call',         # fn(vm, pc, target)
+    'ret',          # fn(vm, pc, return_pc)
+    'page_switch',  # fn(vm, old_index, new_index)
+    'sift',         # fn(vm, freed_names)
+    'infer',        # fn(vm, payload, result)
+)
+
+
+class VMHooks:
+    def __init__(self):
+        self.handlers = {event: [] for event in HOOK_EVENTS}
+        self.count = 0
+
+    def add(self, event, fn):
+        if event not in self.handlers:
+            raise ValueError(f"Unknown hook event: {event}")
+        self.handlers[event].append(fn)
+        self.count += 1
+        return fn
+
+    def remove(self, event, fn):
+        if event not in self.handlers:
+            raise ValueError(f"Unknown hook event: {event}")
+        self.handlers[event].remove(fn)
+        self.count -= 1
+
+    def clear(self):
+        for fns in self.handlers.values():
+            fns.clear()
+        self.count = 0
+
+    def emit(self, event, vm, *payload):
+        for fn in self.handlers[event]:
+            fn(vm, *payload)
+
+    def __bool__(self):
+        return self.count > 0
+
+
+# Convenience tracer: records (pc, opcode) pairs for every instruction
+class InstructionTrace:
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.events = []
+
+    def __call__(self, vm, pc, opcode, args):
+        if self.limit is None or len(self.events) < self.limit:
+            self.events.append((pc, opcode))
+
+
+# Convenience metrics exporter: counts every event by name
+class EventCounter:
+    def __init__(self):
+        self.counts = {event: 0 for event in HOOK_EVENTS}
+
+    def attach(self, hooks):
+        for event in HOOK_EVENTS:
+            hooks.add(event, self._counter(event))
+        return self
+
+    def _counter(self, event):
+        def count(vm, *payload):
+            self.counts[event] += 1
+        return count
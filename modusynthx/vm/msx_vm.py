@@ -0,0 +1,98 @@
+# ModuSynthX Virtual Machine (VM) Implementation
+import random
+import time
+
+from ..opcodes import MSX_INSTRUCTION_SET as INSTRUCTION_SET
+
+
+# Virtual Register Memory Allocation (VRMA)
+class VirtualMemory:
+    def __init__(self):
+        self.registers = {}
+        self.counter = 0
+
+    def allocate(self, name, value=None):
+        self.registers[name] = {"id": self.counter, "value": value}
+        self.counter += 1
+
+    def read(self, name):
+        return self.registers.get(name, {}).get("value", None)
+
+    def write(self, name, value):
+        if name in self.registers:
+            self.registers[name]["value"] = value
+
+    def release(self, name):
+        if name in self.registers:
+            del self.registers[name]
+
+
+# Garbage Collection (Sifter)
+class GarbageCollector:
+    def __init__(self, memory):
+        self.memory = memory
+
+    def collect(self):
+        print("[SIFT] Running garbage collection...")
+        unused = [k for k, v in self.memory.registers.items() if v["value"] is None]
+        for reg in unused:
+            print(f"[SIFT] Discarding unused register: {reg}")
+            self.memory.release(reg)
+
+
+# Error Handling (Ping)
+def ping_check(instruction):
+    error_chance = random.random()
+    if error_chance < 0.1:  # Simulate a 10% error rate
+        print(f"[PING] Error detected in instruction: {instruction}")
+        print("[PING] Auto-correcting...")
+        return False
+    return True
+
+
+# AI Inference Simulation
+def ai_inference(data):
+    print("[AI] Processing data for inference...")
+    result = f"Inference result based on {data}"
+    return result
+
+
+# ModuSynthX VM Execution
+class ModuSynthXVM:
+    def __init__(self):
+        self.memory = VirtualMemory()
+        self.garbage_collector = GarbageCollector(self.memory)
+
+    def execute(self, instructions):
+        for instr in instructions:
+            opcode = instr.get("opcode")
+            args = instr.get("args", [])
+
+            if opcode == INSTRUCTION_SET["MODSET"]:
+                print(f"[MODSET] Applying modifier: {args[0]}")
+            elif opcode == INSTRUCTION_SET["WRITEOUT"]:
+                print(f"[WRITEOUT] Output: {args[0]}")
+            elif opcode == INSTRUCTION_SET["INFER"]:
+                result = ai_inference(args[0])
+                self.memory.allocate("inference_result", result)
+                print(f"[INFER] Result stored in memory.")
+            elif opcode == INSTRUCTION_SET["PING"]:
+                if not ping_check(instr):
+                    print("[PING] Execution corrected.")
+            elif opcode == INSTRUCTION_SET["FLOWCMP"]:
+                print("[FLOWCMP] Compressing memory flow...")
+            elif opcode == INSTRUCTION_SET["RELEASE"]:
+                print("[RELEASE] Releasing memory flow...")
+            elif opcode == INSTRUCTION_SET["SIFT"]:
+                self.garbage_collector.collect()
+            elif opcode == INSTRUCTION_SET["PAUSE"]:
+                print("[PAUSE] Execution paused.")
+                time.sleep(1)
+            elif opcode == INSTRUCTION_SET["END"]:
+                print("[END] Execution complete.")
+                break
+
+    # Clear run state in place so a pooled VM can be reused
+    def reset(self):
+        self.memory.registers.clear()
+        self.memory.counter = 0
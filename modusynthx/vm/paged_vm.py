@@ -0,0 +1,85 @@
+# Page-managed VM from the advanced editor project (vm/advanced_vm.py)
+import threading
+
+
+class MemoryPage:
+    def __init__(self):
+        self.data = [0] * 256
+        self.used = [False] * 256
+
+    def allocate(self, value):
+        for i in range(256):
+            if not self.used[i]:
+                self.used[i] = True
+                self.data[i] = value
+                return i
+        raise MemoryError("Page Full")
+
+    def free(self, index):
+        self.used[index] = False
+        self.data[index] = 0
+
+
+class MemoryManager:
+    def __init__(self):
+        self.pages = [MemoryPage()]
+
+    def allocate(self, value):
+        for page in self.pages:
+            try:
+                return page.allocate(value)
+            except MemoryError:
+                continue
+        new_page = MemoryPage()
+        self.pages.append(new_page)
+        return new_page.allocate(value)
+
+
+class AdvancedVM:
+    def __init__(self):
+        self.stack = []
+        self.running = True
+        self.memory = MemoryManager()
+        self.out = None  # file PRINT writes to (None: sys.stdout)
+
+    def execute(self, bytecode):
+        pc = 0
+        while pc < len(bytecode) and self.running:
+            opcode, args = bytecode[pc]
+            if opcode == 0x12:
+                b = self.stack.pop()
+                a = self.stack.pop()
+                self.stack.append(a + b)
+            elif opcode == 0x13:
+                b = self.stack.pop()
+                a = self.stack.pop()
+                self.stack.append(a - b)
+            elif opcode == 0x1A:
+                val = self.stack.pop()
+                print(val, file=self.out)
+            elif opcode == 0x30:
+                pass  # function entry handled by compiler
+            elif opcode == 0x31:
+                pc = args[0] - 1
+            elif opcode == 0x32:
+                return
+            elif opcode == 0x40:
+                thread = threading.Thread(target=self.execute, args=(args[0],))
+                thread.start()
+            elif opcode == 0xFF:
+                break
+            pc += 1
+
+    def stop(self):
+        self.running = False
+
+    # Clear run state in place so a pooled VM can be reused: the first page is
+    # zeroed and kept, later pages are dropped
+    def reset(self):
+        self.stack.clear()
+        first = self.memory.pages[0]
+        first.data[:] = [0] * len(first.data)
+        first.used[:] = [False] * len(first.used)
+        del self.memory.pages[1:]
+        self.running = True
+        self.out = None
@@ -0,0 +1,300 @@
+# --- Persistent % Variables ---
+# The spec's "%" Virtual Memory Space: variables named %name outlive the run.
+# advanced_clv_compile turns their reads and writes into LOADP/STOREP/WRITEP/
+# MOVEP, and AdvancedVM sends those to vm.persist - a plain dict by default, or
+# a PersistentStore to keep them in a file between processes.
+#
+# File layout: b"MSXP", a version byte, then append-only records
+#
+#   crc32 u32 | value length u32 | kind u8 | key length u16 | key | value
+#
+# with the CRC taken over everything after itself. kind is SET or DELETE, and
+# values use the tagged encoding of vm/snapshot.py. The key -> (offset, length)
+# index is saved next to the data as <path>.idx on close() and compact(): the
+# offsets as one packed array and the keys as one NUL-separated blob, tagged
+# with the data file's inode and the size it covers. Opening a store loads that
+# index in bulk and scans, through an mmap, only the record headers appended
+# after it (or every header, when the index is missing or stale). A value is
+# decoded, and its CRC checked, the first time it is read. Records are
+# appended whole (a failed append is truncated away), so a crash can leave at
+# most a torn tail, which the open-time scan finds (the records in the last
+# TAIL_CHECK bytes are CRC-checked) and truncates. compact() rewrites the live
+# records to a temporary file and renames it into place; it also runs on its
+# own once more than half of a file past COMPACT_MIN is dead.
+import mmap
+import os
+import struct
+from array import array
+import threading
+import zlib
+
+from .snapshot import decode, encode
+
+MAGIC = b"MSXP"
+VERSION = 1
+HEADER = len(MAGIC) + 1
+RECORD = struct.Struct("<IIBH")
+SET, DELETE = 1, 2
+TAIL_CHECK = 64 * 1024
+INDEX_MAGIC = b"MSXI"
+# magic, version, entry typecode ("I" below 4 GiB, else "Q"), inode, covered size, dead bytes, keys
+INDEX_HEADER = struct.Struct("<4sBcQQQI")
+COMPACT_MIN = 1 << 20
+
+
+class StoreError(ValueError):
+    pass
+
+
+class PersistentStore:
+    def __init__(self, path, durable=False):
+        self.path = path
+        self.durable = durable    # fsync after every write, not only on flush()/close()
+        self.lock = threading.RLock()
+        self.index = {}           # key -> (value offset, value length)
+        self.values = {}          # keys decoded so far (and everything written)
+        self.dead = 0             # bytes held by overwritten or deleted records
+        self.reads = 0            # values decoded from the file
+        self._open()
+
+    # --- Opening and scanning ---
+
+    def _open(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self.fd = fd
+        if os.fstat(fd).st_size == 0:
+            try:
+                self._write(MAGIC + bytes([VERSION]))
+            except StoreError:
+                os.close(fd)
+                raise
+        self.map = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        if self.map[:4] != MAGIC or len(self.map) < HEADER:
+            self._abandon()
+            raise StoreError(f"{self.path} is not a ModuSynthX store")
+        if self.map[4] != VERSION:
+            version = self.map[4]
+            self._abandon()
+            raise StoreError(f"unsupported store version: {version}")
+        self._scan()
+
+    # Let go of a file that is not ours without writing to it or its index
+    def _abandon(self):
+        self.map.close()
+        os.close(self.fd)
+        self.fd = None
+
+    def _load_index(self):
+        try:
+            with open(self.path + ".idx", "rb") as f:
+                raw = f.read()
+            magic, version, typecode, inode, covered, dead, count = INDEX_HEADER.unpack_from(raw)
+        except (OSError, struct.error):
+            return None
+        if magic != INDEX_MAGIC or version != VERSION or typecode not in (b"I", b"Q") \
+                or inode != os.fstat(self.fd).st_ino or not HEADER <= covered <= len(self.map):
+            return None
+        entries = array(typecode.decode())
+        end = INDEX_HEADER.size + 3 * entries.itemsize * count
+        entries.frombytes(raw[INDEX_HEADER.size:end])
+        keys = raw[end:].split(b"\0") if count else []
+        if len(entries) != 3 * count or len(keys) != count:
+            return None
+        it = iter(entries)
+        index = dict(zip((key.decode() for key in keys), zip(it, it, it)))
+        return index, covered, dead
+
+    def _save_index(self):
+        keys = list(self.index)
+        if any("\0" in key for key in keys):
+            return  # not representable; the next open scans the file instead
+        size = os.fstat(self.fd).st_size
+        typecode = "I" if size < 1 << 32 else "Q"
+        entries = array(typecode)
+        for entry in self.index.values():
+            entries.extend(entry)
+        tmp = self.path + ".idx.tmp"
+        with open(tmp, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, VERSION, typecode.encode(), os.fstat(self.fd).st_ino, size,
+                                      self.dead, len(keys)))
+            f.write(entries.tobytes())
+            f.write("\0".join(keys).encode())
+        os.replace(tmp, self.path + ".idx")
+
+    def _scan(self):
+        data, size = self.map, len(self.map)
+        pos, index, dead = HEADER, {}, 0
+        loaded = self._load_index()
+        if loaded is not None:
+            index, pos, dead = loaded
+        while pos + RECORD.size <= size:
+            crc, length, kind, key_length = RECORD.unpack_from(data, pos)
+            key_start = pos + RECORD.size
+            end = key_start + key_length + length
+            if end > size or kind not in (SET, DELETE):
+                break
+            if end > size - TAIL_CHECK and zlib.crc32(data[pos + 4:end]) != crc:
+                break
+            key = str(data[key_start:key_start + key_length], "utf-8")
+            old = index.pop(key, None)
+            if old is not None:
+                dead += old[2]
+            if kind == SET:
+                index[key] = (key_start + key_length, length, end - pos)
+            else:
+                dead += end - pos
+            pos = end
+        if pos < size:
+            # Torn or corrupt tail from an interrupted write: drop it
+            self.map.close()
+            os.ftruncate(self.fd, pos)
+            self.map = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+        self.index = index
+        self.dead = dead
+
+    # --- Mapping interface ---
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.values:
+                return self.values[key]
+            entry = self.index.get(key)
+            if entry is None:
+                return default
+            value = self.values[key] = self._read(key, entry)
+            return value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = encode(value)
+        with self.lock:
+            self._append(SET, key, data)
+            self.values[key] = value
+
+    def __delitem__(self, key):
+        with self.lock:
+            if key not in self.index:
+                raise KeyError(key)
+            self._append(DELETE, key, b"")
+            self.values.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(list(self.index))
+
+    def keys(self):
+        return list(self.index)
+
+    def items(self):
+        return [(key, self.get(key)) for key in self.keys()]
+
+    # --- Records ---
+
+    def _read(self, key, entry):
+        offset, length, size = entry
+        if offset + length > len(self.map):
+            self._remap()
+        record = self.map[offset + length - size:offset + length]
+        crc = RECORD.unpack_from(record)[0]
+        if zlib.crc32(record[4:]) != crc:
+            raise StoreError(f"corrupt record for {key!r} in {self.path}")
+        self.reads += 1
+        return decode(record[size - length:])
+
+    def _append(self, kind, key, data):
+        raw_key = key.encode()
+        body = RECORD.pack(0, len(data), kind, len(raw_key))[4:] + raw_key + data
+        record = struct.pack("<I", zlib.crc32(body)) + body
+        offset = os.fstat(self.fd).st_size
+        self._write(record, offset)
+        if self.durable:
+            os.fsync(self.fd)
+        old = self.index.pop(key, None)
+        if old is not None:
+            self.dead += old[2]
+        if kind == SET:
+            self.index[key] = (offset + RECORD.size + len(raw_key), len(data), len(record))
+        else:
+            self.dead += len(record)
+        if self.dead > COMPACT_MIN and self.dead * 2 > offset + len(record):
+            self.compact()
+
+    # os.write until all of `data` is in the file; on failure the file is cut
+    # back to `offset`, so a later record is never appended after a torn one
+    def _write(self, data, offset=0):
+        view = memoryview(data)
+        try:
+            while view:
+                written = os.write(self.fd, view)
+                if not written:
+                    raise OSError("no bytes written")
+                view = view[written:]
+        except OSError as e:
+            os.ftruncate(self.fd, offset)
+            raise StoreError(f"cannot write to {self.path}: {e}") from e
+
+    def _remap(self):
+        self.map.close()
+        self.map = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+
+    # Rewrite the file with only the live records; raw record bytes are copied, not decoded
+    def compact(self):
+        with self.lock:
+            self._remap()
+            tmp = self.path + ".compact"
+            index = {}
+            with open(tmp, "wb") as out:
+                out.write(MAGIC + bytes([VERSION]))
+                pos = HEADER
+                for key, (offset, length, size) in self.index.items():
+                    out.write(self.map[offset + length - size:offset + length])
+                    index[key] = (pos + size - length, length, size)
+                    pos += size
+                out.flush()
+                os.fsync(out.fileno())
+            self.map.close()
+            os.close(self.fd)
+            os.replace(tmp, self.path)
+            self.fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+            self.map = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+            self.index = index
+            self.dead = 0
+            self._save_index()
+
+    def flush(self):
+        with self.lock:
+            os.fsync(self.fd)
+
+    def close(self):
+        with self.lock:
+            if self.fd is None:
+                return
+            self.map.close()
+            os.fsync(self.fd)
+            self._save_index()
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self):
+        with self.lock:
+            return {"keys": len(self.index), "loaded": len(self.values), "reads": self.reads,
+                    "file_bytes": os.fstat(self.fd).st_size, "dead_bytes": self.dead}
+
+
+_MISSING = object()
@@ -0,0 +1,80 @@
+# --- Modifier Execution Policies ---
+# The advanced compiler turns statement modifiers into MODE instructions (see
+# MODIFIER_POLICY in opcodes.py), and AdvancedVM runs each stretch of code
+# under its policy:
+#
+#   optimized  quick, fast     the plain fast loop
+#   lowpower   lowpower, idle  spare frames dropped and private pages compacted
+#                              on entry; every LOWPOWER_QUANTUM taken jumps the
+#                              VM yields the GIL so other VMs and threads go
+#                              first (loops always jump, straight code ends)
+#   heavy      heavy           THREAD tasks run on a shared worker pool instead
+#                              of a new thread each
+#
+# ModifierStats collects per-modifier counters for a VM and every child it
+# spawns: entries, seconds, and the policy's own counters.
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+OPTIMIZED = 'optimized'
+LOWPOWER = 'lowpower'
+HEAVY = 'heavy'
+
+LOWPOWER_QUANTUM = 16               # taken jumps between yields in lowpower mode
+HEAVY_WORKERS = max(2, os.cpu_count() or 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+_worker = threading.local()
+
+
+class ModifierStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, modifier, policy, **counters):
+        with self.lock:
+            entry = self.counts.get(modifier)
+            if entry is None:
+                entry = self.counts[modifier] = {"policy": policy, "entries": 0, "seconds": 0.0}
+            for key, value in counters.items():
+                entry[key] = entry.get(key, 0) + value
+
+    def snapshot(self):
+        with self.lock:
+            return {modifier: dict(entry) for modifier, entry in self.counts.items()}
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+
+
+def _start_worker():
+    _worker.active = True
+
+
+# True on a pool worker; its own heavy spawns get plain threads so pooled tasks
+# never wait on each other for a worker
+def in_worker():
+    return getattr(_worker, "active", False)
+
+
+# Run fn() on the shared heavy pool; returns a Future. An exception is printed
+# as an uncaught one in a thread would be, so result() never raises.
+def submit(fn):
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(HEAVY_WORKERS, "msx-heavy", _start_worker)
+
+    def run():
+        try:
+            fn()
+        except Exception:
+            traceback.print_exc()
+
+    return _pool.submit(run)
@@ -0,0 +1,56 @@
+# --- VM Pools ---
+# A VMPool hands out ready-made VMs so a short run does not pay for building a
+# VM (and its stack, pages, frame pool, hooks) every time. Released VMs are
+# reset() in place and kept; a VM class without reset(), or whose reset()
+# returns False (a THREAD task would not exit), is dropped and rebuilt.
+# `limit` caps how many VMs exist at once, which is also how many runs can
+# execute concurrently; acquire() blocks until one is free.
+import threading
+
+
+class VMPool:
+    def __init__(self, factory, limit=4):
+        self.factory = factory
+        self.limit = limit
+        self.idle = []
+        self.live = 0             # VMs handed out or idle
+        self.cond = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0          # VMs released but not reusable
+
+    def acquire(self, timeout=None):
+        with self.cond:
+            if self.idle:
+                self.reused += 1
+                return self.idle.pop()
+            if not self.cond.wait_for(lambda: self.idle or self.live < self.limit, timeout):
+                raise TimeoutError(f"no free VM after {timeout}s ({self.limit} in use)")
+            if self.idle:
+                self.reused += 1
+                return self.idle.pop()
+            self.live += 1
+            self.created += 1
+        try:
+            return self.factory()
+        except BaseException:
+            with self.cond:
+                self.live -= 1
+                self.cond.notify()
+            raise
+
+    def release(self, vm):
+        reset = getattr(vm, 'reset', None)
+        reusable = reset is not None and reset() is not False
+        with self.cond:
+            if reusable:
+                self.idle.append(vm)
+            else:
+                self.live -= 1
+                self.dropped += reset is not None
+            self.cond.notify()
+
+    def stats(self):
+        with self.cond:
+            return {"limit": self.limit, "live": self.live, "idle": len(self.idle),
+                    "created": self.created, "reused": self.reused, "dropped": self.dropped}
@@ -0,0 +1,227 @@
+# --- VM Snapshots ---
+# dump_vm() writes an AdvancedVM's state - pages, page index, operand stack,
+# call frames, queued tasks, vrma and the pc it stopped at - as a compact
+# binary image; load_vm() rebuilds it so that resume() continues the run.
+#
+# % variables are included when vm.persist is a plain dict; a PersistentStore
+# keeps its own file and is not copied into the image. The flow limits the run
+# set (deadlines as seconds left) and the modifier policy in force are kept.
+#
+# Layout: b"MSXS", a version byte, then one tagged value per field in FIELDS
+# order. Integers are zigzag varints, floats are 8-byte doubles, and strings are
+# written once and then referred to by index, so variable names repeated across
+# pages cost a byte or two after their first use. Running THREAD children are
+# not part of the image.
+import struct
+
+from .flow import FlowControl
+from .frames import Frame
+from .stack import RingStack
+
+MAGIC = b"MSXS"
+VERSION = 3
+
+NONE, FALSE, TRUE, INT, FLOAT, STR, STR_REF, LIST, TUPLE, DICT, BYTES = range(11)
+_DOUBLE = struct.Struct("<d")
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class _Writer:
+    def __init__(self):
+        self.out = bytearray()
+        self.strings = {}
+
+    def varint(self, n):
+        out = self.out
+        while n > 0x7F:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+
+    def value(self, v):
+        out = self.out
+        if v is None:
+            out.append(NONE)
+        elif v is True or v is False:
+            out.append(TRUE if v else FALSE)
+        elif type(v) is int:
+            out.append(INT)
+            self.varint(v << 1 if v >= 0 else (-v << 1) - 1)
+        elif type(v) is float:
+            out.append(FLOAT)
+            out += _DOUBLE.pack(v)
+        elif type(v) is str:
+            index = self.strings.get(v)
+            if index is not None:
+                out.append(STR_REF)
+                self.varint(index)
+            else:
+                self.strings[v] = len(self.strings)
+                data = v.encode()
+                out.append(STR)
+                self.varint(len(data))
+                out += data
+        elif type(v) in (list, tuple):
+            out.append(LIST if type(v) is list else TUPLE)
+            self.varint(len(v))
+            for item in v:
+                self.value(item)
+        elif type(v) is dict:
+            out.append(DICT)
+            self.varint(len(v))
+            for key, item in v.items():
+                self.value(key)
+                self.value(item)
+        elif type(v) is bytes:
+            out.append(BYTES)
+            self.varint(len(v))
+            out += v
+        else:
+            raise SnapshotError(f"cannot snapshot a value of type {type(v).__name__}")
+
+
+class _Reader:
+    def __init__(self, data, pos):
+        self.data = memoryview(data)
+        self.pos = pos
+        self.strings = []
+
+    def varint(self):
+        data, pos = self.data, self.pos
+        n = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return n
+            shift += 7
+
+    def value(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == INT:
+            n = self.varint()
+            return n >> 1 if not n & 1 else -((n + 1) >> 1)
+        if tag == STR_REF:
+            return self.strings[self.varint()]
+        if tag == STR:
+            length = self.varint()
+            v = str(self.data[self.pos:self.pos + length], "utf-8")
+            self.pos += length
+            self.strings.append(v)
+            return v
+        if tag == NONE:
+            return None
+        if tag in (FALSE, TRUE):
+            return tag == TRUE
+        if tag == FLOAT:
+            v = _DOUBLE.unpack_from(self.data, self.pos)[0]
+            self.pos += 8
+            return v
+        if tag in (LIST, TUPLE):
+            items = [self.value() for _ in range(self.varint())]
+            return items if tag == LIST else tuple(items)
+        if tag == DICT:
+            result = {}
+            for _ in range(self.varint()):
+                key = self.value()
+                result[key] = self.value()
+            return result
+        if tag == BYTES:
+            length = self.varint()
+            v = bytes(self.data[self.pos:self.pos + length])
+            self.pos += length
+            return v
+        raise SnapshotError(f"bad tag {tag} at offset {self.pos - 1}")
+
+
+# Single values in the same tagged encoding (used by vm/persist.py)
+def encode(value):
+    writer = _Writer()
+    writer.value(value)
+    return bytes(writer.out)
+
+
+def decode(data):
+    try:
+        return _Reader(data, 0).value()
+    except IndexError:
+        raise SnapshotError("truncated value")
+
+
+def dump(values):
+    writer = _Writer()
+    writer.out += MAGIC
+    writer.out.append(VERSION)
+    for v in values:
+        writer.value(v)
+    return bytes(writer.out)
+
+
+def load(data, count):
+    if data[:4] != MAGIC:
+        raise SnapshotError("not a ModuSynthX snapshot")
+    if data[4] != VERSION:
+        raise SnapshotError(f"unsupported snapshot version: {data[4]}")
+    reader = _Reader(data, 5)
+    try:
+        return [reader.value() for _ in range(count)]
+    except IndexError:
+        raise SnapshotError("truncated snapshot")
+
+
+FIELDS = ("pc", "page_index", "pages", "stack", "stack_config", "root_slots", "frames", "queue", "vrma", "persist",
+          "flow", "policy")
+
+
+def dump_vm(vm):
+    stack = vm.stack
+    config = (stack.capacity, stack.overflow) if isinstance(stack, RingStack) else None
+    return dump((
+        vm.pc,
+        vm.page_index,
+        vm.pages,
+        list(stack),
+        config,
+        vm.root_frame.slots,
+        [(f.return_pc, f.argc, f.slots) for f in vm.call_stack],
+        list(vm.queue.queue),
+        vm.vrma,
+        vm.persist if type(vm.persist) is dict else None,
+        vm.flow.state() if vm.flow is not None else None,
+        (vm.policy, vm.modifier),
+    ))
+
+
+def load_vm(data, vm):
+    (pc, page_index, pages, stack, config, root_slots, frames, queue, vrma, persist, flow,
+     (policy, modifier)) = load(data, len(FIELDS))
+    vm.pc = pc
+    vm.page_index = page_index
+    vm.pages = pages
+    vm.stack = RingStack(*config) if config else []
+    for value in stack:
+        vm.stack.append(value)
+    vm.root_frame = Frame(None, 0, 0)
+    vm.root_frame.slots = root_slots
+    vm.call_stack = []
+    for return_pc, argc, slots in frames:
+        frame = Frame(return_pc, argc, 0)
+        frame.slots = slots
+        vm.call_stack.append(frame)
+    vm.frame = vm.call_stack[-1] if vm.call_stack else vm.root_frame
+    for item in queue:
+        vm.queue.put(tuple(item))
+    vm.vrma = vrma
+    if persist is not None:
+        vm.persist = persist
+    if flow is not None:
+        vm.flow = FlowControl.from_state(flow)
+    if modifier is not None:
+        vm._mode(policy, modifier, entered=False)
+    return vm
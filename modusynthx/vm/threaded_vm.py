@@ -0,0 +1,81 @@
+# Core VM for Execution (Tk editor / threaded runs)
+import threading
+import time
+
+from ..opcodes import CLV_INSTRUCTION_SET as INSTRUCTION_SET
+from .stack import dedupe, keep_last, make_stack
+
+
+# Virtual Register Memory Allocation (VRMA)
+class VRMA:
+    def __init__(self):
+        self.registers = {}
+        self.counter = 0
+
+    def alloc(self, name):
+        if name not in self.registers:
+            self.registers[name] = {"value": None, "id": self.counter}
+            self.counter += 1
+
+    def write(self, name, value):
+        self.alloc(name)
+        self.registers[name]['value'] = value
+
+    def read(self, name):
+        return self.registers[name]['value'] if name in self.registers else None
+
+    def free_unused(self):
+        to_delete = [k for k, v in self.registers.items() if v['value'] is None]
+        for k in to_delete:
+            del self.registers[k]
+
+
+class ModuSynthX_VM:
+    def __init__(self, stack_capacity=None, overflow='spill'):
+        self.vrma = VRMA()
+        self.stack = make_stack(stack_capacity, overflow)
+        self.running = False
+        self.lock = threading.Lock()
+
+    def execute(self, bytecode):
+        self.running = True
+        pc = 0
+        while pc < len(bytecode) and self.running:
+            with self.lock:
+                opcode, args = bytecode[pc]
+
+                if opcode == INSTRUCTION_SET['OPTIMIZE']:
+                    dedupe(self.stack)  # Deduplicate in place
+                elif opcode == INSTRUCTION_SET['PING']:
+                    if not args or 'fail' in args:
+                        pass  # Failed pings are dropped instead of retried forever
+                elif opcode == INSTRUCTION_SET['FLOWCMP']:
+                    keep_last(self.stack, 256)  # Truncate stack in place
+                elif opcode == INSTRUCTION_SET['SIFT']:
+                    self.vrma.free_unused()
+                elif opcode == INSTRUCTION_SET['RELEASE']:
+                    self.stack.clear()
+                elif opcode == INSTRUCTION_SET['WRITE']:
+                    if len(args) >= 2:
+                        self.vrma.write(args[0], " ".join(args[1:]))
+                elif opcode == INSTRUCTION_SET['READ']:
+                    if args:
+                        val = self.vrma.read(args[0])
+                        self.stack.append(val)
+                elif opcode == INSTRUCTION_SET['PAUSE']:
+                    time.sleep(0.25)
+                elif opcode == INSTRUCTION_SET['END']:
+                    self.running = False
+            pc += 1
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+
+    # Clear run state in place so a pooled VM can be reused
+    def reset(self):
+        with self.lock:
+            self.vrma.registers.clear()
+            self.vrma.counter = 0
+            self.stack.clear()
+            self.running = False
@@ -0,0 +1,121 @@
+import functools
+import io
+import threading
+import time
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.opcodes import advanced_instruction_set
+from modusynthx.vm import AdvancedVM, EventCounter
+from modusynthx.vm import advanced_vm
+from modusynthx.vm.pool import VMPool
+
+COUNTDOWN = ["do WRITE n 5", "do WRITE one 1", "do LABEL top", "do READ n", "do PRINT", "do READ n", "do READ one",
+             "do SUB", "do STORE n", "do READ n", "do JNZ top"]
+
+PROGRAMS = {
+    "arith": ["do WRITE a 7", "do WRITE b 2", "do WRITE f 1.5", "do READ a", "do READ b", "do ADD", "do PRINT",
+              "do READ a", "do READ b", "do SUB", "do READ a", "do MUL", "do PRINT", "do READ a", "do READ b",
+              "do DIV", "do PRINT", "do READ a", "do READ b", "do MOD", "do PRINT", "do READ f", "do READ a",
+              "do ADD", "do READ f", "do SUB", "do READ f", "do MUL", "do READ f", "do DIV", "do READ b",
+              "do MOD", "do PRINT", "do WRITE c a", "do READ c", "do PRINT", "do END"],
+    "loop": COUNTDOWN + ["do END"],
+    "branches": ["do WRITE z 0", "do READ z", "do JZ zero", "do WRITE r 1", "do JUMP done", "do LABEL zero",
+                 "do WRITE r 2", "do LABEL done", "do READ r", "do PRINT", "do END"],
+    "calls": ["do WRITE x 3", "do READ x", "do READ x", "do CALL addsq", "do PRINT", "do CALL twice", "do END",
+              "do FUNC addsq a b", "do LOCAL t", "do READ a", "do READ b", "do MUL", "do STORE t", "do READ t",
+              "do READ a", "do ADD", "do WRITE t 0", "do RET",
+              "do FUNC twice", "do WRITE k 2", "do LABEL again", "do READ k", "do PRINT", "do READ k",
+              "do WRITE one 1", "do READ one", "do SUB", "do STORE k", "do READ k", "do JNZ again", "do RET"],
+    "pages": ["do WRITE x 1", "do PAGE", "do SWITCH 1", "do WRITE x 2", "do READ x", "do PRINT", "do SWITCH 0",
+              "do READ x", "do PRINT", "do SIFT x", "do READ x", "do PRINT", "do END"],
+    "stack": ["do WRITE a 1", "do READ a", "do READ a", "do READ a", "do OPTIMIZE", "do FLOWCMP", "do PRINT",
+              "do READ a", "do RELEASE", "do INFER hello", "do END"],
+    "persist": ["do WRITE %p 4", "do READ %p", "do READ %p", "do ADD", "do STORE %p", "do WRITE q %p",
+                "do WRITE %r q", "do READ %r", "do PRINT", "do END"],
+    "queue": ["do QUEUE 2 hi", "do QUEUE 1 lo", "do DISPATCH", "do END",
+              "do FUNC hi", "do WRITE s 'hi'", "do READ s", "do PRINT", "do RET",
+              "do FUNC lo", "do WRITE s 'lo'", "do READ s", "do PRINT", "do RET"],
+    "threads": ["do THREAD worker", "do JOIN", "do END", "do FUNC worker", "do WRITE w 9", "do READ w", "do PRINT",
+                "do RET"],
+    "policy": ["quick WRITE a 1", "heavy READ a", "heavy PRINT", "lowpower WRITE b 2", "lowpower READ b",
+               "lowpower PRINT", "do END"],
+    "flow": ["flow.quantum 1000", "flow.rate 1000000", "flow.burst 100000"] + COUNTDOWN + ["flow.unlimited",
+                                                                                             "do END"],
+}
+
+# Programs whose page reads the verifier cannot prove (SIFT, OPTIMIZE, other threads)
+UNVERIFIABLE = ("pages", "stack", "threads", "queue", "policy")
+
+
+def run(bytecode, traced):
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    if traced:
+        EventCounter().attach(vm.hooks)
+    vm.execute(bytecode)
+    return vm.out.getvalue().split(), vm.pages, list(vm.stack), dict(vm.persist)
+
+
+# _step repeats _execute_fast's dispatch so the plain loop stays inline; both
+# must behave the same for every opcode
+@pytest.mark.parametrize("name", list(PROGRAMS))
+@pytest.mark.parametrize("verify", [False, True])
+def test_traced_loop_matches_plain_loop(name, verify):
+    lines = PROGRAMS[name]
+    if verify and name in UNVERIFIABLE:
+        pytest.skip("not a verifiable program")
+    bytecode = advanced_clv_compile(lines, verify=verify)
+    assert run(bytecode, traced=False) == run(bytecode, traced=True)
+
+
+def test_every_opcode_is_dispatched():
+    covered = set()
+    for name, lines in PROGRAMS.items():
+        covered.update(op for op, _ in advanced_clv_compile(lines))
+        covered.update(op for op, _ in advanced_clv_compile(lines, typed=False, optimize=False))
+        if name not in UNVERIFIABLE:
+            covered.update(op for op, _ in advanced_clv_compile(lines, verify=True))
+    names = {code: name for name, code in advanced_instruction_set.items()}
+    missing = {names[code] for code in set(names) - covered} - {"PAUSE", "PING", "LABEL", "FUNC", "LOCAL", "TYPE",
+                                                                 "MACRO", "DEFINE"}
+    assert not missing
+
+
+def test_module_constants_match_the_opcode_table():
+    for name, code in advanced_instruction_set.items():
+        if hasattr(advanced_vm, name):
+            assert getattr(advanced_vm, name) == code, name
+
+
+SPIN = ["do THREAD spin", "do JOIN", "do END", "do FUNC spin", "do LABEL top", "do JUMP top"]
+
+
+def test_stop_reaches_thread_children():
+    vm = AdvancedVM()
+    runner = threading.Thread(target=vm.execute, args=(advanced_clv_compile(SPIN),), daemon=True)
+    runner.start()
+    while not vm.children:
+        time.sleep(0.01)
+    vm.stop()
+    runner.join(5)
+    assert not runner.is_alive()
+    assert vm.reset() is None and not vm.children   # the child may still be unwinding until reset() joins it
+
+
+def test_pool_drops_a_vm_whose_child_will_not_exit():
+    release = threading.Event()
+
+    def block(vm, pc, opcode, args):
+        if threading.current_thread() is not threading.main_thread():
+            release.wait(5)
+
+    pool = VMPool(AdvancedVM, 1)
+    vm = pool.acquire()
+    vm.hooks.add("instruction", block)
+    vm.execute(advanced_clv_compile(["do THREAD spin", "do END", "do FUNC spin", "do RET"]))
+    vm.reset = functools.partial(vm.reset, timeout=0.05)
+    pool.release(vm)
+    assert pool.stats()["dropped"] == 1 and pool.acquire() is not vm
+    release.set()
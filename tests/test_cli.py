@@ -0,0 +1,100 @@
+import io
+import json
+
+import pytest
+
+from modusynthx.cli import main
+
+COUNT = ["do WRITE x 2", "do WRITE y 3", "do READ x", "do READ y", "do ADD", "do PRINT", "do END"]
+
+
+def source(tmp_path, lines, name="prog.synth"):
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_run_prints_program_output(tmp_path, capsys):
+    assert main(["run", source(tmp_path, COUNT)]) == 0
+    assert capsys.readouterr().out.split() == ["5"]
+
+
+def test_compile_then_run_bytecode(tmp_path, capsys):
+    path = source(tmp_path, COUNT)
+    assert main(["compile", path]) == 0
+    with open(path[:-len(".synth")] + ".msxb") as f:
+        assert json.load(f)["tier"] == "advanced"
+    assert main(["run", path[:-len(".synth")] + ".msxb"]) == 0
+    assert capsys.readouterr().out.split() == ["5"]
+
+
+def test_tier_mismatch_is_an_error(tmp_path, capsys):
+    path = source(tmp_path, COUNT)
+    main(["compile", path])
+    assert main(["run", "-t", "full", path[:-len(".synth")] + ".msxb"]) == 1
+    assert "was compiled for tier 'advanced'" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("tier, lines, message", [
+    ("advanced", ["flow.bogus 3"], "Unknown flow setting"),
+    ("advanced", ["flow.rate"], "takes one number"),
+    ("advanced", ["do MACRO A B", "do MACRO B A", "do A"], "Recursive macro"),
+    ("advanced", ["do TYPE x int", "do WRITE x 'text'", "do END"], "declared int"),
+    ("full", ["do WRITE"], "IndexError"),
+])
+def test_compile_errors_are_reported_not_raised(tmp_path, capsys, tier, lines, message):
+    assert main(["run", "-t", tier, source(tmp_path, lines)]) == 1
+    err = capsys.readouterr().err
+    assert err.startswith("msx: error: ") and message in err
+
+
+def test_module_compile_errors_are_reported(tmp_path, capsys):
+    source(tmp_path, ["do MACRO A B", "do MACRO B A", "do FUNC f", "do A", "do RET"], "lib.synth")
+    source(tmp_path, ["do TYPE x str", "do FUNC g", "do WRITE x 1", "do RET"], "other.synth")
+    assert main(["run", source(tmp_path, ["do IMPORT lib", "do END"])]) == 1
+    assert "Recursive macro" in capsys.readouterr().err
+    assert main(["run", source(tmp_path, ["do IMPORT other", "do CALL g", "do END"], "main2.synth")]) == 1
+    assert "declared str" in capsys.readouterr().err
+
+
+def test_disasm_lists_opcodes(tmp_path, capsys):
+    assert main(["disasm", source(tmp_path, ["do WRITE x 2", "do READ x", "do PRINT", "do END"])]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[2] for line in lines] == ["WRITEK", "READ", "PRINT", "END"]
+
+
+def test_disasm_ir_is_json(tmp_path, capsys):
+    assert main(["disasm", "--ir", source(tmp_path, COUNT)]) == 0
+    assert json.loads(capsys.readouterr().out)["blocks"]
+
+
+def test_listing_round_trips_through_run(tmp_path, capsys):
+    path = source(tmp_path, ["write.quick.on @console 'hi'", "pause.briefly"])
+    assert main(["disasm", "-t", "msx", "--listing", path]) == 0
+    listing = tmp_path / "prog.lst"
+    listing.write_text(capsys.readouterr().out)
+    assert main(["run", str(listing)]) == 0
+
+
+def test_compile_to_stdout_and_run_from_stdin(tmp_path, capsys, monkeypatch):
+    assert main(["compile", "-o", "-", source(tmp_path, COUNT)]) == 0
+    compiled = capsys.readouterr().out
+    assert json.loads(compiled)["format"] == "msx-bytecode"
+    monkeypatch.setattr("sys.stdin", io.StringIO(compiled))
+    assert main(["run", "-"]) == 0
+    assert capsys.readouterr().out.split() == ["5"]
+
+
+def test_missing_file(tmp_path, capsys):
+    assert main(["run", str(tmp_path / "nope.synth")]) == 1
+    assert "cannot read" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("tier, lines, message", [
+    ("advanced", ["do PRINT"], "at pc 0: IndexError: pop from empty list"),
+    ("full", ["do WRITE x 0", "do READ x", "do READ x", "do DIV", "do PRINT"], "ZeroDivisionError"),
+])
+def test_runtime_errors_are_reported_not_raised(tmp_path, capsys, tier, lines, message):
+    assert main(["run", "-t", tier, source(tmp_path, lines)]) == 1
+    err = capsys.readouterr().err
+    assert err.startswith("msx: error: runtime error") and message in err
@@ -0,0 +1,74 @@
+import threading
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.vm import AdvancedVM
+from modusynthx.vm.cow import PageRefs
+
+
+def test_writable_copies_shared_page_and_keeps_sole_page():
+    refs = PageRefs()
+    page = {"a": 1}
+    mine, theirs = [page], [page]
+    refs.share(mine)
+    copy = refs.writable(mine, 0)
+    assert copy is not page and copy == {"a": 1}
+    assert mine[0] is copy
+    assert refs.refcount(page) == 1
+    assert refs.writable(theirs, 0) is page
+
+
+class _SlowPage(dict):
+    # Overriding __iter__ makes dict() copy through keys(), so the copy can be
+    # caught midway
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.copying = threading.Event()
+        self.written = threading.Event()
+
+    def keys(self):
+        self.copying.set()
+        self.written.wait(0.2)
+        return super().keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+
+def test_copy_never_sees_the_last_holders_writes():
+    refs = PageRefs()
+    page = _SlowPage({"a": 1})
+    mine, theirs = [page], [page]
+    refs.share(mine)
+
+    def writer():
+        page.copying.wait(1)
+        target = refs.writable(theirs, 0)
+        target["late"] = 1
+        page.written.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    copy = refs.writable(mine, 0)
+    thread.join()
+    assert "late" not in copy
+    assert page["late"] == 1
+
+
+def test_thread_writes_stay_in_the_task():
+    bytecode = advanced_clv_compile([
+        "do WRITE x 1", "do THREAD task", "do JOIN", "do READ x", "do STORE seen", "do END",
+        "do FUNC task", "do WRITE x 2", "do READ x", "do STORE %task_x", "do RET",
+    ])
+    vm = AdvancedVM()
+    vm.execute(bytecode)
+    assert vm.pages[0]["seen"] == 1
+    assert vm.persist["%task_x"] == 2
+
+
+def test_fork_is_isolated_from_parent():
+    vm = AdvancedVM()
+    vm.execute(advanced_clv_compile(["do WRITE x 1", "do END"]))
+    child = vm.fork()
+    child.execute(advanced_clv_compile(["do WRITE x 5", "do END"]))
+    assert vm.pages[0]["x"] == 1
+    assert child.pages[0]["x"] == 5
@@ -0,0 +1,103 @@
+import os
+import socket
+import tempfile
+import threading
+
+import pytest
+
+from modusynthx.cli import main
+from modusynthx.daemon import DaemonClient, DaemonError, VMDaemon
+
+COUNT = ["do WRITE x 2", "do WRITE y 3", "do READ x", "do READ y", "do ADD", "do PRINT", "do END"]
+
+
+@pytest.fixture
+def daemon():
+    with tempfile.TemporaryDirectory() as folder:   # pytest's tmp_path can be too long for AF_UNIX
+        server = VMDaemon(os.path.join(folder, "msx.sock"), workers=2, tiers=("full", "advanced"), timeout=0.5)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+        thread.join(5)
+
+
+def test_run_compile_and_rerun_by_id(daemon):
+    with DaemonClient(daemon.path) as client:
+        first = client.request({"op": "run", "tier": "advanced", "source": COUNT})
+        assert first["output"] == "5\n" and not first["cached"] and not first["timed_out"]
+        again = client.request({"op": "run", "tier": "advanced", "source": COUNT})
+        assert again["cached"] and again["program"] == first["program"]
+        assert client.request({"op": "run", "program": first["program"]})["output"] == "5\n"
+        compiled = client.request({"op": "compile", "tier": "full", "source": COUNT})
+        assert "output" not in compiled
+        stats = client.request({"op": "stats"})
+    assert stats["requests"] == 5 and stats["pools"]["advanced"]["idle"] >= 1
+
+
+@pytest.mark.parametrize("message, error", [
+    ({"op": "bogus"}, "unknown op"),
+    ({"op": "run", "tier": "paged", "source": COUNT}, "not served here"),
+    ({"op": "run", "program": "nope"}, "unknown program"),
+    ({"op": "run", "tier": "advanced", "source": ["flow.bogus 3"]}, "Unknown flow setting"),
+])
+def test_bad_requests_get_errors_and_keep_the_connection(daemon, message, error):
+    with DaemonClient(daemon.path) as client:
+        with pytest.raises(DaemonError, match=error):
+            client.request(message)
+        assert client.request({"op": "run", "source": COUNT})["output"] == "5\n"
+
+
+def test_runaway_script_times_out_and_vm_is_reused(daemon):
+    with DaemonClient(daemon.path) as client:
+        reply = client.request({"op": "run", "tier": "advanced",
+                                "source": ["do LABEL top", "do JUMP top"]})
+        assert reply["timed_out"]
+        assert client.request({"op": "run", "tier": "advanced", "source": COUNT})["output"] == "5\n"
+
+
+def test_cli_runs_on_the_daemon(daemon, tmp_path, capsys):
+    path = tmp_path / "prog.synth"
+    path.write_text("\n".join(COUNT) + "\n")
+    assert main(["run", str(path), "--daemon", daemon.path]) == 0
+    assert capsys.readouterr().out == "5\n"
+    assert main(["run", str(path), "--daemon", daemon.path + ".missing"]) == 1
+    assert "cannot connect" in capsys.readouterr().err
+
+
+def test_unservable_tier():
+    with pytest.raises(ValueError, match="cannot be served"):
+        VMDaemon("unused.sock", tiers=("msx",))
+
+
+def test_timeout_stops_thread_children(daemon):
+    with DaemonClient(daemon.path) as client:
+        reply = client.request({"op": "run", "tier": "advanced", "source": [
+            "do THREAD spin", "do JOIN", "do END", "do FUNC spin", "do LABEL top", "do JUMP top"]})
+        assert reply["timed_out"]
+        assert client.request({"op": "run", "tier": "advanced", "source": COUNT})["output"] == "5\n"
+        assert client.request({"op": "stats"})["pools"]["advanced"]["dropped"] == 0
+
+
+def test_socket_path_in_use_is_left_alone(daemon, tmp_path):
+    regular = tmp_path / "notes.txt"
+    regular.write_text("keep me")
+    with pytest.raises(DaemonError, match="not a socket"):
+        VMDaemon(str(regular), tiers=("full",))
+    assert regular.read_text() == "keep me"
+    with pytest.raises(DaemonError, match="running daemon"):
+        VMDaemon(daemon.path, tiers=("full",))
+    with DaemonClient(daemon.path) as client:
+        assert client.request({"op": "run", "source": COUNT})["output"] == "5\n"
+
+
+def test_stale_socket_is_replaced():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "msx.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()   # the file stays, nothing listens
+        server = VMDaemon(path, tiers=("full",))
+        server.server_close()
+        assert not os.path.exists(path)
@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from modusynthx.cli import main
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.vm import AdvancedVM, FlowControl, FlowScheduler
+from modusynthx.vm.flow import TokenBucket
+
+
+def countdown(n, before=(), inside=()):
+    return advanced_clv_compile(
+        [f"do WRITE n {n}", "do WRITE one 1", *before, "do LABEL top", *inside,
+         "do READ n", "do READ one", "do SUB", "do STORE n", "do READ n", "do JNZ top", "do END"])
+
+
+def test_bucket_adjust_keeps_the_balance():
+    bucket = TokenBucket(100, 10)
+    now = bucket.stamp
+    assert bucket.take(10, now) == 0.0
+    bucket.adjust(rate=50, now=now)
+    assert bucket.tokens == 0.0 and bucket.rate == 50.0
+    bucket.adjust(burst=5, now=now + 1)
+    assert bucket.tokens == 5.0
+
+
+def test_quantum_slices_and_resume():
+    vm = AdvancedVM()
+    vm.flow = FlowControl(quantum=100)
+    bytecode = countdown(500)
+    vm.execute(bytecode)
+    assert vm.flow.status == "quantum" and vm.pages[0]["n"] > 0
+    while vm.flow.status == "quantum":
+        vm.flow.begin()
+        vm.resume(bytecode)
+    assert vm.pages[0]["n"] == 0
+
+
+def test_deadline_stops_a_runaway_loop():
+    vm = AdvancedVM()
+    vm.flow = FlowControl(deadline=0.05)
+    vm.execute(advanced_clv_compile(["do LABEL top", "do JUMP top"]))
+    assert vm.flow.status == "deadline"
+
+
+def test_program_cannot_lift_host_rate_or_burst():
+    for before, inside in ((("flow.burst 1000000",), ()), ((), ("flow.rate 100000",)),
+                          (("flow.unlimited",), ())):
+        flow = FlowControl(rate=2000)
+        flow.set("rate", 2000)
+        vm = AdvancedVM()
+        vm.flow = flow
+        start = time.perf_counter()
+        vm.execute(countdown(300, before, inside))
+        # Everything past the initial burst of 200 runs at 2000 a second
+        expected = (flow.executed - 200) / 2000
+        assert expected > 0.2
+        assert time.perf_counter() - start > 0.9 * expected, (before, inside)
+
+
+def test_host_ceilings_clamp_program_settings():
+    flow = FlowControl(quantum=50, rate=1000, burst=100)
+    flow.set("quantum", 500)
+    flow.set("rate", 5000)
+    flow.set("burst", 10 ** 6)
+    assert flow.quantum == 50
+    assert flow.bucket.rate == 1000 and flow.bucket.burst == 100
+    flow.set("rate", 10)
+    assert flow.bucket.rate == 10
+    flow.set("unlimited")
+    assert flow.bucket.rate == 1000
+
+
+def test_child_shares_the_parent_bucket():
+    flow = FlowControl(rate=1000)
+    child = flow.child()
+    child.set("rate", 10)
+    assert child.bucket is flow.bucket and flow.bucket.rate == 10
+
+
+def test_scheduler_finishes_every_task():
+    scheduler = FlowScheduler(quantum=50)
+    vms = [AdvancedVM() for _ in range(4)]
+    for vm in vms:
+        scheduler.add(vm, countdown(100))
+    tasks = scheduler.run()
+    assert [task.status for task in tasks] == ["done"] * 4
+    assert all(vm.pages[0]["n"] == 0 for vm in vms)
+    assert scheduler.turns > 4
+
+
+@pytest.mark.parametrize("line", ["flow.rate 0", "flow.rate -5", "flow.burst 0", "flow.quantum -1", "flow.quantum 0"])
+def test_limits_must_be_above_zero(line):
+    with pytest.raises(ValueError, match="must be above zero"):
+        advanced_clv_compile([line])
+    setting, value = line[len("flow."):].split()
+    with pytest.raises(ValueError, match="must be above zero"):
+        FlowControl(rate=100).set(setting, value)
+
+
+def test_cli_rejects_a_rate_of_zero_or_below(capsys):
+    for rate in ("0", "-1"):
+        with pytest.raises(SystemExit):
+            main(["run", "--rate", rate, "prog.synth"])
+        assert "must be above zero" in capsys.readouterr().err
@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.compiler.slots import assign_slots
+from modusynthx.vm import AdvancedVM
+from modusynthx.vm.frames import FramePool
+
+FACT = ["do WRITE n 6", "do READ n", "do CALL fact", "do PRINT", "do END",
+        "do FUNC fact k", "do LOCAL r", "do READ k", "do JZ base", "do READ k", "do READ k", "do WRITE one 1",
+        "do READ one", "do SUB", "do CALL fact", "do MUL", "do RET",
+        "do LABEL base", "do WRITE r 1", "do READ r", "do RET"]
+
+
+def test_pool_reuses_zeroed_frames():
+    pool = FramePool()
+    stack = [1, 2, 3]
+    frame = pool.acquire(7, 2, 4, stack)
+    assert frame.slots == [2, 3, 0, 0] and stack == [1] and frame.return_pc == 7
+    frame.slots[3] = "dirty"
+    pool.release(frame)
+    again = pool.acquire(9, 0, 4)
+    assert again is frame and again.slots == [0, 0, 0, 0] and again.return_pc == 9
+    assert pool.stats() == {"allocated": 1, "reused": 1, "free": 0}
+
+
+def test_pool_limit_bounds_free_lists():
+    pool = FramePool(limit=1)
+    frames = [pool.acquire(0, 0, 2) for _ in range(3)]
+    for frame in frames:
+        pool.release(frame)
+    assert pool.stats()["free"] == 1
+
+
+def test_recursion_uses_slots_and_recycles_frames():
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    vm.execute(advanced_clv_compile(FACT))
+    assert vm.out.getvalue().split() == ["720"]
+    assert "r" not in vm.pages[0] and "k" not in vm.pages[0]
+    assert vm.frames.allocated == 7 and vm.frames.stats()["free"] == 7
+    vm.execute(advanced_clv_compile(FACT))
+    assert vm.frames.allocated == 7 and vm.frames.reused == 7
+
+
+def test_slots_rewrite_only_locals():
+    statements = [("do", "FUNC", ["f", "a"]), ("do", "LOCAL", ["t"]), ("do", "READ", ["a"]),
+                  ("do", "WRITE", ["t", "3"]), ("do", "WRITE", ["g", "t"]), ("do", "READ", ["g"]), ("do", "RET", [])]
+    out, frames = assign_slots(statements)
+    assert [(cmd, args) for _, cmd, args in out[1:]] == [
+        ("LOADL", [0]), ("WRITEL", [1, 3]), ("LOADL", [1]), ("STORE", ["g"]), ("READ", ["g"]), ("RET", [])]
+    assert frames == {"f": (1, 2)}
+
+
+@pytest.mark.parametrize("lines, message", [
+    (["do LOCAL t", "do END"], "outside a function"),
+    (["do FUNC f a a", "do RET"], "Duplicate parameter"),
+])
+def test_slot_errors(lines, message):
+    with pytest.raises(ValueError, match=message):
+        advanced_clv_compile(lines)
@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import full_clv_compile
+from modusynthx.opcodes import extended_instruction_set
+from modusynthx.vm import full_vm
+from modusynthx.vm.full_vm import FullVM
+
+PROGRAM = ["do WRITE a 7", "do WRITE b 2", "do WRITE c a", "do READ a", "do READ b", "do DIV", "do STORE f",
+           "do READ a", "do READ b", "do ADD", "do PRINT", "do READ a", "do READ b", "do SUB", "do READ c", "do MUL",
+           "do PRINT", "do READ a", "do READ b", "do DIV", "do READ a", "do READ b", "do MOD", "do PRINT", "do PRINT",
+           "do READ f", "do READ a", "do ADD", "do READ f", "do SUB", "do READ f", "do MUL", "do READ f", "do DIV",
+           "do READ b", "do MOD", "do PRINT", "do WRITE n 3", "do WRITE one 1", "do LABEL top", "do READ n",
+           "do READ one", "do SUB", "do STORE n", "do READ n", "do JZ done", "do JUMP top", "do LABEL done",
+           "do READ n", "do JNZ top", "do READ n", "do PRINT", "do END", "do READ a", "do PRINT"]
+
+
+def run(bytecode):
+    vm = FullVM()
+    vm.out = io.StringIO()
+    vm.execute(bytecode)
+    return vm.out.getvalue().split(), vm.vrma
+
+
+@pytest.mark.parametrize("typed", [True, False])
+def test_typed_and_generic_forms_agree(typed):
+    assert run(full_clv_compile(PROGRAM, typed=typed)) == run(full_clv_compile(PROGRAM, typed=False))
+    assert run(full_clv_compile(PROGRAM, typed=typed))[0] == ["9", "35", "1", "3.5", "1.0", "0"]
+
+
+def test_module_constants_match_the_opcode_table():
+    for name, code in extended_instruction_set.items():
+        if hasattr(full_vm, name):
+            assert getattr(full_vm, name) == code, name
@@ -0,0 +1,49 @@
+import pytest
+
+tk = pytest.importorskip("tkinter")
+
+from modusynthx.gui.grid import GridModel, VirtualGrid  # noqa: E402
+
+
+def test_model_is_sparse_and_notifies():
+    model = GridModel(500, 500)
+    changed = []
+    model.listeners.append(lambda x, y: changed.append((x, y)))
+    model.set(2, 7, "x 1")
+    model.set(0, 7, "do WRITE")
+    model.set(1, 7, "  ")
+    model.set(2, 7, "x 1")
+    assert model.row_text(7) == "do WRITE x 1" and model.used_rows() == [7]
+    assert changed == [(2, 7), (0, 7), (1, 7)]
+    for x in range(3):
+        model.set(x, 7, "")
+    assert model.data == {} and model.get(0, 7) == "" and model.row_text(7) == ""
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    root.geometry("400x200")
+    yield root
+    root.destroy()
+
+
+def test_only_visible_cells_get_canvas_items(root):
+    model = GridModel(500, 500)
+    grid = VirtualGrid(root, model, cell_width=100, cell_height=20)
+    grid.pack(fill="both", expand=True)
+    root.update()
+    grid.redraw()
+    drawn = len(grid.items)
+    cols, rows = grid.visible()
+    assert drawn == len(cols) * len(rows) < 100
+    grid.see(300, 400)
+    root.update()
+    grid.redraw()
+    cols, rows = grid.visible()
+    assert len(grid.items) == len(cols) * len(rows) and (300, 400) in grid.items
+    # Scrolled-away items are recycled, not recreated
+    assert len(grid.canvas.find_all()) <= 2 * max(drawn, len(grid.items))
@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.opcodes import advanced_instruction_set as ops
+from modusynthx.vm import AdvancedVM, EventCounter, InstructionTrace, VMHooks
+
+PROGRAM = ["do WRITE x 1", "do CALL show", "do PAGE", "do SWITCH 1", "do SIFT x", "do INFER ping", "do END",
+           "do FUNC show", "do READ x", "do PRINT", "do LABEL again", "do RET"]
+
+
+def vm_with(*attach):
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    for fn in attach:
+        fn(vm.hooks)
+    return vm
+
+
+def test_registry_is_falsy_until_something_is_added():
+    hooks = VMHooks()
+    assert not hooks
+    fn = hooks.add("call", lambda vm, pc, target: None)
+    assert hooks
+    hooks.remove("call", fn)
+    assert not hooks
+    with pytest.raises(ValueError, match="Unknown hook event"):
+        hooks.add("bogus", fn)
+
+
+def test_events_are_emitted_only_with_handlers(monkeypatch):
+    bytecode = advanced_clv_compile(PROGRAM, inline=False)
+    plain = vm_with()
+    monkeypatch.setattr(VMHooks, "emit", lambda *a: pytest.fail("emit on the plain loop"))
+    plain.execute(bytecode)
+    monkeypatch.undo()
+
+    counter, trace = EventCounter(), InstructionTrace()
+    traced = vm_with(counter.attach, lambda hooks: hooks.add("instruction", trace))
+    traced.execute(bytecode)
+    assert counter.counts["call"] == 1 and counter.counts["ret"] == 1
+    assert counter.counts["page_switch"] == 1 and counter.counts["sift"] == 1 and counter.counts["infer"] == 1
+    assert counter.counts["instruction"] == len(trace.events) > len(bytecode) // 2
+    assert traced.out.getvalue() == plain.out.getvalue() == "1\n"
+
+
+def test_handlers_see_payloads():
+    seen = {}
+    trace = InstructionTrace(limit=3)
+
+    def attach(hooks):
+        hooks.add("instruction", trace)
+        hooks.add("page_switch", lambda vm, old, new: seen.setdefault("switch", (old, new)))
+        hooks.add("sift", lambda vm, freed: seen.setdefault("sift", freed))
+        hooks.add("call", lambda vm, pc, target: seen.setdefault("call", target))
+
+    bytecode = advanced_clv_compile(PROGRAM, inline=False)
+    vm_with(attach).execute(bytecode)
+    assert len(trace.events) == 3 and trace.events[0] == (0, bytecode[0][0])
+    assert seen["switch"] == (0, 1) and seen["sift"] == [] and bytecode[seen["call"]][0] == ops["READ"]
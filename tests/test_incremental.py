@@ -0,0 +1,47 @@
+import pytest
+
+from modusynthx.compiler import clv_compile
+from modusynthx.compiler.incremental import IncrementalCompiler
+
+ROWS = ["do WRITE x 1", "", "do LABEL top", "do READ x", "do PRINT", "do END"]
+
+
+def filled(rows):
+    compiler = IncrementalCompiler()
+    for row, line in enumerate(rows):
+        compiler.update(row, line)
+    return compiler
+
+
+def test_bytecode_matches_a_full_compile():
+    compiler = filled(ROWS)
+    assert compiler.bytecode == clv_compile(compiler.lines())
+    assert compiler.compiled == len(ROWS) - 1 and compiler.lines() == [line for line in ROWS if line]
+
+
+@pytest.mark.parametrize("row, line", [(1, "do WRITE y 2"), (0, ""), (3, "do READ y"), (6, "do PRINT"),
+                                       (4, "do LABEL other")])
+def test_edits_splice_in_place(row, line):
+    compiler = filled(ROWS)
+    compiler.label_pc("top")
+    assert compiler.update(row, line)
+    rows = ROWS + [""] * (row + 1 - len(ROWS))
+    rows[row] = line
+    assert compiler.bytecode == clv_compile([line for line in rows if line])
+
+
+def test_unchanged_rows_are_not_recompiled():
+    compiler = filled(ROWS)
+    assert not compiler.update(3, "do READ x")
+    assert compiler.compiled == len(ROWS) - 1
+
+
+def test_labels_follow_edits_above_them():
+    compiler = filled(ROWS)
+    assert compiler.label_pc("top") == 1
+    compiler.update(1, "do WRITE y 2")
+    assert compiler.label_pc("top") == 2
+    compiler.update(2, "do READ x")
+    assert compiler.label_pc("top") is None
+    compiler.update(5, "do LABEL top")
+    assert compiler.label_pc("top") == compiler.offset(5)
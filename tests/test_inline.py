@@ -0,0 +1,78 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.compiler import advanced
+from modusynthx.compiler.advanced import parse_statements
+from modusynthx.compiler.inline import SINGLE_SITE_LIMIT, inline_functions
+from modusynthx.opcodes import advanced_instruction_set as ops
+from modusynthx.vm import AdvancedVM
+
+
+def run(bytecode):
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    vm.execute(bytecode)
+    return vm.out.getvalue().split()
+
+
+def calls(bytecode):
+    return sum(op == ops["CALL"] for op, _ in bytecode)
+
+
+LEAF = ["do WRITE x 2", "do CALL show", "do CALL show", "do END", "do FUNC show", "do READ x", "do PRINT", "do RET"]
+
+
+def test_leaf_calls_are_inlined():
+    inlined, plain = advanced_clv_compile(LEAF), advanced_clv_compile(LEAF, inline=False)
+    assert calls(inlined) == 0 and calls(plain) == 2
+    assert run(inlined) == run(plain) == ["2", "2"]
+
+
+@pytest.mark.parametrize("body", [["do LABEL l", "do READ x", "do PRINT"], ["do LOCAL t", "do READ x", "do STORE t"],
+                                  ["do THREAD show"]])
+def test_bodies_with_control_flow_or_locals_stay_calls(body):
+    lines = ["do WRITE x 2", "do CALL f", "do END", "do FUNC f"] + body + ["do RET",
+                                                                          "do FUNC show", "do READ x", "do RET"]
+    assert calls(advanced_clv_compile(lines)) == 1
+
+
+# A caller becomes straight-line once its own leaf callee is inlined
+def test_inlining_works_bottom_up():
+    lines = ["do WRITE x 2", "do CALL outer", "do END", "do FUNC outer", "do CALL show", "do RET",
+             "do FUNC show", "do READ x", "do PRINT", "do RET"]
+    assert calls(advanced_clv_compile(lines)) == 0 and run(advanced_clv_compile(lines)) == ["2"]
+
+
+def test_recursion_is_never_inlined():
+    lines = ["do CALL a", "do END", "do FUNC a", "do CALL b", "do RET", "do FUNC b", "do CALL a", "do RET"]
+    statements = parse_statements(lines)[0]
+    assert inline_functions(statements) == statements
+
+
+def test_single_site_limit_and_growth_budget():
+    body = ["do READ x"] * (SINGLE_SITE_LIMIT - 1)
+    once = ["do WRITE x 1", "do CALL big", "do END", "do FUNC big"] + body + ["do RET"]
+    assert calls(advanced_clv_compile(once)) == 0
+    many = ["do WRITE x 1"] + ["do CALL big"] * 3 + ["do END", "do FUNC big"] + body + ["do RET"]
+    assert calls(advanced_clv_compile(many)) == 3
+
+
+def test_macros_chain_and_are_expanded_once(monkeypatch):
+    expansions = []
+    real = advanced._expand
+    monkeypatch.setattr(advanced, "_expand", lambda cmd, *a: expansions.append(cmd) or real(cmd, *a))
+    statements = parse_statements(["do MACRO SHOW OUT", "do MACRO OUT PRINT", "do WRITE x 1", "do READ x",
+                                   "do SHOW", "do READ x", "do SHOW"])[0]
+    assert [cmd for _, cmd, _ in statements].count("PRINT") == 2
+    assert expansions.count("OUT") == 1
+
+
+@pytest.mark.parametrize("lines, message", [
+    (["do MACRO A B", "do MACRO B A", "do A"], "Recursive macro"),
+    (["do MACRO E", "do E"], "Empty macro"),
+])
+def test_bad_macros(lines, message):
+    with pytest.raises(ValueError, match=message):
+        advanced_clv_compile(lines)
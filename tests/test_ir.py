@@ -0,0 +1,70 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.compiler.ir import build_ir, optimize
+from modusynthx.opcodes import advanced_instruction_set as ops
+from modusynthx.vm import AdvancedVM
+
+NAMES = {code: name for name, code in ops.items()}
+
+
+def plain(lines):
+    return advanced_clv_compile(lines, typed=False, optimize=False)
+
+
+def names(bytecode):
+    return [NAMES[op] for op, _ in bytecode]
+
+
+def run(bytecode):
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    vm.execute(bytecode)
+    return vm.out.getvalue().split(), vm.pages
+
+
+def test_dead_writes_jumps_and_unreachable_code_go():
+    bytecode = plain(["do WRITE x 1", "do WRITE x 2", "do READ x", "do PRINT", "do JUMP next", "do LABEL next",
+                      "do END", "do WRITE y 3"])
+    assert names(optimize(bytecode, ops)) == ["WRITE", "READ", "PRINT", "END"]
+    assert run(optimize(bytecode, ops)) == run(bytecode)
+
+
+def test_dead_store_takes_its_pure_expression_but_not_a_division():
+    bytecode = plain(["do WRITE a 6", "do WRITE b 3", "do READ a", "do READ b", "do ADD", "do STORE t",
+                      "do READ a", "do READ b", "do DIV", "do STORE t", "do WRITE t 0", "do END"])
+    assert names(optimize(bytecode, ops)) == ["WRITE", "WRITE", "READ", "READ", "DIV", "STORE", "WRITE", "END"]
+
+
+def test_copy_propagation_rewrites_reads():
+    bytecode = plain(["do WRITE y 4", "do WRITE x y", "do READ x", "do PRINT", "do END"])
+    ir = build_ir(bytecode, ops)
+    ir.eliminate_dead_code()
+    assert ir.rewrites == {2: ["y"]}
+    assert run(ir.emit()) == run(bytecode)
+
+
+def test_entries_keep_exported_code():
+    bytecode = plain(["do END", "do FUNC f", "do WRITE x 1", "do RET"])
+    assert names(optimize(bytecode, ops)) == ["END"]
+    assert names(optimize(bytecode, ops, entries=[1])) == ["END", "WRITE", "RET"]
+
+
+@pytest.mark.parametrize("unsafe", ["do SWITCH 0", "do SIFT x", "do THREAD f"])
+def test_unsafe_programs_skip_ssa(unsafe):
+    bytecode = plain(["do WRITE x 1", unsafe, "do WRITE x 2", "do END", "do FUNC f", "do RET"])
+    assert not build_ir(bytecode, ops).ssa_vars
+    assert names(optimize(bytecode, ops)).count("WRITE") == 2
+
+
+def test_phis_and_loops():
+    bytecode = plain(["do WRITE n 3", "do WRITE one 1", "do LABEL top", "do READ n", "do READ one", "do SUB",
+                      "do STORE n", "do READ n", "do JNZ top", "do END"])
+    ir = build_ir(bytecode, ops)
+    loops = ir.loops()
+    assert len(loops) == 1
+    header = next(iter(loops))
+    assert "n" in ir.blocks[header].phis
+    assert run(optimize(bytecode, ops)) == run(bytecode)
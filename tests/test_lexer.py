@@ -0,0 +1,46 @@
+import pytest
+
+from modusynthx.compiler.lexer import LexError, fields, tokenize
+
+
+def kinds(source):
+    return [kind for kind, _, _, _ in tokenize(source)]
+
+
+def test_statement_tokens_and_positions():
+    tokens = list(tokenize("sift.purge.on $TempTokens (after: 5 interactions)\n"))
+    assert [kind for kind, _, _, _ in tokens] == [
+        "NAME", "USER", "LPAREN", "NAME", "COLON", "NUMBER", "NAME", "RPAREN", "NEWLINE"]
+    assert tokens[1][1:] == ("$TempTokens", 1, 15)
+
+
+def test_strings_sigils_cells_and_comments():
+    assert kinds("write @console 'Hi there' # note\n") == ["NAME", "SYSTEM", "STRING", "NEWLINE"]
+    assert kinds("%mem cell[1,2] a::b > c") == ["VIRTUAL", "CELL", "NAME", "BIND", "NAME", "REDIRECT", "NAME"]
+    assert kinds("5_interactions 2.5 .5") == ["NAME", "NUMBER", "NUMBER"]
+
+
+@pytest.mark.parametrize("source", ["pause.briefly   ", "pause.briefly\t", "pause\n  \t", "   "])
+def test_trailing_whitespace_at_end_of_input(source):
+    tokens = list(tokenize(source))
+    assert all(text.strip() for _, text, _, _ in tokens if text != "\n")
+
+
+def test_trailing_whitespace_compiles_on_msx_tier():
+    from modusynthx.compiler import compile_msx_instructions
+    assert compile_msx_instructions(["pause.briefly  "])[-1]["opcode"] == "MSX_FF"
+
+
+def test_errors_carry_line_and_column():
+    with pytest.raises(LexError) as error:
+        list(tokenize("write ok\nwrite 'open\n"))
+    assert (error.value.line, error.value.col) == (2, 7)
+    with pytest.raises(LexError):
+        list(tokenize("write ~"))
+    with pytest.raises(LexError):
+        list(tokenize("write @"))
+
+
+def test_fields_keep_quoted_strings_whole():
+    assert fields("do PRINT 'a b'  c") == ["do", "PRINT", "'a b'", "c"]
+    assert fields("do WRITE x 1") == ["do", "WRITE", "x", "1"]
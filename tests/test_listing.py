@@ -0,0 +1,48 @@
+import gc
+import io
+
+import pytest
+
+from modusynthx.compiler import assemble, compile_msx_instructions, write_listing
+from modusynthx.compiler.listing import ListingError
+
+SOURCE = ["write.quick.on @console 'Hello, ModuSynthX World!'", "sift.purge.on $TempTokens (after: 5 interactions)",
+          "pause.briefly"]
+
+
+def test_round_trip_through_a_listing():
+    program = compile_msx_instructions(SOURCE)
+    out = io.StringIO()
+    write_listing(program, out)
+    assert assemble(io.StringIO(out.getvalue())) == program
+
+
+def test_quotes_and_comments():
+    listing = ["# header comment", "", "MSX_02  @console  'a # b'   # WRITEOUT", "MSX_FF"]
+    assert assemble(listing) == [{"opcode": "MSX_02", "args": ["@console", "'a # b'"]},
+                                 {"opcode": "MSX_FF", "args": []}]
+
+
+@pytest.mark.parametrize("line, message", [("MSX_ZZ x", "unknown opcode"), ("MSX_02 'open", "unterminated string")])
+def test_bad_lines(line, message):
+    with pytest.raises(ListingError, match=f"line 2: {message}"):
+        assemble(["MSX_FF", line])
+
+
+def test_unwritable_argument():
+    with pytest.raises(ListingError, match="cannot be written"):
+        write_listing([{"opcode": "MSX_02", "args": ["two words"]}], io.StringIO())
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_collector_state_is_restored(enabled):
+    was = gc.isenabled()
+    try:
+        gc.enable() if enabled else gc.disable()
+        assemble(["MSX_FF"])
+        assert gc.isenabled() is enabled
+        with pytest.raises(ListingError):
+            assemble(["MSX_ZZ"])
+        assert gc.isenabled() is enabled
+    finally:
+        gc.enable() if was else gc.disable()
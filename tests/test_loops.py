@@ -0,0 +1,84 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.compiler.loops import hoist_invariants, reduce_strength, unroll_loops
+from modusynthx.opcodes import advanced_instruction_set as ops
+from modusynthx.vm import AdvancedVM, EventCounter
+
+NAMES = {code: name for name, code in ops.items()}
+
+
+def countdown(n, body):
+    return (["do WRITE i %d" % n, "do WRITE one 1", "do WRITE k 3", "do WRITE a 2", "do WRITE b 5",
+             "do LABEL top"] + body + ["do READ i", "do READ one", "do SUB", "do STORE i", "do READ i",
+                                       "do JNZ top", "do END"])
+
+
+def plain(lines):
+    return advanced_clv_compile(lines, typed=False, optimize=False)
+
+
+def run(bytecode):
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    vm.execute(bytecode)
+    return vm.out.getvalue().split(), {k: v for k, v in vm.pages[0].items() if not k.startswith("~")}
+
+
+def executed(bytecode):
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    counter = EventCounter()
+    counter.attach(vm.hooks)
+    vm.execute(bytecode)
+    return counter.counts["instruction"]
+
+
+def count(bytecode, name):
+    return sum(NAMES[op] == name for op, _ in bytecode)
+
+
+INVARIANT = ["do READ a", "do READ b", "do MUL", "do PRINT"]
+PRODUCTS = ["do READ i", "do READ k", "do MUL", "do PRINT", "do READ k", "do READ i", "do MUL", "do PRINT",
+            "do READ i", "do READ k", "do MUL", "do STORE p"]
+
+
+def test_hoisting_moves_the_invariant_product_out():
+    bytecode = plain(countdown(20, INVARIANT))
+    hoisted = hoist_invariants(bytecode, ops)
+    assert count(hoisted, "MUL") == 1
+    assert run(hoisted) == run(bytecode)
+
+
+def test_strength_reduction_replaces_products():
+    bytecode = plain(countdown(20, PRODUCTS))
+    reduced = reduce_strength(bytecode, ops)
+    assert count(reduced, "MUL") == 2    # both in the preheader
+    assert executed(reduced) < executed(bytecode)
+    assert run(reduced) == run(bytecode)
+
+
+@pytest.mark.parametrize("n, jumps", [(6, 0), (20, 1), (7 * 11, None)])
+def test_unrolling(n, jumps):
+    bytecode = plain(countdown(n, ["do READ i", "do PRINT"]))
+    unrolled = unroll_loops(bytecode, ops)
+    if jumps is None:
+        assert unrolled == bytecode    # 77 trips: too many to unroll fully, no factor divides it
+    else:
+        assert count(unrolled, "JNZ") == jumps
+    assert run(unrolled) == run(bytecode)
+
+
+@pytest.mark.parametrize("body", [INVARIANT, PRODUCTS, ["do READ i", "do PRINT"]])
+@pytest.mark.parametrize("n", [1, 4, 9, 64])
+def test_compiled_loops_match_unoptimized(body, n):
+    lines = countdown(n, body)
+    assert run(advanced_clv_compile(lines)) == run(plain(lines))
+
+
+def test_loops_with_calls_are_left_alone():
+    lines = countdown(4, ["do CALL f"]) + ["do FUNC f", "do WRITE a 9", "do RET"]
+    bytecode = advanced_clv_compile(lines, typed=False, optimize=False, inline=False)
+    assert unroll_loops(bytecode, ops) == bytecode
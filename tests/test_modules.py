@@ -0,0 +1,76 @@
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from modusynthx.compiler.modules import LinkError, Project, build_program
+from modusynthx.vm import AdvancedVM
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = {
+    "main.synth": ["do IMPORT util", "do IMPORT lib.strings", "do WRITE x 5", "do READ x", "do CALL double",
+                   "do PRINT", "do CALL lib.strings.shout", "do READ total", "do PRINT", "do END"],
+    "util.synth": ["do FUNC double", "do READ x", "do READ x", "do ADD", "do RET"],
+    "lib/strings.synth": ["do IMPORT util", "do FUNC shout", "do WRITE total 0", "do WRITE x 21",
+                          "do CALL double", "do STORE total", "do RET"],
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    for name, lines in MODULES.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n")
+    return tmp_path
+
+
+def run(bytecode):
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    vm.execute(bytecode)
+    return vm.out.getvalue().split()
+
+
+def test_build_links_modules(project):
+    bytecode, _ = build_program(str(project / "main.synth"))
+    assert run(bytecode) == ["10", "42"]
+
+
+def test_rebuild_reuses_unchanged_modules(project):
+    build_program(str(project / "main.synth"))
+    (project / "util.synth").write_text("\n".join(MODULES["util.synth"]).replace("do ADD", "do MUL") + "\n")
+    bytecode, _ = build_program(str(project / "main.synth"))
+    assert run(bytecode) == ["25", "441"]
+
+
+def test_missing_module_is_a_link_error(project):
+    (project / "util.synth").unlink()
+    with pytest.raises(LinkError):
+        build_program(str(project / "main.synth"))
+
+
+def test_pool_build_matches_serial_build(project):
+    serial, stats = build_program(str(project / "main.synth"))
+    pooled = Project(str(project), workers=2, cache_dir="")
+    assert run(pooled.build("main")) == run(serial)
+    assert pooled.stats()["compiled"] == stats["compiled"] == 3
+
+
+# Spawned pool workers import the main module again as __mp_main__; the CLI
+# must not run a second time in them
+@pytest.mark.parametrize("entry", [["-m", "modusynthx"], [os.path.join(ROOT, "bin", "msx")]])
+def test_cli_builds_with_spawned_workers(project, tmp_path, entry):
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "sitecustomize.py").write_text(
+        "import multiprocessing, os\nmultiprocessing.set_start_method('spawn', force=True)\n"
+        "os.cpu_count = lambda: 2\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(site), ROOT]))
+    result = subprocess.run([sys.executable, *entry, "run", str(project / "main.synth")],
+                            capture_output=True, text=True, env=env, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[:2] == ["10", "42"]
@@ -0,0 +1,37 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fresh(code):
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_import_has_no_side_effects():
+    out = fresh("import sys, modusynthx; print(sorted(m for m in sys.modules if m.startswith('modusynthx')))")
+    assert out == "['modusynthx']"
+
+
+def test_engine_never_loads_tkinter_or_zipfile():
+    out = fresh("import sys, modusynthx.vm as v, modusynthx.compiler as c;"
+                "[getattr(v, n) for n in v.__all__]; [getattr(c, n) for n in c.__all__];"
+                "print([m for m in ('tkinter', 'zipfile') if m in sys.modules])")
+    assert out == "[]"
+
+
+@pytest.mark.parametrize("package", ["modusynthx", "modusynthx.vm", "modusynthx.compiler"])
+def test_every_lazy_name_resolves(package):
+    module = importlib.import_module(package)
+    for name in module.__all__:
+        if name in ("ModuSynthX_App", "launch_app", "launch_editor", "launch_advanced_editor"):
+            continue  # needs tkinter
+        assert getattr(module, name) is not None
+    with pytest.raises(AttributeError):
+        module.not_a_name
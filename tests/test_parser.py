@@ -0,0 +1,35 @@
+import pytest
+
+from modusynthx.compiler.parser import ParseError, parse
+
+
+def test_statement_parts():
+    statement, = parse("sift.purge.on $TempTokens (after: 5 interactions, keep: 2)")
+    assert statement.keyword == "sift" and statement.chain == ["purge", "on"]
+    assert statement.operands == ["$TempTokens"]
+    assert statement.options == {"after": "5 interactions", "keep": "2"}
+
+
+def test_redirect_bindings_and_prepositions():
+    first, second = parse(["trigger.release.on interaction-heavy > $ResponseMem", "link.fast a :: b on c"])
+    assert first.operands == ["interaction-heavy"] and first.redirect == "$ResponseMem"
+    assert second.bindings == {"a": "b"} and second.operands == ["c"]
+
+
+@pytest.mark.parametrize("source", ["sift.purge x (", "sift.purge x (after: 5", "sift.purge x (after: 5,",
+                                    "sift.purge x (after: 5\nwrite.quick y"])
+def test_unclosed_options(source):
+    with pytest.raises(ParseError, match=r"unclosed '\('"):
+        parse(source)
+
+
+def test_unexpected_token_in_options():
+    with pytest.raises(ParseError, match="unexpected '>' in options"):
+        parse("sift.purge x (a > b)")
+
+
+def test_unknown_keyword_and_dangling_redirect():
+    with pytest.raises(ParseError, match="unknown keyword"):
+        parse("frobnicate.quick x")
+    with pytest.raises(ParseError, match="> needs an operand"):
+        parse("trigger.release x >")
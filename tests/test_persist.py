@@ -0,0 +1,98 @@
+import io
+import os
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.vm import AdvancedVM
+from modusynthx.vm import persist
+from modusynthx.vm.persist import PersistentStore, StoreError
+
+
+def test_values_survive_reopen(tmp_path):
+    path = str(tmp_path / "vars.msxp")
+    with PersistentStore(path) as store:
+        store["%a"] = 1
+        store["%b"] = [1, "two", 3.0]
+        store["%a"] = 5
+        del store["%b"]
+    assert os.path.exists(path + ".idx")
+    with PersistentStore(path) as store:
+        assert dict(store.items()) == {"%a": 5}
+    os.unlink(path + ".idx")   # without the index every record is scanned
+    with PersistentStore(path) as store:
+        assert store["%a"] == 5 and "%b" not in store
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    path = str(tmp_path / "vars.msxp")
+    with PersistentStore(path) as store:
+        store["%a"] = "kept"
+    size = os.path.getsize(path)
+    os.unlink(path + ".idx")
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+    with PersistentStore(path) as store:
+        assert store["%a"] == "kept"
+    assert os.path.getsize(path) == size
+
+
+@pytest.mark.parametrize("content, message", [(b"not a store at all", "not a ModuSynthX store"),
+                                              (b"MS", "not a ModuSynthX store"),
+                                              (b"MSXP\x09", "unsupported store version")])
+def test_foreign_file_is_refused_and_left_alone(tmp_path, content, message):
+    path = tmp_path / "other.bin"
+    path.write_bytes(content)
+    with pytest.raises(StoreError, match=message):
+        PersistentStore(str(path))
+    assert path.read_bytes() == content
+    assert not os.path.exists(str(path) + ".idx")
+
+
+def test_short_writes_are_completed(tmp_path, monkeypatch):
+    write = os.write
+    monkeypatch.setattr(persist.os, "write", lambda fd, data: write(fd, bytes(data[:3])))
+    path = str(tmp_path / "vars.msxp")
+    with PersistentStore(path) as store:
+        store["%greeting"] = "hello, world"
+    monkeypatch.undo()
+    with PersistentStore(path) as store:
+        assert store["%greeting"] == "hello, world"
+
+
+def test_failed_write_leaves_no_torn_record(tmp_path, monkeypatch):
+    path = str(tmp_path / "vars.msxp")
+    store = PersistentStore(path)
+    store["%a"] = 1
+    size = os.path.getsize(path)
+    write = os.write
+
+    def fail_midway(fd, data):
+        write(fd, bytes(data[:4]))
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(persist.os, "write", fail_midway)
+    with pytest.raises(StoreError):
+        store["%b"] = "x" * 100
+    monkeypatch.undo()
+    assert os.path.getsize(path) == size
+    store["%c"] = 3
+    store.close()
+    os.unlink(path + ".idx")
+    with PersistentStore(path) as store:
+        assert dict(store.items()) == {"%a": 1, "%c": 3}
+
+
+def test_vm_keeps_percent_variables_in_the_store(tmp_path):
+    path = str(tmp_path / "vars.msxp")
+    bytecode = advanced_clv_compile(["do READ %count", "do WRITE one 1", "do READ one", "do ADD",
+                                     "do STORE %count", "do READ %count", "do PRINT", "do END"])
+    for expected in ("1", "2"):
+        vm = AdvancedVM()
+        vm.out = io.StringIO()
+        with PersistentStore(path) as store:
+            if "%count" not in store:
+                store["%count"] = 0
+            vm.persist = store
+            vm.execute(bytecode)
+        assert vm.out.getvalue().split() == [expected]
@@ -0,0 +1,63 @@
+import io
+import threading
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.compiler.advanced import parse_statements
+from modusynthx.vm import AdvancedVM
+from modusynthx.vm.policy import LOWPOWER_QUANTUM, ModifierStats
+
+COUNTDOWN = ["lowpower WRITE n 40", "lowpower WRITE one 1", "lowpower LABEL top", "do READ n", "do READ one",
+             "do SUB", "do STORE n", "do READ n", "do JNZ top"]
+
+
+def run(lines):
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    vm.execute(advanced_clv_compile(lines, optimize=False))   # unrolling would take the jumps away
+    return vm
+
+
+def modes(lines):
+    return [(mod, args) for mod, cmd, args in parse_statements(lines)[0] if cmd == "MODE"]
+
+
+def test_optimized_only_programs_get_no_mode_instructions():
+    assert modes(["quick WRITE a 1", "fast READ a", "do PRINT"]) == []
+
+
+def test_modes_are_restated_after_labels_and_functions():
+    assert modes(COUNTDOWN + ["do END", "do FUNC f", "do RET"]) == [
+        ("lowpower", ["lowpower", "lowpower"]), ("do", ["lowpower", "lowpower"]), ("do", ["optimized", "default"])]
+
+
+def test_lowpower_yields_every_quantum_jumps():
+    stats = run(COUNTDOWN + ["do END"]).modifier_stats()
+    assert stats["lowpower"]["entries"] == 1
+    assert stats["lowpower"]["yields"] == 39 // LOWPOWER_QUANTUM
+
+
+def test_heavy_threads_run_on_the_shared_pool():
+    names = []
+
+    def write(vm, pc, opcode, args):
+        if args == ["t", 1]:
+            names.append(threading.current_thread().name)
+
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    vm.hooks.add("instruction", write)
+    vm.execute(advanced_clv_compile(["heavy THREAD w", "do THREAD w", "do JOIN", "do END",
+                                     "do FUNC w", "do WRITE t 1", "do RET"], inline=False))
+    assert len(names) == 2 and sum(name.startswith("msx-heavy") for name in names) == 1
+    assert vm.modifier_stats()["heavy"]["pooled"] == 1
+
+
+def test_modifier_stats_accumulate_and_copy():
+    stats = ModifierStats()
+    stats.add("idle", "lowpower", entries=1, yields=2)
+    stats.add("idle", "lowpower", yields=3, seconds=0.5)
+    snapshot = stats.snapshot()
+    assert snapshot == {"idle": {"policy": "lowpower", "entries": 1, "seconds": 0.5, "yields": 5}}
+    snapshot["idle"]["entries"] = 99
+    stats.clear()
+    assert stats.snapshot() == {}
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from modusynthx.compiler import advanced_clv_compile  # noqa: E402
+from modusynthx.gui.runner import ScriptRunner  # noqa: E402
+from modusynthx.vm import AdvancedVM  # noqa: E402
+
+FOREVER = ["do WRITE x 1", "do LABEL top", "do READ x", "do PRINT", "do JUMP top"]
+
+
+def wait(runner, done, timeout=10):
+    text, states = [], []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        out, state = runner.drain(limit=1)   # one event at a time, so no status is skipped
+        text.append(out)
+        if state is not None:
+            states.append(state)
+            if done(state):
+                return "".join(text), states
+        elif not out:
+            time.sleep(0.01)
+    pytest.fail(f"runner never finished: {states}")
+
+
+@pytest.fixture
+def runner():
+    runner = ScriptRunner()
+    yield runner
+    runner.shutdown()
+
+
+def test_output_and_status_go_through_the_queue(runner):
+    runner.submit(advanced_clv_compile, ["do WRITE x 3", "do READ x", "do PRINT", "do END"], AdvancedVM)
+    text, states = wait(runner, lambda state: state.startswith("finished"))
+    assert text == "3\n" and states[0] in ("compiling", "running 4 instructions")
+    assert not runner.busy()
+
+
+def test_errors_are_reported(runner):
+    runner.submit(advanced_clv_compile, ["do MACRO A B", "do MACRO B A", "do A"], AdvancedVM)
+    _, states = wait(runner, lambda state: state.startswith("error"))
+    assert "Recursive macro" in states[-1]
+
+
+def test_new_run_cancels_the_old_one_on_the_same_worker(runner):
+    runner.submit(advanced_clv_compile, FOREVER, AdvancedVM)
+    wait(runner, lambda state: state.startswith("running"))
+    worker = runner.worker
+    runner.submit(advanced_clv_compile, ["do END"], AdvancedVM)
+    _, states = wait(runner, lambda state: state.startswith("finished"))
+    assert any(state.startswith("stopped") for state in states)
+    assert runner.worker is worker
+
+
+def test_cancel_stops_a_running_script(runner):
+    runner.submit(advanced_clv_compile, FOREVER, AdvancedVM)
+    wait(runner, lambda state: state.startswith("running"))
+    runner.cancel()
+    wait(runner, lambda state: state.startswith("stopped"))
+    assert not runner.busy()
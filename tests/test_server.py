@@ -0,0 +1,181 @@
+import base64
+import http.client
+import json
+import os
+import socket
+import struct
+import threading
+
+import pytest
+
+from modusynthx.server import MAX_MESSAGE, ExecutionServer
+from modusynthx.tiers import CompileError, load_tier
+
+ROWS = {"count": 3, "rows": {"0": ["do", "WRITE", "", "x", "5"], "1": ["do", "READ", "", "x", ""],
+                             "2": ["do", "PRINT", "", "", ""]}, "run": True}
+
+
+@pytest.fixture
+def server():
+    server = ExecutionServer(("127.0.0.1", 0), tier="full", pool_size=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body, headers=None):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    conn.request("POST", "/rows", body, {"Content-Type": "application/json", **(headers or {})})
+    response = conn.getresponse()
+    result = response.status, response.read()
+    conn.close()
+    return result
+
+
+def test_compile_error_is_a_compile_error():
+    compile_fn, _, _ = load_tier("full")
+    with pytest.raises(CompileError):
+        compile_fn(["do WRITE"])
+
+
+def test_post_runs_rows(server):
+    status, body = post(server, json.dumps(ROWS))
+    assert status == 200
+    replies = json.loads(body)
+    assert replies[0]["type"] == "compiled" and replies[-1]["type"] == "done"
+    assert "".join(r["text"] for r in replies if r["type"] == "output").split() == ["5"]
+
+
+def test_post_compile_error_is_a_400(server):
+    status, body = post(server, json.dumps({"count": 1, "rows": {"0": ["do", "WRITE", "", "", ""]}}))
+    assert status == 400 and b"IndexError" in body
+    assert post(server, json.dumps(ROWS))[0] == 200   # the server is still serving
+
+
+def test_post_refuses_other_sites_and_other_content_types(server):
+    host = "%s:%d" % server.server_address
+    assert post(server, json.dumps(ROWS), {"Content-Type": "text/plain"})[0] == 415
+    assert post(server, json.dumps(ROWS), {"Origin": "http://evil.example"})[0] == 403
+    assert post(server, json.dumps(ROWS), {"Origin": f"http://{host}"})[0] == 200
+
+
+# DNS rebinding: a foreign page whose name now resolves to 127.0.0.1 sends its own
+# name as both Host and Origin, which agree with each other
+def test_post_refuses_hosts_that_are_not_this_server(server):
+    port = server.server_address[1]
+    rebound = f"evil.example:{port}"
+    assert post(server, json.dumps(ROWS), {"Host": rebound, "Origin": f"http://{rebound}"})[0] == 403
+    assert post(server, json.dumps(ROWS), {"Host": rebound})[0] == 403
+    local = f"localhost:{port}"
+    assert post(server, json.dumps(ROWS), {"Host": local, "Origin": f"http://{local}"})[0] == 200
+
+
+class Client:
+    def __init__(self, server, origin=None):
+        self.sock = socket.create_connection(server.server_address, timeout=10)
+        key = base64.b64encode(os.urandom(16)).decode()
+        host = "%s:%d" % server.server_address
+        request = (f"GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                   f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n")
+        if origin:
+            request += f"Origin: {origin}\r\n"
+        self.sock.sendall((request + "\r\n").encode())
+        self.file = self.sock.makefile("rb")
+        self.status = int(self.file.readline().split()[1])
+        while self.file.readline() not in (b"\r\n", b""):
+            pass
+
+    def send(self, payload, length=None):
+        length = len(payload) if length is None else length
+        if length < 126:
+            header = struct.pack("!BB", 0x81, 0x80 | length)
+        else:
+            header = struct.pack("!BBQ", 0x81, 0x80 | 127, length)
+        self.sock.sendall(header + b"\0\0\0\0" + payload)
+
+    def recv(self):
+        first, second = self.file.read(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.file.read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.file.read(8))[0]
+        return first & 0x0F, self.file.read(length)
+
+    def message(self):
+        opcode, payload = self.recv()
+        assert opcode == 0x1
+        return json.loads(payload)
+
+    def close(self):
+        self.file.close()   # makefile() holds the socket open until it is closed too
+        self.sock.close()
+
+
+def test_websocket_reports_compile_errors_and_keeps_going(server):
+    client = Client(server)
+    assert client.status == 101
+    client.send(json.dumps({"count": 1, "rows": {"0": ["do", "WRITE", "", "", ""]}}).encode())
+    error = client.message()
+    assert error["type"] == "error" and "IndexError" in error["error"]
+    client.send(json.dumps(ROWS).encode())
+    assert client.message()["type"] == "compiled"
+    client.close()
+
+
+def test_websocket_closes_on_an_oversized_message(server):
+    client = Client(server)
+    client.send(b"", length=MAX_MESSAGE + 1)
+    opcode, payload = client.recv()
+    assert opcode == 0x8 and struct.unpack("!H", payload)[0] == 1009
+    client.close()
+
+
+def test_websocket_refuses_other_sites(server):
+    client = Client(server, origin="http://evil.example")
+    assert client.status == 403
+    client.close()
+
+
+# Table rows for "modifier command [target]" lines
+def rows(*lines, tier="advanced"):
+    cells = {}
+    for i, line in enumerate(lines):
+        modifier, command, *target = line.split()
+        cells[str(i)] = [modifier, command, "", " ".join(target), ""]
+    return json.dumps({"count": len(lines), "rows": cells, "run": True, "tier": tier})
+
+
+# A THREAD child that never ends used to outlive the run timeout: stop() never
+# reached it, and releasing the VM waited on it forever
+def test_timeout_stops_thread_children():
+    server = ExecutionServer(("127.0.0.1", 0), tier="advanced", pool_size=1, timeout=0.3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        spin = rows("do THREAD spin", "do JOIN", "do END", "do FUNC spin", "do LABEL top", "do JUMP top")
+        status, body = post(server, spin)
+        assert status == 200 and json.loads(body)[-1]["timed_out"]
+        assert post(server, rows("do WRITE x 5", "do READ x", "do PRINT"))[0] == 200   # the VM came back
+        assert server.pools["advanced"].stats()["reused"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# A client that hangs up mid-run ends its session quietly: the VM goes back to
+# the pool and socketserver's handle_error (a traceback on stderr) is not reached
+def test_websocket_client_closing_mid_run_is_not_an_error(server):
+    errors, finished = [], threading.Event()
+    server.handle_error = lambda request, address: errors.append(address)
+    shutdown_request = server.shutdown_request
+    server.shutdown_request = lambda request: (shutdown_request(request), finished.set())
+    client = Client(server)
+    client.send(rows("do WRITE i 20000", "do WRITE one 1", "do LABEL top", "do READ i", "do PRINT", "do READ i",
+                     "do READ one", "do SUB", "do STORE i", "do READ i", "do JNZ top", "do END").encode())
+    assert client.message()["type"] == "compiled"
+    client.close()
+    assert finished.wait(10) and not errors
+    assert server.pools["advanced"].stats()["idle"] == 1
@@ -0,0 +1,99 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile
+from modusynthx.vm import AdvancedVM
+from modusynthx.vm.snapshot import FIELDS, SnapshotError, decode, encode, load
+
+# Stops inside a call, with a local, a queued task, a second page and % data live
+PROGRAM = ["do WRITE %seen 1", "do QUEUE 1 later", "do PAGE", "do WRITE x 4", "do READ x", "do CALL count",
+           "do DISPATCH", "do END",
+           "do FUNC count n", "do LOCAL left", "do READ n", "do STORE left", "do LABEL top",
+           "do READ left", "do PRINT", "do READ left", "do WRITE one 1", "do READ one", "do SUB", "do STORE left",
+           "do READ left", "do JNZ top", "do RET",
+           "do FUNC later", "do WRITE s 'later'", "do READ s", "do PRINT", "do RET"]
+
+
+def vm_stopping_after(steps, **kwargs):
+    vm = AdvancedVM(**kwargs)
+    vm.out = io.StringIO()
+    seen = []
+
+    def step(vm, pc, opcode, args):
+        seen.append(pc)
+        if len(seen) == steps:
+            vm.stop()
+
+    vm.hooks.add("instruction", step)
+    return vm
+
+
+def state(vm):
+    return vm.pages, list(vm.stack), dict(vm.persist), vm.page_index
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"stack_capacity": 2}])
+@pytest.mark.parametrize("steps", [3, 12, 20])
+def test_restored_vm_finishes_like_an_uninterrupted_one(kwargs, steps):
+    bytecode = advanced_clv_compile(PROGRAM, inline=False)
+    whole = AdvancedVM(**kwargs)
+    whole.out = io.StringIO()
+    whole.execute(bytecode)
+
+    first = vm_stopping_after(steps, **kwargs)
+    first.execute(bytecode)
+    restored = AdvancedVM.restore(first.snapshot())
+    restored.out = io.StringIO()
+    restored.resume(bytecode)
+    assert first.out.getvalue() + restored.out.getvalue() == whole.out.getvalue()
+    assert state(restored) == state(whole)
+    assert type(restored.stack) is type(whole.stack)
+
+
+@pytest.mark.parametrize("value", [None, True, False, 0, -1, 2 ** 70, -(2 ** 70), 1.5, "", "naïve", b"\x00\xff",
+                                   [1, "a", "a", (2.0, None)], {"k": {"k": [True]}}])
+def test_values_round_trip(value):
+    assert decode(encode(value)) == value
+    assert type(decode(encode(value))) is type(value)
+
+
+def test_bad_images():
+    image = AdvancedVM().snapshot()
+    with pytest.raises(SnapshotError, match="not a ModuSynthX snapshot"):
+        AdvancedVM.restore(b"XXXX" + image[4:])
+    with pytest.raises(SnapshotError, match="unsupported snapshot version"):
+        AdvancedVM.restore(image[:4] + b"\x63" + image[5:])
+    with pytest.raises(SnapshotError, match="truncated"):
+        load(image[:-3], len(FIELDS))
+    with pytest.raises(SnapshotError, match="cannot snapshot"):
+        encode(object())
+    assert issubclass(SnapshotError, ValueError)
+
+
+def test_forks_share_pages_until_written():
+    parent = AdvancedVM()
+    parent.out = io.StringIO()
+    parent.execute(advanced_clv_compile(["do WRITE x 1", "do WRITE y 2", "do END"]))
+    child = parent.fork()
+    assert child.pages[0] is parent.pages[0]
+    child.out = io.StringIO()
+    child.execute(advanced_clv_compile(["do WRITE x 9", "do READ x", "do PRINT", "do END"]))
+    assert child.out.getvalue() == "9\n" and parent.pages[0]["x"] == 1 and child.pages[0]["y"] == 2
+    assert child.page_stats()["copies"] == 1
+
+
+def test_flow_limits_and_policy_survive_a_restore():
+    lines = ["flow.quantum 50", "flow.rate 1000000", "lowpower WRITE n 400", "lowpower WRITE one 1",
+             "lowpower LABEL top", "do READ n", "do READ one", "do SUB", "do STORE n", "do READ n", "do JNZ top",
+             "do END"]
+    bytecode = advanced_clv_compile(lines, optimize=False)
+    vm = AdvancedVM()
+    vm.execute(bytecode)
+    assert vm.flow.status == "quantum"
+    restored = AdvancedVM.restore(vm.snapshot())
+    assert restored.flow.quantum == 50 and restored.flow.bucket.rate == 1000000
+    assert (restored.policy, restored.modifier, restored.lowpower) == ("lowpower", "lowpower", True)
+    left = restored.pages[0]["n"]
+    restored.resume(bytecode)
+    assert restored.flow.status == "quantum" and 0 < restored.pages[0]["n"] < left
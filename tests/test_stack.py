@@ -0,0 +1,64 @@
+import pytest
+
+from modusynthx.vm.stack import RingStack, dedupe, keep_last, make_stack
+
+
+def filled(values, capacity=4, overflow="spill"):
+    stack = RingStack(capacity, overflow)
+    for value in values:
+        stack.append(value)
+    return stack
+
+
+def test_spill_keeps_every_entry_in_order():
+    stack = filled(range(10))
+    assert list(stack) == list(range(10)) and len(stack) == 10 and stack[-1] == 9 and stack[0] == 0
+    assert [stack.pop() for _ in range(10)] == list(range(9, -1, -1))
+    assert not stack
+    with pytest.raises(IndexError):
+        stack.pop()
+
+
+def test_drop_overwrites_the_oldest():
+    stack = filled(range(6), overflow="drop")
+    assert list(stack) == [2, 3, 4, 5] and stack.dropped == 2
+
+
+def test_error_policy_and_bad_arguments():
+    with pytest.raises(MemoryError):
+        filled(range(5), overflow="error")
+    with pytest.raises(ValueError):
+        RingStack(0)
+    with pytest.raises(ValueError):
+        RingStack(4, "bogus")
+
+
+@pytest.mark.parametrize("n", [0, 1, 3, 6, 20])
+def test_keep_last_matches_list(n):
+    values = list(range(9))
+    stack, plain = filled(values), list(values)
+    keep_last(stack, n)
+    keep_last(plain, n)
+    assert list(stack) == plain
+    stack.append("new")
+    assert stack[-1] == "new" and len(stack) == len(plain) + 1
+
+
+def test_dedupe_matches_list_across_spill_and_ring():
+    values = [1, 2, 1, 3, 2, 4, 4, 5, 1]
+    stack, plain = filled(values, capacity=3), list(values)
+    dedupe(stack)
+    dedupe(plain)
+    assert list(stack) == plain == [1, 2, 3, 4, 5]
+    assert stack.pop() == 5 and stack.peek() == 4
+
+
+def test_make_stack_defaults_to_a_list():
+    assert make_stack() == [] and isinstance(make_stack(8), RingStack)
+    assert filled([1, 2, 3])[1:] == [2, 3]
+
+
+def test_spill_pushes_and_pops_through_the_list_methods():
+    stack = RingStack(4)
+    assert "append" not in vars(stack) and type(stack).pop is list.pop
+    assert "append" in vars(RingStack(4, "drop"))
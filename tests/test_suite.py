@@ -0,0 +1,37 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import suite  # noqa: E402
+
+from modusynthx.compiler import clv_compile  # noqa: E402
+from modusynthx.vm import ModuSynthX_VM  # noqa: E402
+
+
+# Every workload runs on every tier that can express it, at a tiny size
+@pytest.mark.parametrize("name", sorted(suite.WORKLOADS))
+def test_workload_runs(name):
+    results = suite.run_suite([name], list(suite.TIERS), 20, repeat=1, warmup=0, log=lambda line: None)
+    assert results and all(stats["runs"] == 1 for stats in results.values())
+
+
+def test_compare_flags_regressions(capsys):
+    stats = {"median": 2.0}
+    regressions = suite.compare({"a/full": stats, "b/full": stats, "c/full": stats},
+                                {"a/full": {"median": 1.0}, "b/full": {"median": 1.9}}, threshold=0.1)
+    assert regressions == ["a/full"]
+    assert "new" in capsys.readouterr().out
+
+
+# A failed PING used to `continue` without advancing the pc and spin forever
+def test_threaded_vm_drops_failed_pings():
+    vm = ModuSynthX_VM()
+    bytecode = clv_compile(["do PING fail", "do PING", "do OPTIMIZE"])
+    runner = threading.Thread(target=vm.execute, args=(bytecode,), daemon=True)
+    runner.start()
+    runner.join(5)
+    assert not runner.is_alive()
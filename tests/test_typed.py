@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile, full_clv_compile
+from modusynthx.compiler.typed import decode_literal, infer_types, specialize
+from modusynthx.opcodes import advanced_instruction_set as ops
+from modusynthx.vm import AdvancedVM, FullVM
+
+NAMES = {code: name for name, code in ops.items()}
+
+
+def run(vm, bytecode):
+    vm.out = io.StringIO()
+    vm.execute(bytecode)
+    return vm.out.getvalue().split()
+
+
+@pytest.mark.parametrize("token, expected", [("42", ("int", 42)), ("-3", ("int", -3)), ("2.5", ("float", 2.5)),
+                                             ("1e3", ("float", 1000.0)), ("'hi'", ("str", "hi")), ("x", None)])
+def test_decode_literal(token, expected):
+    assert decode_literal(token) == expected
+
+
+def test_literals_are_decoded_into_writek():
+    untyped = advanced_clv_compile(["do WRITE a 7", "do WRITE b 'seven'", "do WRITE c a"],
+                                   typed=False, optimize=False)
+    out, var_types = specialize(untyped, ops)
+    assert [(NAMES[op], args) for op, args in out] == [
+        ("WRITEK", ["a", 7]), ("WRITEK", ["b", "seven"]), ("WRITEV", ["c", "a"])]
+    assert var_types == {"a": "int", "b": "str", "c": "int"}
+
+
+def test_arithmetic_is_specialized_by_operand_types():
+    lines = ["do WRITE i 2", "do WRITE f 0.5", "do WRITE s 'x'", "do READ i", "do READ i", "do ADD",
+             "do READ i", "do READ f", "do MUL", "do READ s", "do READ i", "do ADD", "do END"]
+    opnames = [NAMES[op] for op, _ in advanced_clv_compile(lines, optimize=False)]
+    assert opnames.count("ADD_I") == 1 and opnames.count("MUL_F") == 1 and opnames.count("ADD") == 1
+
+
+def test_declared_type_conflict():
+    bytecode = advanced_clv_compile(["do WRITE x 'text'"], typed=False, optimize=False)
+    with pytest.raises(TypeError, match="declared int"):
+        infer_types(bytecode, ops, {"x": "int"})
+    with pytest.raises(ValueError, match="Unknown type"):
+        infer_types(bytecode, ops, {"x": "number"})
+
+
+# Untyped WRITE only decodes integers, so the programs stick to those
+@pytest.mark.parametrize("lines", [
+    ["do WRITE a 7", "do WRITE b 2", "do READ a", "do READ b", "do DIV", "do PRINT",
+     "do READ a", "do READ b", "do MOD", "do PRINT", "do END"],
+    ["do WRITE n 4", "do WRITE one 1", "do WRITE acc 1", "do LABEL top", "do READ acc", "do READ n", "do MUL",
+     "do STORE acc", "do READ n", "do READ one", "do SUB", "do STORE n", "do READ n", "do JNZ top",
+     "do READ acc", "do PRINT", "do END"],
+])
+def test_typed_and_untyped_programs_agree(lines):
+    assert run(AdvancedVM(), advanced_clv_compile(lines)) == run(AdvancedVM(), advanced_clv_compile(lines, typed=False))
+    assert run(FullVM(), full_clv_compile(lines)) == run(FullVM(), full_clv_compile(lines, typed=False))
@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from modusynthx.compiler import advanced_clv_compile, verify
+from modusynthx.compiler.verifier import VerifyError
+from modusynthx.opcodes import advanced_instruction_set as ops
+from modusynthx.vm import AdvancedVM
+
+
+def raw(lines):
+    return advanced_clv_compile(lines, typed=False, optimize=False, inline=False)
+
+
+def test_proved_reads_use_the_fast_form():
+    result = verify(raw(["do WRITE x 1", "do READ x", "do READ x", "do ADD", "do PRINT", "do END"]))
+    assert result.stats() == {"max_depth": 2, "routines": 1, "reads": 2}
+    assert [op for op, _ in result.bytecode].count(ops["LOADG"]) == 2
+    vm = AdvancedVM()
+    vm.out = io.StringIO()
+    vm.execute(result.bytecode)
+    assert vm.out.getvalue() == "2\n"
+
+
+def test_callee_definitions_count_for_the_caller():
+    result = verify(raw(["do CALL f", "do READ r", "do PRINT", "do END", "do FUNC f", "do WRITE r 5", "do RET"]))
+    assert result.routines == 2 and result.reads == 1
+
+
+def test_host_defined_names():
+    bytecode = raw(["do READ y", "do PRINT", "do END"])
+    with pytest.raises(VerifyError, match="y may be read before it is written"):
+        verify(bytecode)
+    assert verify(bytecode, defined=["y"]).reads == 1
+
+
+@pytest.mark.parametrize("bytecode, message", [
+    (raw(["do ADD", "do END"]), "pc 0: pops an empty stack"),
+    (raw(["do WRITE x 1", "do READ x", "do JZ s", "do WRITE y 2", "do LABEL s", "do READ y", "do END"]),
+     "pc 4: y may be read"),
+    (raw(["do WRITE x 1", "do SIFT x", "do READ x", "do END"]), "pc 2: x may be read"),
+    (raw(["do WRITE x 1", "do READ x", "do JZ a", "do READ x", "do LABEL a", "do END"]),
+     "stack depth is 0 on one path here and 1 on another"),
+    (raw(["do CALL f", "do END", "do FUNC f", "do WRITE x 1", "do READ x", "do CALL f", "do RET"]),
+     "grows without bound"),
+    ([(ops["JUMP"], [99])], "JUMP target 99 is outside the program"),
+    ([(250, [])], "unknown opcode 250"),
+    ([(ops["READ"], [])], "READ cannot take 0 arguments"),
+])
+def test_rejected_programs(bytecode, message):
+    with pytest.raises(VerifyError, match=message) as info:
+        verify(bytecode)
+    assert isinstance(info.value, ValueError) and info.value.pc is not None
+
+
+def test_compiler_rejects_undefined_targets_when_verifying():
+    assert advanced_clv_compile(["do JUMP nowhere"])    # sent to 0 without verify
+    with pytest.raises(VerifyError, match="nowhere is not a label or function"):
+        advanced_clv_compile(["do JUMP nowhere"], verify=True)